@@ -1,4 +1,4 @@
-import MetaTrader5 as mt5
+from config import timeframes as tf
 import os
 from dotenv import load_dotenv
 
@@ -9,9 +9,12 @@ load_dotenv()
 
 # --- MT5 Settings ---
 SYMBOL = "BTCUSD"           # Change to your broker's BTC symbol
-TIMEFRAME = mt5.TIMEFRAME_M15 # or mt5.TIMEFRAME_H1
+TIMEFRAME = tf.TIMEFRAME_M15 # or tf.TIMEFRAME_H1
 MAGIC_NUMBER = 999999       # Unique ID for this bot's orders
 DEVIATION = 20              # Slippage points
+ORDER_MAX_RETRIES = 3       # Resend at a fresh price on Requote / Price Off (max times)
+ORDER_RETRY_DELAY = 0.05    # Seconds between resends
+ORDER_TEMPLATE_TTL = 3600   # Re-read symbol specs (filling mode, tick value) every N seconds
 
 # --- Strategy Parameters ---
 EMA_TREND_PERIOD = 200
@@ -43,12 +46,18 @@ ENABLE_PROFIT_LOCK = True
 PROFIT_LOCK_PERCENT = 0.65  # Lock 50% profit when profit reaches 65% of TP
 PROFIT_LOCK_LEVEL = 0.5     
 
+# ⚡ Protection Loop: checks BE / Profit Lock / Partial TP / Exit on every tick in its own thread
+ENABLE_PROTECTION_LOOP = True
+PROTECTION_INTERVAL = 0.2       # Seconds between tick checks
+POSITION_CACHE_SECONDS = 2.0    # Re-read open positions at most every N seconds
+
 DAILY_LOSS_LIMIT = 2.0      # 🛑 Stop trading if lost more than $2 today
 HEARTBEAT_HOURS = 1         # 💓 Send status report every 1 hour
 
 # --- Execution Controls ---
 WAIT_FOR_CANDLE_CLOSE = True # ⏳ Prevent False Signals
 MAX_SPREAD_POINTS = 1000     # ⚠️ Don't enter if spread is too wide
+USE_SHARED_MARKET_DATA = False # 📡 Read bars from market_publisher.py (falls back to MT5 if not running)
 
 # --- Notifications ---
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')     # ใส่ Token จาก @BotFather
@@ -1,17 +1,20 @@
-import MetaTrader5 as mt5
+from utils.mt5_gateway import terminal as mt5
 import pandas as pd
 import logging
 from . import config
-
-# Missing constants in some MT5 versions
-SYMBOL_FILLING_FOK = 1
-SYMBOL_FILLING_IOC = 2
-SYMBOL_FILLING_RETURN = 4
+from utils.order_executor import OrderExecutor
+from utils.fill_quality import FillLog
 
 class MT5Executor:
     def __init__(self):
         self.connected = False
         self.filling_type = mt5.ORDER_FILLING_IOC # Default
+        # 🚀 Entries: pre-built order template, fresh price at send, requote retries
+        self.orders = OrderExecutor(config.MAGIC_NUMBER, deviation=config.DEVIATION,
+                                    max_retries=config.ORDER_MAX_RETRIES,
+                                    retry_delay=config.ORDER_RETRY_DELAY,
+                                    template_ttl=config.ORDER_TEMPLATE_TTL,
+                                    strategy="BTC_RSI_EMA", fill_log=FillLog())
 
     def connect(self):
         """Initializes connection to MT5 and detects filling mode with retry logic for IPC timeouts"""
@@ -38,16 +41,9 @@ class MT5Executor:
             mt5.shutdown()
             return False
             
-        # Detect Filling Type (Crucial for different brokers)
-        filling_mode = symbol_info.filling_mode
-        if filling_mode & SYMBOL_FILLING_IOC:
-            self.filling_type = mt5.ORDER_FILLING_IOC
-        elif filling_mode & SYMBOL_FILLING_FOK:
-            self.filling_type = mt5.ORDER_FILLING_FOK
-        else:
-            self.filling_type = mt5.ORDER_FILLING_RETURN
-
-
+        # Detect Filling Type (Crucial for different brokers) - kept in the order template
+        template = self.orders.prepare(config.SYMBOL)
+        self.filling_type = template.request["type_filling"]
 
         if not symbol_info.visible:
             if not mt5.symbol_select(config.SYMBOL, True):
@@ -77,46 +73,16 @@ class MT5Executor:
             return account_info.balance
         return 0
 
-    def create_order(self, symbol, order_type, volume, price, sl=0.0, tp=0.0, comment=""):
-        """Sends an order to MT5"""
-        request = {
-            "action": mt5.TRADE_ACTION_DEAL,
-            "symbol": symbol,
-            "volume": volume,
-            "type": order_type,
-            "price": price,
-            "sl": sl,
-            "tp": tp,
-            "deviation": config.DEVIATION,
-            "magic": config.MAGIC_NUMBER,
-            "comment": comment,
-            "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": self.filling_type,
-        }
-        
-        # RETRY LOGIC for Requotes
-        for attempt in range(3):
-            result = mt5.order_send(request)
-            if result is None:
-                logging.error(f"❌ order_send() returned None. Check MT5 connection.")
-                return None
-
-            if result.retcode in [mt5.TRADE_RETCODE_REQUOTE, mt5.TRADE_RETCODE_PRICE_OFF]:
-                logging.warning(f"⚠️ Requote/Price Off (Attempt {attempt+1}). Retrying...")
-                # Update price for retry if it's a market order
-                tick = mt5.symbol_info_tick(symbol)
-                if tick:
-                    request["price"] = tick.ask if order_type == mt5.ORDER_TYPE_BUY else tick.bid
-                import time
-                time.sleep(0.5)
-                continue
-            
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
-                logging.error(f"❌ Order Failed: {result.comment} ({result.retcode})")
-                return None
-            return result
-        
-        return None
+    def create_order(self, symbol, order_type, volume, price, sl=0.0, tp=0.0, comment="", signal_time=None, spread=None):
+        """Sends a market order to MT5 (`price` is the signal price; the order goes out at the latest tick)"""
+        result = self.orders.send(symbol, order_type, volume, sl=sl, tp=tp, comment=comment, signal_time=signal_time,
+                                  decision_price=price, spread_points=spread)
+        if result is None:
+            return None
+        if result.retcode != mt5.TRADE_RETCODE_DONE:
+            logging.error(f"❌ Order Failed: {result.comment} ({result.retcode})")
+            return None
+        return result
 
     def close_position(self, position, volume=None):
         """Closes a specific MT5 position (supports partial close)"""
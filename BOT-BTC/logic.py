@@ -1,5 +1,5 @@
 import logging
-import MetaTrader5 as mt5
+from utils.mt5_gateway import terminal as mt5
 from utils.indicators import Indicators
 
 from . import config
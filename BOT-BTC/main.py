@@ -5,13 +5,17 @@ import csv
 import pandas as pd
 from datetime import datetime
 
-import MetaTrader5 as mt5
+from utils.mt5_gateway import terminal as mt5  # Serialised (main loop + protection thread)
 from .execution import MT5Executor
 from .logic import TradingLogic
 from utils.indicators import Indicators
+from utils.indicator_cache import cached_call
 
 from . import config
 from utils.news_manager import NewsManager
+from utils.shared_market_data import SharedMarketFeed
+from utils.position_guard import PositionGuard
+from utils.entry_store import EntryStore
 
 
 logging.basicConfig(
@@ -20,6 +24,8 @@ logging.basicConfig(
     datefmt='%H:%M:%S'
 )
 
+entry_store = EntryStore()  # 🗄️ Typed entry log (batched SQLite appends)
+
 
 def send_notification(message):
     """Sends notification via Telegram and Line Notify"""
@@ -41,30 +47,12 @@ def send_notification(message):
         except Exception as e:
             logging.error(f"Line Notify failed: {e}")
 
-def save_entry_log(ticket, type, price, rsi, ema):
-    """Saves trade entry details to CSV for analysis"""
+def save_entry_log(ticket, type, price, rsi, ema, sl=None, tp=None):
+    """Writes a typed entry record to data/entry_log.sqlite (shared with the XAUUSD bot)"""
     try:
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
-        if not os.path.exists(data_dir):
-            os.makedirs(data_dir)
-            
-        file_path = os.path.join(data_dir, 'entry_log.csv')
-        file_exists = os.path.isfile(file_path)
-        with open(file_path, mode='a', newline='', encoding='utf-8-sig') as file:
-            writer = csv.writer(file)
-            if not file_exists:
-                writer.writerow(['Time', 'Ticket', 'Strategy', 'Type', 'Price', 'Reason', 'Indicators'])
-            
-            writer.writerow([
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 
-                ticket, 
-                "BTC_RSI_EMA", 
-                type, 
-                price, 
-                "Signal Confirmed", 
-                f"RSI:{rsi:.1f} EMA:{ema:.1f}"
-            ])
-
+        entry_store.append(ticket, type, price, "Signal Confirmed", {'rsi': rsi, 'ema_trend': ema},
+                           strategy="BTC_RSI_EMA", symbol=config.SYMBOL, sl=sl, tp=tp)
+        entry_store.flush()  # On disk before the bot moves on: a crash must not lose a fill
     except Exception as e:
         logging.error(f"Error saving entry log: {e}")
 
@@ -171,6 +159,98 @@ def get_daily_pnl():
         logging.error(f"Error calculating Daily PnL: {e}")
         return 0.0
 
+def protect_position(executor, pos, tick, sym_info, bar):
+    """BE / Profit Lock / Partial TP / RSI-EMA exit for one position. Returns True if the position changed."""
+    # --- PROTECTIVE LOGIC (BE/TS) ---
+    point = sym_info.point
+    changed = False
+
+    # Calculate profit in points
+    if pos.type == mt5.ORDER_TYPE_BUY:
+        profit_points = (tick.bid - pos.price_open) / point
+    elif pos.type == mt5.ORDER_TYPE_SELL:
+        profit_points = (pos.price_open - tick.ask) / point
+    else: return False
+
+    # --- NEW PROFIT PROTECTION LOGIC (2 STAGES) ---
+    tp_dist_pts = abs(pos.tp - pos.price_open) / point if pos.tp != 0 else config.STOP_LOSS_POINTS * config.RISK_REWARD_RATIO
+
+    # Stage 1: Break Even (40% of TP)
+    if config.ENABLE_BREAK_EVEN:
+        be_trigger_pts = tp_dist_pts * config.BE_PERCENT
+        if profit_points >= be_trigger_pts:
+            target_be = pos.price_open + (config.BE_LOCK_POINTS * point) if pos.type == mt5.ORDER_TYPE_BUY else pos.price_open - (config.BE_LOCK_POINTS * point)
+
+            # Move SL only if it improves the position
+            if pos.type == mt5.ORDER_TYPE_BUY:
+                if pos.sl < (target_be - point):
+                    logging.info(f"🛡️ Stage 1: BE Set (+100) for BTC Ticket {pos.ticket}")
+                    changed = executor.modify_position(pos.ticket, target_be, pos.tp) or changed
+            else: # SELL
+                if pos.sl > (target_be + point) or pos.sl == 0:
+                    logging.info(f"🛡️ Stage 1: BE Set (+100) for BTC Ticket {pos.ticket}")
+                    changed = executor.modify_position(pos.ticket, target_be, pos.tp) or changed
+
+    # Stage 2: Profit Lock (65% of TP)
+    if config.ENABLE_PROFIT_LOCK:
+        pl_trigger_pts = tp_dist_pts * config.PROFIT_LOCK_PERCENT
+        if profit_points >= pl_trigger_pts:
+            # Target SL is 50% of original TP distance
+            target_lock = pos.price_open + (tp_dist_pts * config.PROFIT_LOCK_LEVEL * point) if pos.type == mt5.ORDER_TYPE_BUY else pos.price_open - (tp_dist_pts * config.PROFIT_LOCK_LEVEL * point)
+
+            # Move SL only if it improves the position
+            if pos.type == mt5.ORDER_TYPE_BUY:
+                if pos.sl < (target_lock - point):
+                    logging.info(f"🔒 Stage 2: Profit Lock (50%) for BTC Ticket {pos.ticket}")
+                    changed = executor.modify_position(pos.ticket, target_lock, pos.tp) or changed
+            else: # SELL
+                if pos.sl > (target_lock + point) or pos.sl == 0:
+                    logging.info(f"🔒 Stage 2: Profit Lock (50%) for BTC Ticket {pos.ticket}")
+                    changed = executor.modify_position(pos.ticket, target_lock, pos.tp) or changed
+
+    # 3. Partial Take Profit
+    if config.ENABLE_PARTIAL_TP:
+        # Calculate risk in points (initial SL distance)
+        risk_pts = abs(pos.price_open - pos.sl) / point if pos.sl > 0 else config.STOP_LOSS_POINTS
+        target_pts = risk_pts * config.PARTIAL_TP_RR
+
+        # Only partial close if profit reaches target RR and volume is still original
+        # (We check comment or volume to ensure we don't partial close multiple times)
+        if profit_points >= target_pts and pos.volume >= config.LOT_SIZE:
+            # Verify if we can actually split this lot
+            if pos.volume >= (sym_info.volume_min * 2):
+                partial_vol = round(pos.volume * config.PARTIAL_TP_RATIO, 2)
+                logging.info(f"💰 Partial TP Triggered for {pos.ticket} | Closing {partial_vol} lots")
+                res_p = executor.close_position(pos, volume=partial_vol)
+                if res_p:
+                    changed = True
+                    send_notification(f"💰 PARTIAL TP SUCCESS (Ticket {pos.ticket})\nClosed: {partial_vol}\nRemaining: {pos.volume - partial_vol}")
+            else:
+                # Lot too small to split, skip but log once
+                logging.debug(f"Skip Partial TP for {pos.ticket}: Volume {pos.volume} too small to split.")
+
+    # Exit Condition (Long): RSI Overbought or price below EMA 20
+    # Exit Condition (Short): RSI Oversold or price above EMA 20
+    # `bar` = latest rsi / ema_exit / close from the signal loop (empty until its first pass)
+    should_exit = False
+    if not bar:
+        return changed
+    if pos.type == mt5.ORDER_TYPE_BUY:
+        if bar['rsi'] > config.RSI_OVERBOUGHT or bar['close'] < bar['ema_exit']:
+            should_exit = True
+    elif pos.type == mt5.ORDER_TYPE_SELL:
+        if bar['rsi'] < config.RSI_OVERSOLD or bar['close'] > bar['ema_exit']:
+            should_exit = True
+
+    if should_exit:
+        logging.info(f"🔴 Signal EXIT for Ticket {pos.ticket} | Closing Position...")
+        res = executor.close_position(pos)
+        if res:
+            changed = True
+            send_notification(f"✅ EXIT SUCCESS (Ticket {pos.ticket})\nPrice: {bar['close']}")
+    return changed
+
+
 def main():
     logging.info("🚀 Starting BTC Trading Bot (MT5 Edition)")
     
@@ -193,8 +273,21 @@ def main():
 
     logic = TradingLogic(executor)
     news_manager = NewsManager() # Initialize once
+    shared_feed = SharedMarketFeed() if config.USE_SHARED_MARKET_DATA else None
     last_candle_time = None
 
+    # ⚡ Protection Loop: BE / Profit Lock / Partial TP / Exit on every tick (own thread)
+    # last_bar = rsi / ema_exit / close of the latest bar, updated in place by the main loop
+    last_bar = {}
+    position_guard = None
+    if config.ENABLE_PROTECTION_LOOP:
+        position_guard = PositionGuard(
+            config.SYMBOL, config.MAGIC_NUMBER,
+            lambda pos, tick, info: protect_position(executor, pos, tick, info, dict(last_bar, close=tick.bid) if last_bar else {}),
+            interval=config.PROTECTION_INTERVAL, positions_refresh=config.POSITION_CACHE_SECONDS,
+        )
+        position_guard.start()
+
     iteration_count = 0
     last_heartbeat_time = 0 # Unix timestamp
 
@@ -255,9 +348,13 @@ def main():
                 msg = f"💓 Heartbeat Status\nBalance: {balance}\nDaily PnL: {daily_pnl:.2f}\nBot is running normally."
                 send_notification(msg)
                 last_heartbeat_time = now_ts
+                mt5.log_report()  # 📞 Terminal call counts / latency
+                executor.orders.log_report()  # ⚡ Signal -> fill latency
 
-            # 1. Fetch Market Data
-            df = executor.fetch_ohlcv(config.SYMBOL, config.TIMEFRAME, 300)
+            # 1. Fetch Market Data (Shared Memory first, then MT5)
+            df = shared_feed.get_frame(config.SYMBOL, config.TIMEFRAME, 300) if shared_feed else None
+            if df is None:
+                df = executor.fetch_ohlcv(config.SYMBOL, config.TIMEFRAME, 300)
             if df is None:
                 time.sleep(10)
                 continue
@@ -267,9 +364,9 @@ def main():
             df['high'] = pd.to_numeric(df['high'])
             df['low'] = pd.to_numeric(df['low'])
             
-            df['ema_trend'] = Indicators.calculate_ema(df['close'], config.EMA_TREND_PERIOD)
-            df['ema_exit'] = Indicators.calculate_ema(df['close'], config.EMA_EXIT_PERIOD)
-            df['rsi'] = Indicators.calculate_rsi(df['close'], config.RSI_PERIOD)
+            df['ema_trend'] = cached_call(Indicators.calculate_ema, df['close'], config.EMA_TREND_PERIOD)
+            df['ema_exit'] = cached_call(Indicators.calculate_ema, df['close'], config.EMA_EXIT_PERIOD)
+            df['rsi'] = cached_call(Indicators.calculate_rsi, df['close'], config.RSI_PERIOD)
 
             
             # --- FETCH CURRENT TICK ---
@@ -302,9 +399,11 @@ def main():
             
             last_row = df.iloc[-1]
             price = last_row['close']
+            last_bar.update(rsi=last_row['rsi'], ema_exit=last_row['ema_exit'], close=price)
             
             # 4. Signal Logic & Execution
             signal = logic.check_signal(df)
+            signal_time = time.perf_counter()  # ⚡ Start of signal -> fill latency
             
             # --- NEWS FILTER CHECK ---
             is_news, news_title = news_manager.is_news_time(avoid_minutes=30)
@@ -343,102 +442,25 @@ def main():
 
                     side_str = "BUY" if signal == 'buy' else "SELL"
                     logging.info(f"🟢 Signal {side_str} | Price: {price_exec} | SL: {sl_price} | TP: {tp_price} | News: {news_title}")
-                    res = executor.create_order(config.SYMBOL, order_type, config.LOT_SIZE, price_exec, sl=sl_price, tp=tp_price)
+                    res = executor.create_order(config.SYMBOL, order_type, config.LOT_SIZE, price_exec, sl=sl_price, tp=tp_price, signal_time=signal_time, spread=spread)
                     if res:
                         last_candle_time = current_candle_time 
-                        save_entry_log(res.order, side_str, price_exec, last_row['rsi'], last_row['ema_trend'])
+                        if position_guard is not None:
+                            position_guard.invalidate()
+                        save_entry_log(res.order, side_str, price_exec, last_row['rsi'], last_row['ema_trend'], sl=sl_price, tp=tp_price)
                         send_notification(f"✅ {side_str} BTC SUCCESS\nPrice: {price_exec}\nSL: {sl_price}\nTP: {tp_price}")
 
             
-            elif in_position:
-                for pos in active_positions:
-                    # --- PROTECTIVE LOGIC (BE/TS) ---
-                    sym_info = mt5.symbol_info(config.SYMBOL)
-                    if sym_info is None: continue
-                    point = sym_info.point
-                    
-                    # Calculate profit in points
-                    if pos.type == mt5.ORDER_TYPE_BUY:
-                        profit_points = (tick.bid - pos.price_open) / point
-                    elif pos.type == mt5.ORDER_TYPE_SELL:
-                        profit_points = (pos.price_open - tick.ask) / point
-                    else: continue
-                    
-                    # --- NEW PROFIT PROTECTION LOGIC (2 STAGES) ---
-                    tp_dist_pts = abs(pos.tp - pos.price_open) / point if pos.tp != 0 else config.STOP_LOSS_POINTS * config.RISK_REWARD_RATIO
-                    
-                    # Stage 1: Break Even (40% of TP)
-                    if config.ENABLE_BREAK_EVEN:
-                        be_trigger_pts = tp_dist_pts * config.BE_PERCENT
-                        if profit_points >= be_trigger_pts:
-                            target_be = pos.price_open + (config.BE_LOCK_POINTS * point) if pos.type == mt5.ORDER_TYPE_BUY else pos.price_open - (config.BE_LOCK_POINTS * point)
-                            
-                            # Move SL only if it improves the position
-                            if pos.type == mt5.ORDER_TYPE_BUY:
-                                if pos.sl < (target_be - point):
-                                    logging.info(f"🛡️ Stage 1: BE Set (+100) for BTC Ticket {pos.ticket}")
-                                    executor.modify_position(pos.ticket, target_be, pos.tp)
-                            else: # SELL
-                                if pos.sl > (target_be + point) or pos.sl == 0:
-                                    logging.info(f"🛡️ Stage 1: BE Set (+100) for BTC Ticket {pos.ticket}")
-                                    executor.modify_position(pos.ticket, target_be, pos.tp)
-
-                    # Stage 2: Profit Lock (65% of TP)
-                    if config.ENABLE_PROFIT_LOCK:
-                        pl_trigger_pts = tp_dist_pts * config.PROFIT_LOCK_PERCENT
-                        if profit_points >= pl_trigger_pts:
-                            # Target SL is 50% of original TP distance
-                            target_lock = pos.price_open + (tp_dist_pts * config.PROFIT_LOCK_LEVEL * point) if pos.type == mt5.ORDER_TYPE_BUY else pos.price_open - (tp_dist_pts * config.PROFIT_LOCK_LEVEL * point)
-                            
-                            # Move SL only if it improves the position
-                            if pos.type == mt5.ORDER_TYPE_BUY:
-                                if pos.sl < (target_lock - point):
-                                    logging.info(f"🔒 Stage 2: Profit Lock (50%) for BTC Ticket {pos.ticket}")
-                                    executor.modify_position(pos.ticket, target_lock, pos.tp)
-                            else: # SELL
-                                if pos.sl > (target_lock + point) or pos.sl == 0:
-                                    logging.info(f"🔒 Stage 2: Profit Lock (50%) for BTC Ticket {pos.ticket}")
-                                    executor.modify_position(pos.ticket, target_lock, pos.tp)
-
-                    # 3. Partial Take Profit
-                    if config.ENABLE_PARTIAL_TP:
-                        # Calculate risk in points (initial SL distance)
-                        risk_pts = abs(pos.price_open - pos.sl) / point if pos.sl > 0 else config.STOP_LOSS_POINTS
-                        target_pts = risk_pts * config.PARTIAL_TP_RR
-                        
-                        # Only partial close if profit reaches target RR and volume is still original
-                        # (We check comment or volume to ensure we don't partial close multiple times)
-                        if profit_points >= target_pts and pos.volume >= config.LOT_SIZE:
-                            # Verify if we can actually split this lot
-                            if pos.volume >= (sym_info.volume_min * 2):
-                                partial_vol = round(pos.volume * config.PARTIAL_TP_RATIO, 2)
-                                logging.info(f"💰 Partial TP Triggered for {pos.ticket} | Closing {partial_vol} lots")
-                                res_p = executor.close_position(pos, volume=partial_vol)
-                                if res_p:
-                                    send_notification(f"💰 PARTIAL TP SUCCESS (Ticket {pos.ticket})\nClosed: {partial_vol}\nRemaining: {pos.volume - partial_vol}")
-                            else:
-                                # Lot too small to split, skip but log once
-                                logging.debug(f"Skip Partial TP for {pos.ticket}: Volume {pos.volume} too small to split.")
-
-                    # Exit Condition (Long): RSI Overbought or price below EMA 20
-                    # Exit Condition (Short): RSI Oversold or price above EMA 20
-                    should_exit = False
-                    if pos.type == mt5.ORDER_TYPE_BUY:
-                        if last_row['rsi'] > config.RSI_OVERBOUGHT or last_row['close'] < last_row['ema_exit']:
-                            should_exit = True
-                    elif pos.type == mt5.ORDER_TYPE_SELL:
-                        if last_row['rsi'] < config.RSI_OVERSOLD or last_row['close'] > last_row['ema_exit']:
-                            should_exit = True
-
-                    if should_exit:
-                        logging.info(f"🔴 Signal EXIT for Ticket {pos.ticket} | Closing Position...")
-                        res = executor.close_position(pos)
-                        if res:
-                            send_notification(f"✅ EXIT SUCCESS (Ticket {pos.ticket})\nPrice: {price}")
+            elif in_position and not (position_guard and position_guard.running):
+                sym_info = mt5.symbol_info(config.SYMBOL)
+                if sym_info is not None:
+                    for pos in active_positions:
+                        protect_position(executor, pos, tick, sym_info, last_bar)
 
 
             # Sync history and Heartbeat Logging
             sync_trade_history()
+            entry_store.flush_if_due()
             if iteration_count % 6 == 0:
                 logging.info(f"💓 Heartbeat | RSI: {last_row['rsi']:.1f} | EMA200: {last_row['ema_trend']:.1f} | Price: {tick.bid:.2f}")
             iteration_count += 1
@@ -448,6 +470,8 @@ def main():
             
         except KeyboardInterrupt:
             logging.info("👋 Bot stopped by user. Shutting down...")
+            if position_guard is not None:
+                position_guard.stop()
             mt5.shutdown()
             break
         except Exception as e:
@@ -1,4 +1,4 @@
-import MetaTrader5 as mt5
+from utils.mt5_gateway import terminal as mt5  # Serialised (signal loop + protection thread)
 import pandas as pd
 import time
 from datetime import datetime, timedelta
@@ -9,11 +9,6 @@ import sys
 import shutil
 import requests
 
-# Missing constants in some MT5 versions
-SYMBOL_FILLING_FOK = 1
-SYMBOL_FILLING_IOC = 2
-SYMBOL_FILLING_RETURN = 4
-
 
 # Ensure project root is in path
 # sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Redundant if running from root
@@ -25,10 +20,25 @@ from strategies.macd_rsi import MACDRSIStrategy
 from strategies.ob_fvg_fibo import OBFVGFiboStrategy
 from strategies.triple_confluence import TripleConfluenceStrategy
 from utils.news_manager import NewsManager
+from utils.shared_market_data import SharedMarketFeed, consistent
+from utils.indicator_graph import IndicatorEngine
+from utils.indicator_cache import cached_call
+from utils.bar_series import BarSeries
+from utils.resampler import BarResampler
+from utils.order_block_tracker import OrderBlockTracker
+from utils.fvg_registry import FVGRegistry
+from utils.live_candle import LiveCandle
+from utils.position_guard import PositionGuard
+from utils.order_executor import OrderExecutor
+from utils.fill_quality import FillLog
+from utils.entry_store import EntryStore
+from utils.state_journal import StateJournal, Snapshot
 
 class XAUUSDBot:
-    def __init__(self, strategy_name="TRIPLE_CONFLUENCE"):
-        self.symbol = Config.SYMBOL
+    def __init__(self, strategy_name="TRIPLE_CONFLUENCE", symbol=None):
+        self.symbol = symbol or Config.SYMBOL
+        # Per-symbol settings (Config.SYMBOL_OVERRIDES) win over strategy overrides
+        self.symbol_overrides = getattr(Config, 'SYMBOL_OVERRIDES', {}).get(self.symbol, {})
         self.connected = False
         self.last_error_time = 0
         self.strategy_name = strategy_name
@@ -60,6 +70,57 @@ class XAUUSDBot:
         # Track partially closed tickets to prevent double triggers
         self.partially_closed_tickets = set()
         self.last_trade_candle_time = None # 🛡️ Candle Guard
+        self.last_log_time = 0.0
+        self.status_prefix = "" # e.g. "[XAGUSD] " when several symbols share the console
+            
+        # ⏱️ Lazy indicators: only the columns each consumer declares are computed
+        self.indicator_engine = IndicatorEngine()
+
+        # 🕐 Local MTF bars (resampled from the base timeframe, seeded once)
+        self.mtf_resampler = None
+        if Config.ENABLE_MTF_FILTER and Config.MTF_LOCAL_RESAMPLE and \
+                BarResampler.supports(self.get_setting('TIMEFRAME'), Config.MTF_TIMEFRAME):
+            self.mtf_resampler = BarResampler(self.get_setting('TIMEFRAME'), Config.MTF_TIMEFRAME,
+                                              ema_period=Config.MTF_EMA_PERIOD)
+        self.mtf_seeded = False
+
+        # ⚡ Break Even / Profit Lock on its own thread (started by run())
+        self.position_guard = None
+        if Config.ENABLE_PROTECTION_LOOP:
+            self.position_guard = PositionGuard(self.symbol, self.magic_number, self.protect_tick,
+                                                interval=Config.PROTECTION_INTERVAL,
+                                                positions_refresh=Config.POSITION_CACHE_SECONDS)
+
+        # 🚀 Entries: pre-built order template, fresh price at send, requote retries
+        self.order_executor = OrderExecutor(self.magic_number, deviation=self.get_setting('DEVIATION'),
+                                            comment="Bot " + strategy_name,
+                                            max_retries=Config.ORDER_MAX_RETRIES,
+                                            retry_delay=Config.ORDER_RETRY_DELAY,
+                                            template_ttl=Config.ORDER_TEMPLATE_TTL,
+                                            strategy=strategy_name, fill_log=FillLog())
+
+        # 🗄️ Entry log: typed rows in SQLite, written in batches
+        self.entry_store = EntryStore(batch_size=Config.ENTRY_LOG_BATCH, flush_seconds=Config.ENTRY_LOG_FLUSH_SECONDS)
+
+        # ♻️ Warm restart: state journal (fsync per change) + bar / resampler snapshot
+        self.history_synced_until = None  # Epoch of the last trade history sync
+        self.bar_cache = {}  # {timeframe: raw bars} for incremental fetches
+        name = f"{self.symbol}_{self.magic_number}"
+        self.state = StateJournal(name, compact_every=Config.STATE_JOURNAL_COMPACT) if Config.ENABLE_STATE_JOURNAL else None
+        self.snapshot = Snapshot(name) if Config.ENABLE_BAR_SNAPSHOT else None
+        self.restore_state()
+
+        # ⚡ Realtime: forming candle from ticks (full fetch only when a new candle opens)
+        self.live_candle = None
+        if Config.USE_REALTIME_CANDLE and Config.USE_TICK_CANDLE:
+            self.live_candle = LiveCandle(self.symbol, self.get_setting('TIMEFRAME'), self.strategy)
+
+        # 🧵 Async runtime (app/runtime.py) when one drives this bot: Telegram posts and disk
+        # writes are handed to it instead of running inline
+        self.runtime = None
+
+        # 📡 Shared market data (published by market_publisher.py)
+        self.shared_feed = SharedMarketFeed() if Config.USE_SHARED_MARKET_DATA else None
             
         # Connect
         self.news_manager = NewsManager()
@@ -67,7 +128,9 @@ class XAUUSDBot:
             sys.exit(1)
             
     def get_setting(self, key):
-        """Get setting with strategy override priority"""
+        """Get setting with priority: symbol override > strategy override > Config"""
+        if key in self.symbol_overrides:
+            return self.symbol_overrides[key]
         return self.config_overrides.get(key, getattr(Config, key))
 
     def connect_mt5(self):
@@ -93,6 +156,7 @@ class XAUUSDBot:
                     return False
             
             self.connected = True
+            self.order_executor.prepare(self.symbol)
             
             # --- CALCULATE SERVER TIME OFFSET ---
             # Get current server time and local time to find difference
@@ -102,7 +166,7 @@ class XAUUSDBot:
                 local_dt = datetime.now()
                 # Round to nearest hour
                 diff_seconds = (server_dt - local_dt).total_seconds()
-                self.server_time_offset = round(diff_seconds / 3600)
+                self.remember('server_time_offset', round(diff_seconds / 3600))
                 logging.info(f"🕒 Calculated Server Time Offset: {self.server_time_offset} hours")
             
             logging.info(f"✅ Connected to MT5: {self.symbol}")
@@ -116,6 +180,11 @@ class XAUUSDBot:
     def get_server_time(self):
         """Returns current MT5 server time as datetime object"""
         try:
+            if self.shared_feed is not None:
+                tick_time = self.shared_feed.get_server_time(self.symbol, self.get_setting('TIMEFRAME'))
+                if tick_time:
+                    return datetime.fromtimestamp(tick_time)
+
             tick = mt5.symbol_info_tick(self.symbol)
             if tick:
                 return datetime.fromtimestamp(tick.time)
@@ -124,10 +193,15 @@ class XAUUSDBot:
             return datetime.now() + timedelta(hours=self.server_time_offset)
             
     def send_telegram_message(self, message):
-        """Sends a notification to Telegram if enabled."""
+        """Sends a notification to Telegram if enabled (queued on the runtime's outbox when there is one)."""
         if not Config.TELEGRAM_ENABLED or not Config.TELEGRAM_TOKEN or not Config.TELEGRAM_CHAT_ID:
             return
-            
+        if self.runtime is not None:
+            self.runtime.notify(message)
+            return
+        return self.post_telegram(message)
+
+    def post_telegram(self, message):
         try:
             url = f"https://api.telegram.org/bot{Config.TELEGRAM_TOKEN}/sendMessage"
             payload = {
@@ -142,60 +216,154 @@ class XAUUSDBot:
             logging.error(f"❌ Failed to send Telegram: {e}")
             return False
 
-    def get_market_data(self, timeframe=None):
-        """Fetches and prepares market data for indicator calculation"""
+    def get_market_data(self, timeframe=None, indicators=None, owner=None):
+        """
+        Fetches and prepares market data for indicator calculation.
+        `indicators`: columns (or {column: params}) to compute. Defaults to what the strategy declares.
+        From the shared feed: SharedBars (zero-copy, read them through consistent()).
+        """
         if timeframe is None:
             timeframe = self.get_setting('TIMEFRAME')
+        if indicators is None:
+            indicators = self.strategy
+            owner = owner or self.strategy_name
             
         try:
+            # 0. Shared Memory Feed (No terminal call, indicators already computed)
+            if self.shared_feed is not None:
+                bars = self.shared_feed.get_bars(self.symbol, timeframe, Config.SMC_LOOKBACK + 500)
+                if bars is not None:
+                    return bars
+
             # 1. Fetch Rates
-            rates = mt5.copy_rates_from_pos(self.symbol, timeframe, 0, Config.SMC_LOOKBACK + 500)
-            
-            if rates is None:
-                logging.warning("❌ Failed to get data")
+            df = self.fetch_rates(timeframe)
+            if df is None:
                 return None
-                
-            df = pd.DataFrame(rates)
-            df['time'] = pd.to_datetime(df['time'], unit='s')
-            
-            # Calculate Common Indicators using Utils
-            # 1. EMA Trend
-            df['ema_trend'] = Indicators.calculate_ema(df['close'], Config.EMA_TREND)
-            
-            # 2. MACD
-            macd, signal = Indicators.calculate_macd(
-                df['close'], 
-                Config.MACD_FAST, 
-                Config.MACD_SLOW, 
-                Config.MACD_SIGNAL
-            )
-            df['macd_line'] = macd
-            df['macd_signal'] = signal
             
-            # 3. RSI
-            df['rsi'] = Indicators.calculate_rsi(df['close'], Config.RSI_PERIOD)
-            
-            # 5. Bollinger Bands
-            bb_upper, bb_middle, bb_lower = Indicators.calculate_bollinger_bands(
-                df['close'], Config.BB_PERIOD, Config.BB_STD
-            )
-            df['bb_upper'] = bb_upper
-            df['bb_middle'] = bb_middle
-            df['bb_lower'] = bb_lower
-            
-            # 6. ATR
-            df['atr'] = Indicators.calculate_atr(df, Config.ATR_PERIOD)
-
-            # 7. ADX
-            df['adx'] = Indicators.calculate_adx(df, Config.ADX_PERIOD)
+            # Calculate only the required indicators (dependency graph, each once)
+            self.indicator_engine.compute(df, indicators, owner=owner)
             
             return df
         except Exception as e:
             logging.error(f"Data Fetch Error: {e}")
             return None
 
-    def get_dynamic_lot_size(self, sl_points=0):
-        """Calculates lot size based on Risk Management Settings"""
+    def get_live_bars(self):
+        """Realtime mode: forming candle updated from new ticks only; full fetch on a new candle"""
+        try:
+            if self.live_candle.poll():
+                return self.live_candle.bars
+        except Exception as e:
+            logging.error(f"Tick Candle Error: {e}")
+
+        df = self.get_market_data()
+        if df is None:
+            return None
+        try:
+            _, ready = consistent(BarSeries.wrap(df), self.live_candle.reset)
+            if ready:
+                return self.live_candle.bars
+        except Exception as e:
+            logging.error(f"Tick Candle Error: {e}")
+        return df
+
+    def fetch_rates(self, timeframe=None):
+        """
+        Raw OHLC bars from MT5 (no indicators).
+        With cached bars (earlier call or warm-start snapshot) only the latest
+        INCREMENTAL_FETCH_BARS are pulled and joined on; no overlap -> full fetch.
+        """
+        if timeframe is None:
+            timeframe = self.get_setting('TIMEFRAME')
+        count = Config.SMC_LOOKBACK + 500
+        cached = self.bar_cache.get(timeframe)
+        df = None
+        if cached is not None and Config.INCREMENTAL_FETCH_BARS < count:
+            rates = mt5.copy_rates_from_pos(self.symbol, timeframe, 0, Config.INCREMENTAL_FETCH_BARS)
+            if rates is not None and len(rates) > 0:
+                recent = pd.DataFrame(rates)
+                recent['time'] = pd.to_datetime(recent['time'], unit='s')
+                first = recent['time'].iloc[0]
+                if cached['time'].iloc[0] <= first <= cached['time'].iloc[-1]:
+                    # Closed bars before the overlap are final; the overlap is replaced by fresh values
+                    df = pd.concat([cached[cached['time'] < first], recent], ignore_index=True)
+                    df = df.iloc[-count:].reset_index(drop=True)
+
+        if df is None:
+            rates = mt5.copy_rates_from_pos(self.symbol, timeframe, 0, count)
+            if rates is None:
+                logging.warning(f"❌ Failed to get data ({self.symbol})")
+                return None
+            df = pd.DataFrame(rates)
+            df['time'] = pd.to_datetime(df['time'], unit='s')
+
+        new_bar = cached is None or df['time'].iloc[-1] != cached['time'].iloc[-1]
+        self.bar_cache[timeframe] = df.copy()  # Raw columns only (indicators are added to df in place)
+        if new_bar:
+            self.save_snapshot()
+        return df
+
+    def restore_state(self):
+        """Warm restart: journaled state + bar / resampler snapshot (a missing piece just means a cold start)"""
+        started = time.perf_counter()
+        restored = []
+        if self.state is not None:
+            for key in ('last_trade_candle_time', 'partially_closed_tickets', 'last_error_time',
+                        'server_time_offset', 'history_synced_until'):
+                if key in self.state.state:
+                    setattr(self, key, self.state.get(key))
+                    restored.append(key)
+        if self.snapshot is not None:
+            data = self.snapshot.load()
+            if data:
+                self.bar_cache = data.get('bars', {})
+                saved = data.get('mtf_resampler')
+                if self.mtf_resampler is not None and saved is not None and \
+                        (saved.base_seconds, saved.tf_seconds, saved.ema_period) == \
+                        (self.mtf_resampler.base_seconds, self.mtf_resampler.tf_seconds, self.mtf_resampler.ema_period):
+                    self.mtf_resampler = saved
+                    self.mtf_seeded = True
+                saved = data.get('ob_tracker')
+                if saved is not None and hasattr(self.strategy, 'ob_tracker'):
+                    # analyze() replaces it if SMC_LOOKBACK / MAX_SL_POINTS changed since
+                    tracker = OrderBlockTracker(saved['lookback'], saved['max_sl_points'])
+                    tracker.restore(saved)
+                    self.strategy.ob_tracker = tracker
+                saved = data.get('fvg_registry')
+                if saved is not None and hasattr(self.strategy, 'fvg_registry'):
+                    registry = FVGRegistry()
+                    registry.restore(saved)
+                    self.strategy.fvg_registry = registry
+                restored.append(f"{sum(len(b) for b in self.bar_cache.values())} bars")
+        if restored:
+            logging.info(f"♻️ Warm start {self.symbol} ({self.strategy_name}): {', '.join(restored)} "
+                         f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def remember(self, key, value):
+        """Sets a piece of bot state and journals it (on disk before the caller moves on)"""
+        setattr(self, key, value)
+        if self.state is not None:
+            self.state.set(key, value)
+
+    def save_snapshot(self):
+        if self.snapshot is None:
+            return
+        tracker = getattr(self.strategy, 'ob_tracker', None)
+        registry = getattr(self.strategy, 'fvg_registry', None)
+        blob = self.snapshot.encode({
+            'bars': self.bar_cache,
+            'mtf_resampler': self.mtf_resampler if self.mtf_seeded else None,
+            'ob_tracker': tracker.snapshot() if tracker is not None else None,
+            'fvg_registry': registry.snapshot() if registry is not None else None,
+        })
+        # Pickled here (consistent state), written to disk by the runtime if there is one
+        if self.runtime is not None:
+            self.runtime.write_behind(self.snapshot.write, blob)
+        else:
+            self.snapshot.write(blob)
+
+    def get_dynamic_lot_size(self, sl_points=0, symbol_info=None):
+        """Calculates lot size based on Risk Management Settings (`symbol_info`: anything with point / trade_tick_value / trade_tick_size)"""
         try:
             account_info = mt5.account_info()
             if account_info is None:
@@ -209,7 +377,8 @@ class XAUUSDBot:
                 risk_per_trade = Config.RISK_PERCENT 
                 risk_amount = balance * (risk_per_trade / 100.0)
                 
-                symbol_info = mt5.symbol_info(self.symbol)
+                if symbol_info is None:
+                    symbol_info = mt5.symbol_info(self.symbol)
                 if not symbol_info: return Config.MIN_LOT
                 
                 # Calculate value per point for 1 lot
@@ -265,38 +434,71 @@ class XAUUSDBot:
             logging.error(f"Position Check Error: {e}")
             return True # Fail safe
 
+    def update_mtf_resampler(self, bars):
+        """Feeds base bars into the local MTF resampler (first call seeds it from a longer base history)"""
+        if self.mtf_resampler is None:
+            return
+        try:
+            last_base = self.mtf_resampler.last_base_time
+            if self.mtf_seeded and last_base is not None and len(bars) > 0 and \
+                    int(bars.time_at(0).timestamp()) > last_base + self.mtf_resampler.base_seconds:
+                # Restored resampler older than the fetched window: bars in between are missing
+                self.mtf_resampler = BarResampler(self.get_setting('TIMEFRAME'), Config.MTF_TIMEFRAME,
+                                                  ema_period=Config.MTF_EMA_PERIOD)
+                self.mtf_seeded = False
+            if not self.mtf_seeded:
+                self.mtf_seeded = True
+                seed_count = self.mtf_resampler.seed_bars(Config.SMC_LOOKBACK + 500)
+                rates = mt5.copy_rates_from_pos(self.symbol, self.get_setting('TIMEFRAME'), 0, seed_count)
+                if rates is not None and len(rates) > 0:
+                    seed = pd.DataFrame(rates)
+                    seed['time'] = pd.to_datetime(seed['time'], unit='s')
+                    self.mtf_resampler.update(seed)
+            self.mtf_resampler.update(bars)
+        except Exception as e:
+            logging.error(f"MTF Resample Error: {e}")
+
     def get_mtf_trend(self):
         """Checks H1 (Higher Timeframe) Trend using EMA 200"""
         if not Config.ENABLE_MTF_FILTER:
             return "READY"
             
+        # Local resampled bars (no terminal call). Falls back to fetching H1 until enough bars exist.
+        if self.mtf_resampler is not None:
+            trend = self.mtf_resampler.trend()
+            if trend is not None:
+                return trend
+            
         try:
-            # Fetch H1 data
-            df_mtf = self.get_market_data(timeframe=Config.MTF_TIMEFRAME)
+            # Fetch H1 data (EMA only)
+            mtf_indicators = ['ema_trend'] if Config.MTF_EMA_PERIOD == Config.EMA_TREND else []
+            df_mtf = self.get_market_data(timeframe=Config.MTF_TIMEFRAME, indicators=mtf_indicators, owner="MTF")
             
             if df_mtf is None or len(df_mtf) < Config.MTF_EMA_PERIOD:
                 return "Unknown"
-            
-            # Calculate EMA 200 for H1 (Already done in get_market_data if EMA_TREND matches)
-            if Config.MTF_EMA_PERIOD == Config.EMA_TREND:
-                ema_h1 = df_mtf['ema_trend']
-            else:
-                ema_h1 = Indicators.calculate_ema(df_mtf['close'], Config.MTF_EMA_PERIOD)
-            
-            price_h1 = df_mtf.iloc[-1]['close']
-            ema_val = ema_h1.iloc[-1]
-            
-            if price_h1 > ema_val:
-                return "UP"
-            elif price_h1 < ema_val:
-                return "DOWN"
-            else:
-                return "RANGE"
+            _, trend = consistent(BarSeries.wrap(df_mtf), self.mtf_trend_of)
+            return trend or "Unknown"
                 
         except Exception as e:
             logging.error(f"MTF Trend Error: {e}")
             return "Error"
 
+    def mtf_trend_of(self, bars):
+        """UP / DOWN / RANGE: last H1 close against its EMA"""
+        # Calculate EMA 200 for H1 (Already done in get_market_data if EMA_TREND matches)
+        if Config.MTF_EMA_PERIOD == Config.EMA_TREND:
+            ema_val = bars.at('ema_trend', -1)
+        else:
+            ema_val = cached_call(Indicators.calculate_ema, pd.Series(bars['close']), Config.MTF_EMA_PERIOD).iloc[-1]
+
+        price_h1 = bars.at('close', -1)
+        if price_h1 > ema_val:
+            return "UP"
+        elif price_h1 < ema_val:
+            return "DOWN"
+        else:
+            return "RANGE"
+
     def close_order(self, ticket):
         """Closes an order by ticket"""
         try:
@@ -319,7 +521,7 @@ class XAUUSDBot:
                 "volume": pos.volume,
                 "type": type_close,
                 "price": price,
-                "deviation": Config.DEVIATION,
+                "deviation": self.get_setting('DEVIATION'),
                 "magic": self.magic_number,
                 "comment": "Close Reverse",
                 "type_time": mt5.ORDER_TIME_GTC,
@@ -356,7 +558,7 @@ class XAUUSDBot:
                 "volume": volume, # Partial Volume
                 "type": type_close,
                 "price": price,
-                "deviation": Config.DEVIATION,
+                "deviation": self.get_setting('DEVIATION'),
                 "magic": self.magic_number,
                 "comment": "Partial TP 💰",
                 "type_time": mt5.ORDER_TIME_GTC,
@@ -380,15 +582,18 @@ class XAUUSDBot:
             logging.error(f"Partial Close Error: {e}")
             return False
 
-    def execute_trade(self, signal, reason="", indicators={}, atr=0.0, custom_sl=0.0, candle_time=None):
+    def execute_trade(self, signal, reason="", indicators={}, atr=0.0, custom_sl=0.0, candle_time=None, signal_time=None):
         """Sends Buy/Sell orders to MT5 (Dynamic ATR SL/TP or Custom SL)"""
         try:
-            symbol_info = mt5.symbol_info(self.symbol)
-            if symbol_info is None: return
+            # Symbol facts come from the pre-built order template; only the tick is read here
+            template = self.order_executor.template(self.symbol)
+            tick = mt5.symbol_info_tick(self.symbol)
+            if template is None or tick is None: return
             
-            spread = symbol_info.spread
-            if spread > Config.MAX_SPREAD_POINTS:
-                logging.warning(f"⚠️ High Spread Detected! ({spread} pts > {Config.MAX_SPREAD_POINTS} pts). Trade Ignored.")
+            spread = round((tick.ask - tick.bid) / template.point)
+            max_spread = self.get_setting('MAX_SPREAD_POINTS')
+            if spread > max_spread:
+                logging.warning(f"⚠️ High Spread Detected! ({spread} pts > {max_spread} pts). Trade Ignored.")
                 return
 
             # 0. ERROR COOLDOWN (Anti-Spam)
@@ -417,11 +622,8 @@ class XAUUSDBot:
                 logging.warning(f"⚠️ Signal {signal} ignored: Position already exists.")
                 return 
 
-            # 2. Prepare Order Specs
-            symbol_info = mt5.symbol_info(self.symbol)
-            if symbol_info is None: return
-            
-            point = symbol_info.point
+            # 2. Prepare Order Specs (SL/TP from the signal tick; the send price is refreshed by the executor)
+            point = template.point
             
             # Initialize Variables
             sl = 0.0
@@ -432,7 +634,7 @@ class XAUUSDBot:
             
             if signal == "BUY":
                 order_type = mt5.ORDER_TYPE_BUY
-                price = mt5.symbol_info_tick(self.symbol).ask
+                price = tick.ask
                 
                 # SL Calculation
                 if custom_sl > 0:
@@ -472,7 +674,7 @@ class XAUUSDBot:
                 
             elif signal == "SELL":
                 order_type = mt5.ORDER_TYPE_SELL
-                price = mt5.symbol_info_tick(self.symbol).bid
+                price = tick.bid
                 
                  # SL Calculation
                 if custom_sl > 0:
@@ -516,47 +718,31 @@ class XAUUSDBot:
             # 3. CALCULATE LOT SIZE (Dynamic Risk)
             # Convert risk (price difference) to points
             sl_dist_points = risk / point
-            volume = self.get_dynamic_lot_size(sl_points=sl_dist_points)
+            volume = self.get_dynamic_lot_size(sl_points=sl_dist_points, symbol_info=template)
 
-            action = mt5.TRADE_ACTION_DEAL
-            type_time = mt5.ORDER_TIME_GTC
-            
-            # --- DYNAMIC FILLING MODE ---
-            filling_mode = symbol_info.filling_mode
-            if filling_mode & SYMBOL_FILLING_IOC:
-                type_filling = mt5.ORDER_FILLING_IOC
-            elif filling_mode & SYMBOL_FILLING_FOK:
-                type_filling = mt5.ORDER_FILLING_FOK
-            else:
-                type_filling = mt5.ORDER_FILLING_RETURN
-
-            
-            request = {
-                "action": action,
-                "symbol": self.symbol,
-                "volume": volume,
-                "type": order_type,
-                "price": price,
-                "sl": sl,
-                "tp": tp,
-                "deviation": Config.DEVIATION,
-                "magic": self.magic_number,
-                "comment": "Bot " + self.strategy_name,
-                "type_time": type_time,
-                "type_filling": type_filling,
-            }
+            # 🛡️ Candle guard journaled before the order goes out: a crash after the fill can't
+            # re-enter this candle on restart. Cleared again if the order is rejected.
+            traded_candle = self.last_trade_candle_time
+            self.remember('last_trade_candle_time', candle_time)
+            result = self.order_executor.send(self.symbol, order_type, volume, sl=sl, tp=tp, signal_time=signal_time,
+                                              decision_price=price, spread_points=spread)
+            if result is None:
+                logging.error(f"❌ Order Failed: No response from MT5")
+                self.remember('last_trade_candle_time', traded_candle)
+                self.remember('last_error_time', time.time())
+                return
 
-            result = mt5.order_send(request)
-            
             if result.retcode != mt5.TRADE_RETCODE_DONE:
                 if result.retcode == 10027:
                     logging.error(f"❌ Order Failed: [10027] AutoTrading disabled by client! (กรุณากดปุ่ม 'Algo Trading' ใน MT5)")
                 else:
                     logging.error(f"❌ Order Failed: {result.comment} (Retcode: {result.retcode})")
                 
-                self.last_error_time = time.time()
+                self.remember('last_trade_candle_time', traded_candle)
+                self.remember('last_error_time', time.time())
                 logging.info(f"⏳ Cooldown activated: Waiting 60s before retry...")
             else:
+                price = result.price or price
                 # ✅ SUCCESS LOGGING
                 ind_str = " | ".join([f"{k}:{v}" for k,v in indicators.items()])
                 log_msg = (
@@ -568,8 +754,7 @@ class XAUUSDBot:
                 logging.info(log_msg)
                 
                 # Save to specific Entry Log
-                self.save_entry_log(result.order, signal, price, reason, indicators)
-                self.last_trade_candle_time = candle_time # 🛡️ Mark candle as traded
+                self.save_entry_log(result.order, signal, price, reason, indicators, sl=sl, tp=tp)
 
                 # Telegram Notification
                 self.send_telegram_message(
@@ -583,37 +768,16 @@ class XAUUSDBot:
                 
         except Exception as e:
             logging.error(f"Execution Error: {e}")
-            self.last_error_time = time.time() 
+            self.remember('last_error_time', time.time())
 
-    def save_entry_log(self, ticket, signal, price, reason, indicators):
-        """Saves detailed entry log to CSV"""
+    def save_entry_log(self, ticket, signal, price, reason, indicators, sl=None, tp=None):
+        """Writes a typed entry record (one column per indicator) to data/entry_log.sqlite"""
         try:
-            data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
-            if not os.path.exists(data_dir):
-                os.makedirs(data_dir)
-
-            filename = os.path.join(data_dir, 'entry_log.csv')
-            file_exists = os.path.isfile(filename)
-            
-            # Format Indicators as JSON-like string
-            ind_str = str(indicators).replace(",", " |").replace("{", "").replace("}", "").replace("'", "")
-            
-            with open(filename, mode='a', newline='', encoding='utf-8-sig') as file:
-                writer = csv.writer(file)
-                if not file_exists:
-                    writer.writerow(['Time', 'Ticket', 'Strategy', 'Type', 'Price', 'Reason', 'Indicators'])
-                
-                writer.writerow([
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    ticket,
-                    self.strategy_name,
-                    signal,
-                    price,
-                    reason,
-                    ind_str
-                ])
+            self.entry_store.append(ticket, signal, price, reason, indicators,
+                                    strategy=self.strategy_name, symbol=self.symbol, sl=sl, tp=tp)
+            self.entry_store.flush()  # On disk before the bot moves on: a crash must not lose a fill
         except Exception as e:
-            logging.error(f"Save Entry Log Error: {e}") 
+            logging.error(f"Save Entry Log Error: {e}")
 
     def modify_order(self, ticket, sl_price, tp_price):
         """Helper to modify SL/TP of an order"""
@@ -653,69 +817,80 @@ class XAUUSDBot:
             positions = mt5.positions_get(symbol=self.symbol)
             if not positions: return
 
+            point = mt5.symbol_info(self.symbol).point
             for pos in positions:
                 if pos.magic != self.magic_number: continue # Skip other strategies
-                
-                ticket = pos.ticket
-                order_type = pos.type
-                price_open = pos.price_open
-                price_current = pos.price_current
-                sl = pos.sl
-                tp = pos.tp 
-                point = mt5.symbol_info(self.symbol).point
-
-                # --- NEW PROFIT PROTECTION LOGIC (2 STAGES) ---
-                if Config.ENABLE_BREAK_EVEN or Config.ENABLE_PROFIT_LOCK:
-                    current_profit_pts = 0
+                self.protect_position(pos, pos.price_current, point)
+                            
+        except Exception as e:
+            logging.error(f"Trailing Stop Error: {e}")
+
+    def protect_tick(self, pos, tick, symbol_info):
+        """PositionGuard handler: BUY is valued at bid, SELL at ask (same as price_current)"""
+        price_current = tick.bid if pos.type == 0 else tick.ask
+        return self.protect_position(pos, price_current, symbol_info.point)
+
+    def protect_position(self, pos, price_current, point):
+        """Break Even / Profit Lock for one position. Returns True if the SL was moved."""
+        ticket = pos.ticket
+        order_type = pos.type
+        price_open = pos.price_open
+        sl = pos.sl
+        tp = pos.tp 
+        changed = False
+
+        # --- NEW PROFIT PROTECTION LOGIC (2 STAGES) ---
+        if Config.ENABLE_BREAK_EVEN or Config.ENABLE_PROFIT_LOCK:
+            current_profit_pts = 0
+            if order_type == 0: # BUY
+                current_profit_pts = (price_current - price_open) / point
+            else: # SELL
+                current_profit_pts = (price_open - price_current) / point
+
+            tp_dist_pts = abs(tp - price_open) / point if tp != 0 else self.get_setting('TAKE_PROFIT_POINTS')
+
+            # Stage 1: Break Even (40% of TP)
+            if Config.ENABLE_BREAK_EVEN:
+                be_trigger_pts = tp_dist_pts * Config.BREAK_EVEN_PERCENT
+                if current_profit_pts >= be_trigger_pts:
+                    target_be = price_open + (Config.BREAK_EVEN_LOCK * point) if order_type == 0 else price_open - (Config.BREAK_EVEN_LOCK * point)
+
+                    # Move SL only if it improves the position
                     if order_type == 0: # BUY
-                        current_profit_pts = (price_current - price_open) / point
+                        if sl < (target_be - point):
+                            if self.modify_order(ticket, target_be, tp):
+                                changed = True
+                                logging.info(f"🛡️ Stage 1: BE Set (+100) for Ticket {ticket}")
+                                self.send_telegram_message(f"🛡️ <b>BREAK EVEN SET (40% TP)</b>\nTicket: <code>{ticket}</code>\nSL moved to: <code>{target_be:.2f}</code>")
                     else: # SELL
-                        current_profit_pts = (price_open - price_current) / point
-
-                    tp_dist_pts = abs(tp - price_open) / point if tp != 0 else Config.TAKE_PROFIT_POINTS
-                    
-                    # Stage 1: Break Even (40% of TP)
-                    if Config.ENABLE_BREAK_EVEN:
-                        be_trigger_pts = tp_dist_pts * Config.BREAK_EVEN_PERCENT
-                        if current_profit_pts >= be_trigger_pts:
-                            target_be = price_open + (Config.BREAK_EVEN_LOCK * point) if order_type == 0 else price_open - (Config.BREAK_EVEN_LOCK * point)
-                            
-                            # Move SL only if it improves the position
-                            if order_type == 0: # BUY
-                                if sl < (target_be - point):
-                                    if self.modify_order(ticket, target_be, tp):
-                                        logging.info(f"🛡️ Stage 1: BE Set (+100) for Ticket {ticket}")
-                                        self.send_telegram_message(f"🛡️ <b>BREAK EVEN SET (40% TP)</b>\nTicket: <code>{ticket}</code>\nSL moved to: <code>{target_be:.2f}</code>")
-                            else: # SELL
-                                if sl > (target_be + point) or sl == 0:
-                                    if self.modify_order(ticket, target_be, tp):
-                                        logging.info(f"🛡️ Stage 1: BE Set (+100) for Ticket {ticket}")
-                                        self.send_telegram_message(f"🛡️ <b>BREAK EVEN SET (40% TP)</b>\nTicket: <code>{ticket}</code>\nSL moved to: <code>{target_be:.2f}</code>")
-
-                    # Stage 2: Profit Lock (65% of TP)
-                    if Config.ENABLE_PROFIT_LOCK:
-                        pl_trigger_pts = tp_dist_pts * Config.PROFIT_LOCK_PERCENT
-                        if current_profit_pts >= pl_trigger_pts:
-                            # Target SL is 50% of original TP distance
-                            target_lock = price_open + (tp_dist_pts * Config.PROFIT_LOCK_LEVEL * point) if order_type == 0 else price_open - (tp_dist_pts * Config.PROFIT_LOCK_LEVEL * point)
-                            
-                            # Move SL only if it improves the position
-                            if order_type == 0: # BUY
-                                if sl < (target_lock - point):
-                                    if self.modify_order(ticket, target_lock, tp):
-                                        logging.info(f"🔒 Stage 2: Profit Lock (50%) for Ticket {ticket}")
-                                        self.send_telegram_message(f"🔒 <b>PROFIT LOCK (65% TP)</b>\nTicket: <code>{ticket}</code>\nSL moved to 50% TP: <code>{target_lock:.2f}</code>")
-                            else: # SELL
-                                if sl > (target_lock + point) or sl == 0:
-                                    if self.modify_order(ticket, target_lock, tp):
-                                        logging.info(f"🔒 Stage 2: Profit Lock (50%) for Ticket {ticket}")
-                                        self.send_telegram_message(f"🔒 <b>PROFIT LOCK (65% TP)</b>\nTicket: <code>{ticket}</code>\nSL moved to 50% TP: <code>{target_lock:.2f}</code>")
+                        if sl > (target_be + point) or sl == 0:
+                            if self.modify_order(ticket, target_be, tp):
+                                changed = True
+                                logging.info(f"🛡️ Stage 1: BE Set (+100) for Ticket {ticket}")
+                                self.send_telegram_message(f"🛡️ <b>BREAK EVEN SET (40% TP)</b>\nTicket: <code>{ticket}</code>\nSL moved to: <code>{target_be:.2f}</code>")
 
+            # Stage 2: Profit Lock (65% of TP)
+            if Config.ENABLE_PROFIT_LOCK:
+                pl_trigger_pts = tp_dist_pts * Config.PROFIT_LOCK_PERCENT
+                if current_profit_pts >= pl_trigger_pts:
+                    # Target SL is 50% of original TP distance
+                    target_lock = price_open + (tp_dist_pts * Config.PROFIT_LOCK_LEVEL * point) if order_type == 0 else price_open - (tp_dist_pts * Config.PROFIT_LOCK_LEVEL * point)
 
+                    # Move SL only if it improves the position
+                    if order_type == 0: # BUY
+                        if sl < (target_lock - point):
+                            if self.modify_order(ticket, target_lock, tp):
+                                changed = True
+                                logging.info(f"🔒 Stage 2: Profit Lock (50%) for Ticket {ticket}")
+                                self.send_telegram_message(f"🔒 <b>PROFIT LOCK (65% TP)</b>\nTicket: <code>{ticket}</code>\nSL moved to 50% TP: <code>{target_lock:.2f}</code>")
+                    else: # SELL
+                        if sl > (target_lock + point) or sl == 0:
+                            if self.modify_order(ticket, target_lock, tp):
+                                changed = True
+                                logging.info(f"🔒 Stage 2: Profit Lock (50%) for Ticket {ticket}")
+                                self.send_telegram_message(f"🔒 <b>PROFIT LOCK (65% TP)</b>\nTicket: <code>{ticket}</code>\nSL moved to 50% TP: <code>{target_lock:.2f}</code>")
 
-                            
-        except Exception as e:
-            logging.error(f"Trailing Stop Error: {e}")
+        return changed
 
     def get_daily_profit(self):
         """Calculates total profit for the current day (My Strategy Only)"""
@@ -770,15 +945,35 @@ class XAUUSDBot:
             
     def save_trade_history(self):
         """Saves closed trades to CSV file (Backlog) - Prevents Duplicates"""
+        now = datetime.now()
+        deals = self.fetch_closed_deals(now)
+        if deals is not None and self.persist_deals(deals):
+            self.mark_history_synced(now)
+
+    def fetch_closed_deals(self, now):
+        """This bot's closing deals since the last sync (terminal call). None if the terminal returned nothing usable."""
         try:
-            now = datetime.now() 
-            # Use dynamic offset (look back 30 days to ensure no missing trades after downtime)
+            # Look back 30 days on the first sync (no missing trades after downtime), then
+            # only since the last journaled sync (1 day overlap: server / local clock offset)
             today_start = datetime(now.year, now.month, now.day) - timedelta(days=30)
+            if self.history_synced_until:
+                today_start = max(today_start, datetime.fromtimestamp(self.history_synced_until) - timedelta(days=1))
             deals = mt5.history_deals_get(today_start, now + timedelta(hours=1)) # Buffer for safety
             
             if not deals:
-                return
+                return [] if deals is not None else None
+            # Filter: Only save MY deals (to prevent double logging race condition)
+            return [deal for deal in deals
+                    if deal.symbol == self.symbol and deal.entry == mt5.DEAL_ENTRY_OUT and deal.magic == self.magic_number]
+        except Exception as e:
+            logging.error(f"Save History Error: {e}")
+            return None
 
+    def persist_deals(self, deals):
+        """Appends deals not yet in data/trade_history.csv + Telegram per new deal (disk only). Returns False on error."""
+        if not deals:
+            return True
+        try:
             data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
             if not os.path.exists(data_dir):
                 os.makedirs(data_dir)
@@ -798,12 +993,7 @@ class XAUUSDBot:
                 except Exception as e:
                     logging.error(f"Read CSV Error: {e}")
 
-            new_deals = []
-            for deal in deals:
-                if deal.symbol == self.symbol and deal.entry == mt5.DEAL_ENTRY_OUT and deal.ticket not in existing_tickets:
-                    # Filter: Only save MY deals (to prevent double logging race condition)
-                    if deal.magic == self.magic_number:
-                        new_deals.append(deal)
+            new_deals = [deal for deal in deals if deal.ticket not in existing_tickets]
 
             if new_deals:
                 with open(filename, mode='a', newline='', encoding='utf-8') as file:
@@ -856,170 +1046,242 @@ class XAUUSDBot:
                             status
                         ])
                         logging.info(f"\n📝 History Saved: Ticket {deal.ticket} ({status}) | P/L: ${deal.profit:.2f} | Strat: {strategy_used}")
+            return True
 
         except Exception as e:
             logging.error(f"Save History Error: {e}")
+            return False
 
-    def run(self):
-        """Main Loop"""
-        if not self.connect_mt5():
+    def mark_history_synced(self, now):
+        # The next sync overlaps by a day anyway: journal at most once an hour, not every loop
+        if not self.history_synced_until or now.timestamp() - self.history_synced_until >= 3600:
+            self.remember('history_synced_until', now.timestamp())
+
+    def ensure_connection(self):
+        """Auto-Reconnect. Returns False if the terminal is still unreachable."""
+        terminal_info = mt5.terminal_info()
+        if terminal_info is None or not terminal_info.connected:
+            logging.warning("Connection lost, attempting to reconnect...")
+            reconnect_attempts = 0
+            while reconnect_attempts < 5:
+                if self.connect_mt5():
+                    logging.info("Reconnected successfully")
+                    break
+                reconnect_attempts += 1
+                wait_time = min(pow(2, reconnect_attempts), 30)
+                logging.info(f"Reconnect attempt {reconnect_attempts} failed. Retrying in {wait_time}s...")
+                time.sleep(wait_time)
+            
+            if not self.connected:
+                logging.error("Failed to reconnect after multiple attempts. Waiting 60s...")
+                return False
+        return True
+
+    def check_daily_limits(self):
+        """Daily Target & Drawdown Check. Returns True if trading should pause (for an hour)."""
+        daily_profit = self.get_daily_profit()
+        
+        # Check Daily Profit Target
+        if daily_profit >= Config.DAILY_PROFIT_TARGET:
+             msg = f"🏆 Daily Target Reached! (${daily_profit:.2f} / ${Config.DAILY_PROFIT_TARGET})"
+             logging.info(msg)
+             self.send_telegram_message(f"🏆 <b>GOAL REACHED</b>\n{msg}\n<i>Sleeping until tomorrow...</i>")
+             logging.info("Sleeping until tomorrow...")
+             return True
+        
+        # Check Daily Drawdown (Loss Limit)
+        if getattr(Config, 'ENABLE_DAILY_DRAWDOWN_LIMIT', True):
+            account_info = mt5.account_info()
+            if account_info:
+                balance = account_info.balance
+                max_loss_usd = balance * (Config.MAX_DAILY_LOSS_PERCENT / 100.0)
+                if daily_profit <= -max_loss_usd:
+                    msg = f"🛡️ DAILY DRAWDOWN REACHED! (${daily_profit:.2f} limit: -${max_loss_usd:.2f} [{Config.MAX_DAILY_LOSS_PERCENT}%])"
+                    logging.warning(msg)
+                    # Replace '<=' with words or HTML-safe characters for Telegram
+                    tg_msg = f"⚠️ <b>STOP TRADING: DRAWDOWN</b>\nDaily Loss: <code>${daily_profit:.2f}</code>\nLimit: <code>-${max_loss_usd:.2f}</code>\n<i>Bot paused for safety.</i>"
+                    self.send_telegram_message(tg_msg)
+                    return True
+        return False
+
+    def manage_positions(self, save_history=True):
+        """Trailing Stop & History Log (history is account-wide, so only one bot needs to save it)"""
+        if self.position_guard is None or not self.position_guard.running:
+            self.check_trailing_stop()
+        if save_history:
+            self.save_trade_history()
+        
+        # Cleanup partially_closed_tickets
+        if self.partially_closed_tickets:
+            open_pos = mt5.positions_get(symbol=self.symbol)
+            if open_pos:
+                current_tickets = {p.ticket for p in open_pos}
+                self.remember('partially_closed_tickets', {t for t in self.partially_closed_tickets if t in current_tickets})
+            else:
+                self.remember('partially_closed_tickets', set())
+
+    def decide(self, bars):
+        """MTF resampler + strategy decision on prepared bars"""
+        self.update_mtf_resampler(bars)
+        return self.strategy.evaluate(bars)
+
+    def process_market_data(self, df):
+        """Runs the strategy on prepared bars, executes signals and prints the status line"""
+        # Struct-of-arrays view: strategies read scalars/slices without building row Series
+        # Shared-memory bars are live views: analysed again if the publisher wrote meanwhile
+        bars, decision = consistent(BarSeries.wrap(df), self.decide)
+        if bars is None:
             return
+        signal, status_detail, extra_data = decision
+        signal_time = time.perf_counter()  # ⚡ Start of signal -> fill latency
+        
+        price = extra_data.get('price', 0)
+        atr = extra_data.get('atr', 0)
+        custom_sl = extra_data.get('custom_sl', 0.0)
+        
+        # 🖥️ DISPLAY LOGIC
+        current_time = time.time()
+        if current_time - self.last_log_time >= 60: # Log every minute
+            # Log concise summary flexibly based on what strategy provides
+            ind_parts = []
+            if 'rsi' in extra_data:
+                ind_parts.append(f"RSI:{extra_data['rsi']:.1f}")
+            if 'ema_trend' in extra_data:
+                ind_parts.append(f"EMA:{'OK' if price > extra_data['ema_trend'] else 'NO'}")
+            ind_summary = " | ".join(ind_parts)
+            
+            if ind_summary:
+                print(f"[{datetime.now().strftime('%H:%M')}] {self.status_prefix}{status_detail} | {ind_summary}")
+            else:
+                print(f"[{datetime.now().strftime('%H:%M')}] {self.status_prefix}{status_detail}")
+            self.last_log_time = current_time
+
+        if signal in ["BUY", "SELL"]:
+            # 🛡️ ONE TRADE PER CANDLE GUARD
+            current_candle_time = bars.time_at(-1)
+            if self.last_trade_candle_time == current_candle_time:
+                # Already traded this candle, skip re-entry
+                pass
+            else:
+                # Prepare Indicators for Log (Filter out large objects like filtered arrays)
+                log_indicators = {k: v for k, v in extra_data.items() if isinstance(v, (int, float, str))}
+                
+                self.execute_trade(
+                    signal=signal, 
+                    reason=status_detail, 
+                    indicators=log_indicators,
+                    atr=atr, 
+                    custom_sl=custom_sl,
+                    candle_time=current_candle_time,
+                    signal_time=signal_time
+                )
+                if self.position_guard is not None:
+                    self.position_guard.invalidate()
+            # Get Active Orders
+            orders_summary = self.get_active_orders_summary()
+            if orders_summary == "No Active Orders":
+                ord_str = "|| No Orders"
+            else:
+                parts = orders_summary.split('|')
+                if len(parts) > 2:
+                        ord_str = f"|| {parts[0].strip()} | {parts[1].strip()}"
+                else:
+                        ord_str = f"|| {orders_summary}"
+
+            # Single Line Construction
+            line = f"{datetime.now().strftime('%H:%M:%S')} {self.status_prefix}{status_detail} {ord_str}"
+            
+            terminal_width = shutil.get_terminal_size().columns
+            max_len = max(50, terminal_width - 5) 
+            
+            if len(line) > max_len:
+                line = line[:max_len-3] + "..."
+                
+            blank_line = " " * (terminal_width - 1)
+            sys.stdout.write(f"\r{blank_line}\r{line}")
+            sys.stdout.flush()
 
-        # Header (Static)
+            if signal in ["BUY", "SELL"]:
+                 # Removed redundant execution
+                 self.last_log_time = 0
+
+    def announce(self):
+        """Startup header (static)"""
         print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - INFO - ✅ Connected to MT5: {self.symbol}")
         print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - INFO - 🤖 Bot Started [Strategy: {self.strategy_name}]")
         print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - INFO - ⚡ Mode: {'Realtime (Risk Repaint) 🚀' if Config.USE_REALTIME_CANDLE else 'Closed Candle (Safe) 🛡️'}")
         print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - INFO - Press Ctrl+C to stop")
-        
-        last_log_time = 0.0
+
+    def step(self):
+        """
+        One pass of the main loop. Returns the seconds to wait before the next one.
+        Under the async runtime the history sync, entry log flush and news calendar
+        download run as its own tasks, so only the signal path is left here.
+        """
+        # 0. Auto-Reconnect
+        if not self.ensure_connection():
+            return 60
+
+        # 1. Daily Target & Drawdown Check
+        if self.check_daily_limits():
+            return 3600
+
+        # 2. Time Filter (Done in strategy but we check here for global sleep? Strategy handles it.)
+        # Strategy logic handles forbidden hours/sleep mode signal.
+
+        # 3. Trailing Stop & History Log
+        self.manage_positions(save_history=self.runtime is None)
+        if self.runtime is None:
+            self.entry_store.flush_if_due()
+
+        # 4. Get Data & Signal
+        # --- NEWS FILTER ---
+        if Config.NEWS_FILTER_ENABLED:
+            is_news, news_title = self.news_manager.is_news_time(Config.NEWS_AVOID_MINUTES, refresh=self.runtime is None)
+            if is_news:
+                logging.warning(f"🚫 PAUSED: High Impact News ({news_title}) - Skipping Analysis")
+                return 60
+
+        df = self.get_live_bars() if self.live_candle is not None else self.get_market_data()
+        if df is not None:
+            self.process_market_data(df)
+
+        if self.live_candle is not None:
+            return Config.TICK_POLL_INTERVAL
+        return 1 if Config.USE_REALTIME_CANDLE else 15
+
+    def log_reports(self):
+        """⏱️ Per-strategy indicator compute time + MT5 call stats + order latency + signal memo"""
+        self.indicator_engine.log_report()
+        mt5.log_report()
+        self.order_executor.log_report()
+        if getattr(self.strategy, 'signal_memo', None) is not None:
+            self.strategy.signal_memo.log_report()
+
+    def run(self):
+        """Main Loop"""
+        if not self.connect_mt5():
+            return
+
+        self.announce()
+        if self.position_guard is not None:
+            self.position_guard.start()
+        last_report_time = time.time()
         
         while True:
             try:
-                # 0. Auto-Reconnect
-                terminal_info = mt5.terminal_info()
-                if terminal_info is None or not terminal_info.connected:
-                    logging.warning("Connection lost, attempting to reconnect...")
-                    reconnect_attempts = 0
-                    while reconnect_attempts < 5:
-                        if self.connect_mt5():
-                            logging.info("Reconnected successfully")
-                            break
-                        reconnect_attempts += 1
-                        wait_time = min(pow(2, reconnect_attempts), 30)
-                        logging.info(f"Reconnect attempt {reconnect_attempts} failed. Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                    
-                    if not self.connected:
-                        logging.error("Failed to reconnect after multiple attempts. Waiting 60s...")
-                        time.sleep(60)
-                        continue
+                delay = self.step()
 
-                # 1. Daily Target & Drawdown Check
-                daily_profit = self.get_daily_profit()
-                
-                # Check Daily Profit Target
-                if daily_profit >= Config.DAILY_PROFIT_TARGET:
-                     msg = f"🏆 Daily Target Reached! (${daily_profit:.2f} / ${Config.DAILY_PROFIT_TARGET})"
-                     logging.info(msg)
-                     self.send_telegram_message(f"🏆 <b>GOAL REACHED</b>\n{msg}\n<i>Sleeping until tomorrow...</i>")
-                     logging.info("Sleeping until tomorrow...")
-                     time.sleep(3600) 
-                     continue
-                
-                # Check Daily Drawdown (Loss Limit)
-                if getattr(Config, 'ENABLE_DAILY_DRAWDOWN_LIMIT', True):
-                    account_info = mt5.account_info()
-                    if account_info:
-                        balance = account_info.balance
-                        max_loss_usd = balance * (Config.MAX_DAILY_LOSS_PERCENT / 100.0)
-                        if daily_profit <= -max_loss_usd:
-                            msg = f"🛡️ DAILY DRAWDOWN REACHED! (${daily_profit:.2f} limit: -${max_loss_usd:.2f} [{Config.MAX_DAILY_LOSS_PERCENT}%])"
-                            logging.warning(msg)
-                            # Replace '<=' with words or HTML-safe characters for Telegram
-                            tg_msg = f"⚠️ <b>STOP TRADING: DRAWDOWN</b>\nDaily Loss: <code>${daily_profit:.2f}</code>\nLimit: <code>-${max_loss_usd:.2f}</code>\n<i>Bot paused for safety.</i>"
-                            self.send_telegram_message(tg_msg)
-                            time.sleep(3600) # Sleep for an hour and re-check
-                            continue
-
-                # 2. Time Filter (Done in strategy but we check here for global sleep? Strategy handles it.)
-                # Strategy logic handles forbidden hours/sleep mode signal.
-
-                # 3. Trailing Stop & History Log
-                self.check_trailing_stop()
-                self.save_trade_history()
-                
-                # Cleanup partially_closed_tickets
-                if self.partially_closed_tickets:
-                    open_pos = mt5.positions_get(symbol=self.symbol)
-                    if open_pos:
-                        current_tickets = {p.ticket for p in open_pos}
-                        self.partially_closed_tickets = {t for t in self.partially_closed_tickets if t in current_tickets}
-                    else:
-                        self.partially_closed_tickets.clear()
-
-                # 4. Get Data & Signal
-                # --- NEWS FILTER ---
-                if Config.NEWS_FILTER_ENABLED:
-                    is_news, news_title = self.news_manager.is_news_time(Config.NEWS_AVOID_MINUTES)
-                    if is_news:
-                        logging.warning(f"🚫 PAUSED: High Impact News ({news_title}) - Skipping Analysis")
-                        time.sleep(60)
-                        continue
-
-                df = self.get_market_data()
-                if df is not None:
-                    signal, status_detail, extra_data = self.strategy.analyze(df)
-                    
-                    price = extra_data.get('price', 0)
-                    atr = extra_data.get('atr', 0)
-                    custom_sl = extra_data.get('custom_sl', 0.0)
-                    
-                    # 🖥️ DISPLAY LOGIC
-                    current_time = time.time()
-                    if current_time - last_log_time >= 60: # Log every minute
-                        # Log concise summary flexibly based on what strategy provides
-                        ind_parts = []
-                        if 'rsi' in extra_data:
-                            ind_parts.append(f"RSI:{extra_data['rsi']:.1f}")
-                        if 'ema_trend' in extra_data:
-                            ind_parts.append(f"EMA:{'OK' if price > extra_data['ema_trend'] else 'NO'}")
-                        ind_summary = " | ".join(ind_parts)
-                        
-                        if ind_summary:
-                            print(f"[{datetime.now().strftime('%H:%M')}] {status_detail} | {ind_summary}")
-                        else:
-                            print(f"[{datetime.now().strftime('%H:%M')}] {status_detail}")
-                        last_log_time = current_time
-
-                    if signal in ["BUY", "SELL"]:
-                        # 🛡️ ONE TRADE PER CANDLE GUARD
-                        current_candle_time = df.iloc[-1]['time']
-                        if self.last_trade_candle_time == current_candle_time:
-                            # Already traded this candle, skip re-entry
-                            pass
-                        else:
-                            # Prepare Indicators for Log (Filter out large objects like filtered arrays)
-                            log_indicators = {k: v for k, v in extra_data.items() if isinstance(v, (int, float, str))}
-                            
-                            self.execute_trade(
-                                signal=signal, 
-                                reason=status_detail, 
-                                indicators=log_indicators,
-                                atr=atr, 
-                                custom_sl=custom_sl,
-                                candle_time=current_candle_time
-                            )
-                        # Get Active Orders
-                        orders_summary = self.get_active_orders_summary()
-                        if orders_summary == "No Active Orders":
-                            ord_str = "|| No Orders"
-                        else:
-                            parts = orders_summary.split('|')
-                            if len(parts) > 2:
-                                    ord_str = f"|| {parts[0].strip()} | {parts[1].strip()}"
-                            else:
-                                    ord_str = f"|| {orders_summary}"
-
-                        # Single Line Construction
-                        line = f"{datetime.now().strftime('%H:%M:%S')} {status_detail} {ord_str}"
-                        
-                        terminal_width = shutil.get_terminal_size().columns
-                        max_len = max(50, terminal_width - 5) 
-                        
-                        if len(line) > max_len:
-                            line = line[:max_len-3] + "..."
-                            
-                        blank_line = " " * (terminal_width - 1)
-                        sys.stdout.write(f"\r{blank_line}\r{line}")
-                        sys.stdout.flush()
-
-                        if signal in ["BUY", "SELL"]:
-                             # Removed redundant execution
-                             last_log_time = 0                   
-                time.sleep(1 if Config.USE_REALTIME_CANDLE else 15)
+                # Reports every 15 min
+                if time.time() - last_report_time >= 900:
+                    self.log_reports()
+                    last_report_time = time.time()
+                time.sleep(delay)
                 
             except KeyboardInterrupt:
                 print("\n🛑 Bot stopped by user")
+                if self.position_guard is not None:
+                    self.position_guard.stop()
                 mt5.shutdown()
                 break
             except Exception as e:
@@ -0,0 +1,140 @@
+from utils.mt5_gateway import terminal as mt5
+import time
+from datetime import datetime
+import logging
+
+from config.settings import Config
+from app.bot import XAUUSDBot
+from utils.indicator_graph import IndicatorEngine
+
+
+class MultiSymbolEngine:
+    """
+    Trades one strategy on several symbols (Config.SYMBOLS) from a single loop.
+    - Each symbol has its own XAUUSDBot (positions, candle guard, SYMBOL_OVERRIDES)
+    - Rates for every symbol are fetched first, then indicators are computed in one
+      batched pass per timeframe over 2-D (bars x symbols) frames
+    """
+    def __init__(self, strategy_name="TRIPLE_CONFLUENCE", symbols=None):
+        self.strategy_name = strategy_name
+        self.symbols = list(symbols or Config.SYMBOLS)
+        self.indicator_engine = IndicatorEngine()
+        self.bots = {}
+        self.paused_until = {}
+
+        for symbol in self.symbols:
+            try:
+                bot = XAUUSDBot(strategy_name=strategy_name, symbol=symbol)
+            except SystemExit:
+                logging.error(f"❌ {symbol}: Not available on this account - Skipped")
+                continue
+            bot.status_prefix = f"[{symbol}] "
+            self.bots[symbol] = bot
+            self.paused_until[symbol] = 0.0
+
+        if not self.bots:
+            logging.critical("No tradable symbols. Check Config.SYMBOLS")
+            raise SystemExit(1)
+
+    @property
+    def primary(self):
+        return next(iter(self.bots.values()))
+
+    def get_market_data(self, bots):
+        """{symbol: df with indicators (SharedBars from the shared feed)}. Symbols on the same timeframe share one batched compute."""
+        frames = {}
+        groups = {}  # timeframe -> {symbol: raw df}
+        for symbol, bot in bots.items():
+            timeframe = bot.get_setting('TIMEFRAME')
+            try:
+                # Shared Memory Feed already carries indicators
+                if bot.shared_feed is not None:
+                    bars = bot.shared_feed.get_bars(symbol, timeframe, Config.SMC_LOOKBACK + 500)
+                    if bars is not None:
+                        frames[symbol] = bars
+                        continue
+                groups.setdefault(timeframe, {})[symbol] = bot.fetch_rates(timeframe)
+            except Exception as e:
+                logging.error(f"Data Fetch Error ({symbol}): {e}")
+
+        for timeframe, raw in groups.items():
+            try:
+                self.indicator_engine.compute_batch(raw, self.primary.strategy, owner=f"{self.strategy_name}/{timeframe}")
+            except Exception as e:
+                logging.error(f"Batch Indicator Error (TF {timeframe}): {e}")
+                continue
+            frames.update({symbol: df for symbol, df in raw.items() if df is not None})
+        return frames
+
+    def run(self):
+        """Main Loop (all symbols)"""
+        print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - INFO - ✅ Connected to MT5: {', '.join(self.bots)}")
+        print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - INFO - 🤖 Multi-Symbol Engine Started [Strategy: {self.strategy_name}]")
+        print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - INFO - ⚡ Mode: {'Realtime (Risk Repaint) 🚀' if Config.USE_REALTIME_CANDLE else 'Closed Candle (Safe) 🛡️'}")
+        print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - INFO - Press Ctrl+C to stop")
+
+        for bot in self.bots.values():
+            if bot.position_guard is not None:
+                bot.position_guard.start()
+        last_report_time = time.time()
+
+        while True:
+            try:
+                # 0. Auto-Reconnect (one terminal for every symbol)
+                if not self.primary.ensure_connection():
+                    time.sleep(60)
+                    continue
+
+                # 1. Daily Target & Drawdown Check (per symbol: one symbol hitting its limit doesn't stop the others)
+                now = time.time()
+                active = {}
+                for symbol, bot in self.bots.items():
+                    if self.paused_until[symbol] > now:
+                        continue
+                    if bot.check_daily_limits():
+                        self.paused_until[symbol] = now + 3600
+                        continue
+                    active[symbol] = bot
+
+                # 3. Trailing Stop & History Log
+                for bot in self.bots.values():
+                    bot.manage_positions(save_history=(bot is self.primary))
+                    bot.entry_store.flush_if_due()
+
+                # 4. Get Data & Signal
+                # --- NEWS FILTER ---
+                if Config.NEWS_FILTER_ENABLED:
+                    is_news, news_title = self.primary.news_manager.is_news_time(Config.NEWS_AVOID_MINUTES)
+                    if is_news:
+                        logging.warning(f"🚫 PAUSED: High Impact News ({news_title}) - Skipping Analysis")
+                        time.sleep(60)
+                        continue
+
+                frames = self.get_market_data(active)
+                for symbol, df in frames.items():
+                    try:
+                        active[symbol].process_market_data(df)
+                    except Exception as e:
+                        logging.error(f"Signal Error ({symbol}): {e}")
+
+                # ⏱️ Batched indicator compute time + MT5 call stats + order latency + signal memo (every 15 min)
+                if time.time() - last_report_time >= 900:
+                    self.indicator_engine.log_report()
+                    mt5.log_report()
+                    for bot in self.bots.values():
+                        bot.order_executor.log_report(bot.status_prefix)
+                        if getattr(bot.strategy, 'signal_memo', None) is not None:
+                            bot.strategy.signal_memo.log_report(bot.status_prefix)
+                    last_report_time = time.time()
+                time.sleep(1 if Config.USE_REALTIME_CANDLE else 15)
+
+            except KeyboardInterrupt:
+                print("\n🛑 Engine stopped by user")
+                for bot in self.bots.values():
+                    if bot.position_guard is not None:
+                        bot.position_guard.stop()
+                mt5.shutdown()
+                break
+            except Exception as e:
+                logging.error(f"\nMain Loop Error: {e}")
+                time.sleep(5)
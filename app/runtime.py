@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import logging.handlers
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from config.settings import Config
+from utils.mt5_gateway import terminal as mt5
+
+
+class BotRuntime:
+    """
+    asyncio runtime for one XAUUSDBot (Config.USE_ASYNC_RUNTIME).
+    - Signal cycle (bot.step(): connection, limits, positions, news window, data fetch,
+      strategy, order) on the terminal executor: one thread, so MT5 calls never overlap
+    - Background work never awaited by the signal cycle:
+      - Telegram outbox: messages posted in order on the network executor
+      - News calendar download (network executor), every NEWS_REFRESH_SECONDS
+      - Trade history sync every HISTORY_SYNC_SECONDS: deals fetched on the terminal
+        executor, CSV read / append on the disk executor
+      - Entry log flush and warm-start snapshot writes on the disk executor (in order)
+    - Background terminal calls are queued right after a signal cycle ends, never ahead of one
+    - Log records are written by a QueueListener thread (file / console I/O off every path)
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self.terminal = ThreadPoolExecutor(max_workers=1, thread_name_prefix='terminal')
+        self.disk = ThreadPoolExecutor(max_workers=1, thread_name_prefix='disk')
+        self.network = ThreadPoolExecutor(max_workers=2, thread_name_prefix='network')
+        self.loop = None
+        self.outbox = None
+        self.cycle_end = None
+        self.log_listener = None
+
+    # --- Hooks used by the bot (any thread) ---
+    def notify(self, message):
+        """Queues a Telegram message (returns at once)"""
+        try:
+            self.loop.call_soon_threadsafe(self.outbox.put_nowait, message)
+        except RuntimeError:  # Loop already closed (shutting down)
+            self.bot.post_telegram(message)
+
+    def write_behind(self, func, *args):
+        """Runs a disk write on the disk executor (submitted in order, returns at once)"""
+        try:
+            self.disk.submit(func, *args)
+        except RuntimeError:  # Executor already shut down
+            func(*args)
+
+    # --- Helpers ---
+    async def on_terminal(self, func, *args):
+        return await self.loop.run_in_executor(self.terminal, func, *args)
+
+    async def on_disk(self, func, *args):
+        return await self.loop.run_in_executor(self.disk, func, *args)
+
+    async def on_network(self, func, *args):
+        return await self.loop.run_in_executor(self.network, func, *args)
+
+    async def after_cycle(self):
+        """Waits for the end of the current signal cycle"""
+        await self.cycle_end.wait()
+
+    def ship_logs(self):
+        """Root logger -> queue; the existing handlers run on a listener thread"""
+        root = logging.getLogger()
+        handlers = root.handlers[:]
+        records = queue.SimpleQueue()
+        self.log_listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        root.handlers = [logging.handlers.QueueHandler(records)]
+        self.log_listener.start()
+        return handlers
+
+    # --- Background tasks ---
+    async def telegram_outbox(self):
+        while True:
+            message = await self.outbox.get()
+            try:
+                await self.on_network(self.bot.post_telegram, message)
+            except Exception as e:
+                logging.error(f"❌ Failed to send Telegram: {e}")
+            finally:
+                self.outbox.task_done()
+
+    async def news_refresh(self):
+        while True:
+            await asyncio.sleep(Config.NEWS_REFRESH_SECONDS)
+            if Config.NEWS_FILTER_ENABLED:
+                await self.on_network(self.bot.news_manager.fetch_news)
+
+    async def history_sync(self):
+        bot = self.bot
+        while True:
+            await self.after_cycle()
+            now = datetime.now()
+            deals = await self.on_terminal(bot.fetch_closed_deals, now)
+            if deals is not None and await self.on_disk(bot.persist_deals, deals):
+                await self.on_terminal(bot.mark_history_synced, now)
+            await asyncio.sleep(Config.HISTORY_SYNC_SECONDS)
+
+    async def entry_flush(self):
+        while True:
+            await self.after_cycle()
+            await self.on_disk(self.bot.entry_store.flush_if_due)
+
+    async def main(self):
+        bot = self.bot
+        self.loop = asyncio.get_running_loop()
+        self.outbox = asyncio.Queue()
+        self.cycle_end = asyncio.Event()
+        bot.runtime = self
+        tasks = [asyncio.create_task(coro) for coro in
+                 (self.telegram_outbox(), self.news_refresh(), self.history_sync(), self.entry_flush())]
+        if Config.NEWS_FILTER_ENABLED:
+            await self.on_network(bot.news_manager.fetch_news)  # Calendar in place before the first signal
+        last_report_time = time.time()
+        try:
+            while True:
+                try:
+                    delay = await self.on_terminal(bot.step)
+                except Exception as e:
+                    logging.error(f"\nMain Loop Error: {e}")
+                    delay = 5
+                # Wake the tasks waiting for this cycle, the next one gets a fresh event
+                self.cycle_end.set()
+                self.cycle_end = asyncio.Event()
+
+                # Reports every 15 min
+                if time.time() - last_report_time >= 900:
+                    await self.on_terminal(bot.log_reports)
+                    last_report_time = time.time()
+                await asyncio.sleep(delay)
+        finally:
+            bot.runtime = None
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Messages still queued are posted inline
+            while not self.outbox.empty():
+                await self.on_network(bot.post_telegram, self.outbox.get_nowait())
+
+    def run(self):
+        bot = self.bot
+        if not bot.connect_mt5():
+            return
+
+        bot.announce()
+        logging.info("🧵 Async runtime: signal cycle on the terminal thread | news / history / Telegram / disk as background tasks")
+        handlers = self.ship_logs()
+        if bot.position_guard is not None:
+            bot.position_guard.start()
+        try:
+            asyncio.run(self.main())
+        except KeyboardInterrupt:
+            print("\n🛑 Bot stopped by user")
+        finally:
+            if bot.position_guard is not None:
+                bot.position_guard.stop()
+            self.terminal.shutdown(wait=True)
+            self.disk.shutdown(wait=True)  # Pending snapshot / entry log writes
+            self.network.shutdown(wait=False)
+            mt5.shutdown()
+            self.log_listener.stop()
+            logging.getLogger().handlers = handlers
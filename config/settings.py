@@ -1,4 +1,4 @@
-import MetaTrader5 as mt5
+from config import timeframes as tf
 import os
 from dotenv import load_dotenv
 
@@ -15,10 +15,12 @@ class Config:
     MAX_SPREAD_POINTS = 50      # ❗ กรอง Spread ไม่ให้เกิน 50 จุด (กันช่วงข่าว/ตลาดเปิด)
     SYMBOL = "XAUUSD"
 
-    TIMEFRAME = mt5.TIMEFRAME_M15  # 🚀 Timeframe: M15 (Gives more reliable signals with less noise)
+    TIMEFRAME = tf.TIMEFRAME_M15  # 🚀 Timeframe: M15 (Gives more reliable signals with less noise)
     MAGIC_NUM = 888888             # 🎱 Lucky Magic Number (Triple Confluence)
     DEVIATION = 20                 # ค่าความคลาดเคลื่อนที่ยอมรับได้ (Slippage)
     USE_REALTIME_CANDLE = False     # 🚀 True = เทรดแท่งปัจจุบัน (ไวแต่เสี่ยง Repaint), False = รอจบแท่ง (ชัวร์กว่า)
+    USE_TICK_CANDLE = True          # ⚡ (Realtime) อัปเดตแท่งปัจจุบันจาก Tick -> โหลด 800 แท่งใหม่เฉพาะตอนขึ้นแท่งใหม่
+    TICK_POLL_INTERVAL = 0.25       # ⚡ (Realtime + Tick) วินาทีต่อรอบ
 
 
     # =========================================
@@ -81,13 +83,18 @@ class Config:
     PROFIT_LOCK_PERCENT = 0.80  # 🎯 ล็อคกำไรเมื่อกำไรถึง 65% ของระยะ TP
     PROFIT_LOCK_LEVEL = 0.5     # ขยับ SL มาที่ 50% ของระยะ TP
 
+    # ⚡ Protection Loop: เช็ค BE / Profit Lock แยกเธรด ทุก 0.2 วินาที (ไม่ต้องรอรอบสัญญาณ 15 วินาที)
+    ENABLE_PROTECTION_LOOP = True
+    PROTECTION_INTERVAL = 0.2       # วินาทีต่อรอบ (อ่านแค่ Tick)
+    POSITION_CACHE_SECONDS = 2.0    # โหลดรายการออเดอร์ใหม่ทุกกี่วินาที
+
     # =========================================
     # 🧩 7. STRATEGY SPECIFIC OVERRIDES
     # =========================================
     # Overrides default settings based on strategy selection
     
     MACD_CONFIG = {
-        'TIMEFRAME': mt5.TIMEFRAME_M15,
+        'TIMEFRAME': tf.TIMEFRAME_M15,
         'STOP_LOSS_POINTS': 650,     # ยึดตามค่ามาตรฐาน (650)
         'TAKE_PROFIT_POINTS': 1625,  # ยึดตามค่ามาตรฐาน (1625)
         'ATR_SL_MULT': 1.5,
@@ -96,7 +103,7 @@ class Config:
     }
     
     SMC_CONFIG = {
-        'TIMEFRAME': mt5.TIMEFRAME_M5,   
+        'TIMEFRAME': tf.TIMEFRAME_M5,   
         'STOP_LOSS_POINTS': 650,     # ยึดตามค่ามาตรฐาน (650)
         'TAKE_PROFIT_POINTS': 1625,  # ยึดตามค่ามาตรฐาน (1625)
         'ATR_SL_MULT': 1.2,
@@ -114,6 +121,9 @@ class Config:
     
     # --- 6. SMC (Smart Money Concepts) ---
     SMC_LOOKBACK = 300            # จำนวนแท่งย้อนหลังที่เช็คหา OB
+    ENABLE_OB_TRACKER = True      # ⚡ อัปเดต OB ทีละแท่ง (ไม่สแกน SMC_LOOKBACK แท่งใหม่ทุก Tick)
+    PD_RANGE_LOOKBACK = 50        # จำนวนแท่งที่ใช้หา High/Low ของโซน Premium/Discount + Fibo
+    ENABLE_FVG_REGISTRY = True    # 🕳️ จำ FVG ทุกอันจนกว่าราคาจะเติมเต็ม (False = ดูแค่ 20 แท่งล่าสุดแบบเดิม)
     OB_MITIGATION_THRESHOLD = 150 # ระยะห่าง (Points) ที่ยอมรับว่า "Retest" (ราคาเข้ามาใกล้ OB)
     OB_GUARD_THRESHOLD = 100      # ⛔ ห้ามเข้าออเดอร์ถ้าใกล้แนวต้าน/รับ ฝั่งตรงข้ามเกิน X จุด (กันติดดอย)
     
@@ -124,8 +134,9 @@ class Config:
     
     # MTF (Multi-Timeframe) Filter
     ENABLE_MTF_FILTER = True      # เปิดระบบเช็คเทรนด์ภาพใหญ่
-    MTF_TIMEFRAME = mt5.TIMEFRAME_H1 # เช็คเทรนด์ H1 (1 ชั่วโมง)
+    MTF_TIMEFRAME = tf.TIMEFRAME_H1 # เช็คเทรนด์ H1 (1 ชั่วโมง)
     MTF_EMA_PERIOD = 200          # ใช้ EMA 200 เป็นเงื่อนไขใน H1ด้วย
+    MTF_LOCAL_RESAMPLE = True     # ✅ สร้างแท่ง H1 จากแท่งหลัก (M5/M15) เอง -> ไม่ต้องดึง H1 จาก MT5 ทุกรอบ
     
     # ADX (Trend Strength) - Removed from Logic but kept in config just in case
     ADX_PERIOD = 14
@@ -166,3 +177,112 @@ class Config:
     
     # --- SMC Advanced Settings ---
     ENABLE_DYNAMIC_TP_SMC = True # ✅ Use Swing High/Low as TP (Target Liquidity)
+
+    # =========================================
+    # 📡 8. SETTINGS: SHARED MARKET DATA (ข้อมูลราคากลาง)
+    # =========================================
+    # รัน `python market_publisher.py` 1 ตัว -> ดึงราคา + Indicator จาก MT5 แล้วแชร์ให้บอททุกตัวผ่าน Shared Memory
+    USE_SHARED_MARKET_DATA = False  # True = บอทอ่านข้อมูลจาก Publisher (ถ้า Publisher ไม่ทำงาน จะดึงจาก MT5 เองอัตโนมัติ)
+    SHARED_DATA_FEEDS = [           # (Symbol, Timeframe) ที่ Publisher จะแชร์
+        (SYMBOL, TIMEFRAME),
+        (SYMBOL, SMC_CONFIG['TIMEFRAME']),
+        (SYMBOL, MTF_TIMEFRAME),
+        ("BTCUSD", tf.TIMEFRAME_M15),
+    ]
+    SHARED_DATA_CAPACITY = 2048     # จำนวนแท่งสูงสุดใน Ring Buffer ต่อ Feed
+    SHARED_DATA_INTERVAL = 1.0      # Publisher อัปเดตทุกกี่วินาที
+    SHARED_DATA_MAX_AGE = 30        # ข้อมูลเก่ากว่ากี่วินาทีถือว่า Publisher ค้าง -> กลับไปดึงเอง
+
+    # =========================================
+    # 🌐 9. SETTINGS: MULTI-SYMBOL ENGINE (หลายสินค้าในบอทเดียว)
+    # =========================================
+    # รัน `python main.py --multi` -> เทรดทุก Symbol ในลิสต์ด้วย Strategy เดียวกัน
+    # Indicator ของทุก Symbol คำนวณรวดเดียวเป็นตาราง 2 มิติ (Symbols x Bars)
+    SYMBOLS = [SYMBOL, "XAGUSD", "BTCUSD", "US30"]
+
+    # ค่าเฉพาะของแต่ละ Symbol (ทับค่า Strategy Config และค่าหลัก)
+    SYMBOL_OVERRIDES = {
+        "XAGUSD": {
+            'STOP_LOSS_POINTS': 300,
+            'TAKE_PROFIT_POINTS': 750,
+            'MAX_SL_POINTS': 500,
+            'MAX_SPREAD_POINTS': 40,
+        },
+        "BTCUSD": {
+            'STOP_LOSS_POINTS': 50000,
+            'TAKE_PROFIT_POINTS': 125000,
+            'MAX_SL_POINTS': 80000,
+            'MAX_SPREAD_POINTS': 3000,
+            'DEVIATION': 100,
+        },
+        "US30": {
+            'STOP_LOSS_POINTS': 800,
+            'TAKE_PROFIT_POINTS': 2000,
+            'MAX_SL_POINTS': 1200,
+            'MAX_SPREAD_POINTS': 300,
+        },
+    }
+
+    # =========================================
+    # 📞 10. SETTINGS: MT5 GATEWAY (ทางผ่านคำสั่ง MT5)
+    # =========================================
+    # ทุกคำสั่งไป MT5 ผ่าน utils/mt5_gateway.py (ทีละคำสั่ง / รวมคำสั่งอ่านซ้ำ / จำกัดความถี่ / จับเวลา)
+    GATEWAY_COALESCE_MS = 50        # คำสั่งอ่านเดียวกัน (อาร์กิวเมนต์เดียวกัน) ภายในกี่ ms ใช้ผลลัพธ์เดิม (0 = ปิด)
+    GATEWAY_RATE_LIMITS = {         # จำนวนครั้งสูงสุดต่อวินาที ต่อฟังก์ชัน (เกินแล้วรอคิว)
+        'copy_rates_from_pos': 20,
+        'copy_ticks_from': 20,
+        'history_deals_get': 5,
+        'history_orders_get': 5,
+        'positions_get': 20,
+        'order_send': 5,
+    }
+
+    # =========================================
+    # 🚀 11. SETTINGS: ORDER EXECUTION (ส่งออเดอร์)
+    # =========================================
+    # เตรียม Request ไว้ล่วงหน้า (Filling Mode / Magic / Deviation) -> ตอนส่งดึงแค่ราคาล่าสุด
+    ORDER_MAX_RETRIES = 3           # Requote / Price Off -> ส่งใหม่ด้วยราคาล่าสุด สูงสุดกี่ครั้ง
+    ORDER_RETRY_DELAY = 0.05        # รอกี่วินาทีก่อนส่งใหม่
+    ORDER_TEMPLATE_TTL = 3600       # อ่านสเปก Symbol ใหม่ทุกกี่วินาที (Tick Value / Filling Mode)
+
+    # =========================================
+    # 🗄️ 12. SETTINGS: ENTRY LOG (บันทึกจุดเข้า)
+    # =========================================
+    # data/entry_log.sqlite: 1 แถวต่อออเดอร์, 1 คอลัมน์ต่อ Indicator (ตัวเลขจริง ไม่ใช่ข้อความ)
+    # ย้ายข้อมูลเก่าจาก entry_log.csv: `python utils/entry_store.py`
+    # ออเดอร์ที่ Fill แล้วเขียนลงไฟล์ทันที; ค่าด้านล่างใช้กับแถวที่ยังค้าง (เขียนไม่สำเร็จ / นำเข้าข้อมูลเก่า)
+    ENTRY_LOG_BATCH = 20            # เขียนลงไฟล์เมื่อค้างครบกี่แถว
+    ENTRY_LOG_FLUSH_SECONDS = 60    # หรือเมื่อแถวแรกค้างนานเกินกี่วินาที
+
+    # =========================================
+    # ♻️ 13. SETTINGS: WARM RESTART (เริ่มใหม่ต่อจากเดิม)
+    # =========================================
+    # data/state/: สถานะบอท (แท่งที่เข้าไปแล้ว / Cooldown / เวลาที่ Sync ประวัติล่าสุด) บันทึกทุกครั้งที่เปลี่ยน
+    # รีสตาร์ทแล้วไม่เข้าซ้ำแท่งเดิม + ไม่ต้องดึงข้อมูลย้อนหลังใหม่ทั้งหมด
+    ENABLE_STATE_JOURNAL = True
+    STATE_JOURNAL_COMPACT = 200     # รวม Journal เป็นไฟล์ State เดียวทุกกี่รายการ
+    ENABLE_BAR_SNAPSHOT = True      # เก็บแท่งเทียน + MTF Resampler ไว้ใช้ตอนเริ่มใหม่ (ดึงเฉพาะแท่งที่ขาด)
+    INCREMENTAL_FETCH_BARS = 50     # มีแท่งในแคชแล้ว -> ดึงแค่กี่แท่งล่าสุด (ถ้าไม่ต่อกันจะดึงเต็มอัตโนมัติ)
+
+    # =========================================
+    # 🧮 14. SETTINGS: INDICATOR CACHE (จำผลคำนวณอินดิเคเตอร์)
+    # =========================================
+    # แท่งชุดเดียวกัน + พารามิเตอร์เดียวกัน -> ใช้ผลเดิม ไม่คำนวณซ้ำ (ทุกกลยุทธ์ / MTF / Dashboard ในโปรเซสเดียวกัน)
+    ENABLE_INDICATOR_CACHE = True
+    INDICATOR_CACHE_MB = 64         # ใช้ RAM สูงสุดกี่ MB (เกินแล้วลบผลที่ไม่ได้ใช้นานที่สุดก่อน)
+    INDICATOR_CACHE_DIR = None      # โฟลเดอร์เก็บผลลงดิสก์ (สำหรับงานวิจัย/Backtest เช่น 'data/indicator_cache') None = ปิด
+
+    # =========================================
+    # 🧠 15. SETTINGS: SIGNAL MEMO (จำผลวิเคราะห์แท่งปิด)
+    # =========================================
+    # USE_REALTIME_CANDLE = False -> แท่งสัญญาณ [-2] เดิมทั้งแท่ง: วิเคราะห์เต็มครั้งเดียวต่อแท่ง
+    # รอบถัดไปเช็คแค่ เวลาเซิร์ฟเวอร์ / MTF / ออเดอร์ที่เปิดอยู่ (เปลี่ยนเมื่อไหร่ค่อยวิเคราะห์ใหม่)
+    ENABLE_SIGNAL_MEMO = True
+
+    # =========================================
+    # 🧵 16. SETTINGS: ASYNC RUNTIME (งานเบื้องหลังไม่บล็อกสัญญาณ)
+    # =========================================
+    # สัญญาณ + คำสั่ง MT5 ทำบนเธรดเดียว / Telegram, ข่าว, ประวัติเทรด, เขียนไฟล์ ทำเป็นงานเบื้องหลัง
+    USE_ASYNC_RUNTIME = True        # False = ลูปเดิม (ทำทุกอย่างต่อกันในรอบเดียว)
+    HISTORY_SYNC_SECONDS = 60       # ซิงค์ประวัติเทรดลง CSV ทุกกี่วินาที
+    NEWS_REFRESH_SECONDS = 300      # เช็คปฏิทินข่าวใหม่ทุกกี่วินาที (ดาวน์โหลดจริงทุก 4 ชม.)
@@ -0,0 +1,9 @@
+# MetaTrader5 TIMEFRAME_* values (the numbers the terminal package uses), defined here so
+# settings, indicators, strategies and the analysis tools import without the terminal
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H4 = 16388
+TIMEFRAME_D1 = 16408
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
@@ -9,6 +10,12 @@ import os
 # Ensure utils can be imported
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from utils.data_tool import export_trade_history, export_market_data
+from utils.dashboard_data import IncrementalCSVLoader, classify_trades, load_trades
+from utils.downsample import downsample_ohlc, downsample_line
+
+# Max points sent to the browser per chart (roughly one per horizontal pixel)
+MAX_CHART_CANDLES = 1500
+MAX_CHART_POINTS = 2000
 
 # Page Config
 st.set_page_config(page_title="XAUUSD Bot Dashboard", layout="wide", page_icon="📈")
@@ -20,7 +27,6 @@ if st.sidebar.button("🔄 Refresh Data (Fetch New)"):
         try:
             export_trade_history()
             export_market_data(days=30)
-            st.cache_data.clear() # Clear cache to reload new CSVs
             st.rerun() 
         except Exception as e:
             st.error(f"Error updating data: {e}")
@@ -28,24 +34,21 @@ if st.sidebar.button("🔄 Refresh Data (Fetch New)"):
 st.title("📊 XAUUSD Trading Bot")
 
 # Load Data
-@st.cache_data
+# Loaders live across reruns; each rerun only stats the files and parses appended rows.
+@st.cache_resource
+def get_loaders():
+    return {
+        'trades': IncrementalCSVLoader('data/export_trade_history.csv', parse_dates=['time']),
+        'market': IncrementalCSVLoader('data/export_market_data.csv', parse_dates=['time']),
+    }
+
 def load_data():
-    try:
-        # Load Trade History
-        trades = pd.read_csv('data/export_trade_history.csv')
-        if not trades.empty:
-            trades['time'] = pd.to_datetime(trades['time'])
-            trades['cumulative_profit'] = trades['profit'].cumsum()
-            trades['date'] = trades['time'].dt.date
-        
-        # Load Market Data
-        market = pd.read_csv('data/export_market_data.csv')
-        if not market.empty:
-            market['time'] = pd.to_datetime(market['time'])
-            
-        return trades, market
-    except FileNotFoundError:
+    loaders = get_loaders()
+    trades = load_trades(loaders['trades'])
+    market = loaders['market'].load()
+    if trades is None or market is None:
         return None, None
+    return trades, market
 
 trades, market = load_data()
 
@@ -70,23 +73,7 @@ if not trades.empty:
     # ----------------------------------------------------
     # 1. TRADE STATUS CLASSIFICATION (TP vs SL vs BR)
     # ----------------------------------------------------
-    def classify_trade(row):
-        profit = row['profit']
-        comment = str(row['comment']).lower()
-        
-        if profit > 0:
-            if 'tp' in comment:
-                return 'TP 🎯'  # Take Profit Hit
-            elif 'sl' in comment:
-                return 'BR 🛡️'  # Trailing Stop (Break Even)
-            else:
-                return 'WIN ✅' # Manual Close (Profit)
-        elif profit < 0:
-            return 'SL ❌'      # Stop Loss Hit
-        else:
-            return 'BE ➖'      # Break Even (Exactly 0)
-
-    display_trades['status'] = display_trades.apply(classify_trade, axis=1)
+    display_trades['status'] = classify_trades(display_trades)
 
     # Calculate Counts
     status_counts = display_trades['status'].value_counts()
@@ -121,7 +108,8 @@ with tab1:
     if not display_trades.empty:
         # Row 1: Equity Curve (Full Width)
         st.subheader(f"📈 Profit Growth ({selected_symbol})")
-        fig_equity = px.line(display_trades, x='time', y='cumulative_profit', markers=True)
+        equity_points = downsample_line(display_trades, 'time', 'cumulative_profit', MAX_CHART_POINTS)
+        fig_equity = px.line(equity_points, x='time', y='cumulative_profit', markers=len(equity_points) < 500)
         fig_equity.update_traces(line_color='#00CC96', line_width=3)
         fig_equity.update_layout(xaxis_title="Time", yaxis_title="Balance Growth ($)", hovermode="x unified")
         st.plotly_chart(fig_equity, width="stretch")
@@ -132,7 +120,7 @@ with tab1:
         with c1:
             st.subheader("📅 Daily Profit/Loss")
             daily_profit = display_trades.groupby('date')['profit'].sum().reset_index()
-            daily_profit['color'] = daily_profit['profit'].apply(lambda x: 'green' if x >= 0 else 'red')
+            daily_profit['color'] = np.where(daily_profit['profit'] >= 0, 'green', 'red')
             
             fig_daily = px.bar(
                 daily_profit, 
@@ -174,8 +162,14 @@ with tab1:
 with tab2:
     st.subheader(f"🕯️ {selected_symbol if selected_symbol != 'All' else 'Market'} Price Chart")
     if not market.empty:
-        # Show last 200 candles by default for performance
-        recent_market = market.tail(200)
+        # Pick a window, then downsample to ~1 candle per pixel (wick extremes preserved)
+        max_days = max(1, (market['time'].iloc[-1] - market['time'].iloc[0]).days)
+        days = st.slider("Days to show", min_value=1, max_value=max_days, value=min(7, max_days)) if max_days > 1 else 1
+        start_time = market['time'].iloc[-1] - pd.Timedelta(days=days)
+        window = market.iloc[market['time'].searchsorted(start_time):]
+        recent_market = downsample_ohlc(window, MAX_CHART_CANDLES)
+        if len(recent_market) < len(window):
+            st.caption(f"Showing {len(recent_market):,} buckets for {len(window):,} bars")
         
         fig_candle = go.Figure(data=[go.Candlestick(
             x=recent_market['time'],
@@ -17,11 +17,13 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='XAUUSD Trading Bot')
     parser.add_argument('--strategy', type=str, default='TRIPLE_CONFLUENCE', 
                         help='Strategy to run: TRIPLE_CONFLUENCE (Sniper), MACD_RSI or OB_FVG_FIBO')
+    parser.add_argument('--multi', action='store_true',
+                        help='Trade every symbol in Config.SYMBOLS from one engine')
     
     args = parser.parse_args()
     
     # Dynamic Log Filename
-    log_filename = f'logs/trading_{args.strategy}.log'
+    log_filename = f'logs/trading_{args.strategy}{"_MULTI" if args.multi else ""}.log'
     
     logging.basicConfig(
         filename=log_filename, 
@@ -45,10 +47,21 @@ if __name__ == "__main__":
     logging.getLogger().addHandler(console_handler)
     
     try:
-        from app.bot import XAUUSDBot
-        # Instantiate and Run with selected strategy
-        logging.info(f"Starting Bot with Strategy: {args.strategy}")
-        bot = XAUUSDBot(strategy_name=args.strategy)
-        bot.run()
+        if args.multi:
+            from app.engine import MultiSymbolEngine
+            logging.info(f"Starting Multi-Symbol Engine with Strategy: {args.strategy}")
+            engine = MultiSymbolEngine(strategy_name=args.strategy)
+            engine.run()
+        else:
+            from app.bot import XAUUSDBot
+            # Instantiate and Run with selected strategy
+            logging.info(f"Starting Bot with Strategy: {args.strategy}")
+            from config.settings import Config
+            bot = XAUUSDBot(strategy_name=args.strategy)
+            if Config.USE_ASYNC_RUNTIME:
+                from app.runtime import BotRuntime
+                BotRuntime(bot).run()
+            else:
+                bot.run()
     except Exception as e:
         logging.critical(f"Fatal Error: {e}")
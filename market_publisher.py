@@ -0,0 +1,33 @@
+import logging
+import sys
+import os
+
+# Ensure project root is in path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+if not os.path.exists('logs'):
+    os.makedirs('logs')
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        filename='logs/market_publisher.log',
+        level=logging.INFO,
+        format='%(asctime)s | %(levelname)-8s | %(message)s',
+        datefmt='%H:%M:%S',
+        force=True,
+        encoding='utf-8'
+    )
+
+    if sys.stdout.encoding != 'utf-8':
+        sys.stdout.reconfigure(encoding='utf-8')
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(logging.Formatter('%(asctime)s | %(levelname)-8s | %(message)s', datefmt='%H:%M:%S'))
+    logging.getLogger().addHandler(console_handler)
+
+    try:
+        from utils.shared_market_data import MarketDataPublisher
+        MarketDataPublisher().run()
+    except Exception as e:
+        logging.critical(f"Fatal Error: {e}")
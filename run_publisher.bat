@@ -0,0 +1,13 @@
+@echo off
+title Market Data Publisher 📡
+cls
+echo ==========================================
+echo    MARKET DATA PUBLISHER (Shared Memory)
+echo ==========================================
+echo.
+echo Set USE_SHARED_MARKET_DATA = True in config to let the bots read from it.
+echo.
+python market_publisher.py
+echo.
+echo Publisher stopped.
+pause
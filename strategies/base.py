@@ -1,14 +1,127 @@
 from abc import ABC, abstractmethod
+import numpy as np
 import pandas as pd
+from config.settings import Config
+from utils.bar_series import BarSeries
+from utils.signal_memo import SignalMemo
+
+
+def lag(values, k):
+    """out[L] = values[L - k] (NaN / False before the start)"""
+    values = np.asarray(values)
+    out = np.zeros(len(values), dtype=bool) if values.dtype == bool else np.full(len(values), np.nan)
+    if k == 0:
+        out[:] = values
+    elif k < len(values):
+        out[k:] = values[:-k]
+    return out
+
 
 class BaseStrategy(ABC):
+    # Indicator columns read by analyze(). Only these are computed by the data layer
+    # (see utils/indicator_graph.py); shared columns are computed once.
+    REQUIRED_INDICATORS = ()
+    # Optional per-column parameter overrides, e.g. {'ema_trend': {'period': 100}}
+    INDICATOR_PARAMS = {}
+
     @abstractmethod
     def analyze(self, df: pd.DataFrame):
         """
         Analyze the market data and return signal and details.
+        `df` may be a DataFrame or a utils.bar_series.BarSeries (use BarSeries.wrap(df)).
         Returns:
             signal (str): "BUY", "SELL", "WAIT", etc.
             status_detail (str): Description of the signal status.
             extra_data (dict): Dictionary containing additional data for logging or display.
         """
         pass
+
+    def evaluate(self, df):
+        """
+        analyze() for the live loop. Closed-candle decisions are memoized per signal bar
+        (utils/signal_memo.py): only the live guards are re-checked until the next bar closes.
+        """
+        if df is None or not Config.ENABLE_SIGNAL_MEMO:
+            return self.analyze(df)
+        if getattr(self, 'signal_memo', None) is None:
+            self.signal_memo = SignalMemo(self)
+        return self.signal_memo.analyze(BarSeries.wrap(df))
+
+    def live_inputs(self, bars):
+        """
+        Forming-bar values a closed-candle analyze() still reads (memo key next to the signal bar).
+        Default: none, the decision only reads the signal bar and the bars before it.
+        """
+        return ()
+
+    @abstractmethod
+    def signals(self, df, mtf_trend=None):
+        """
+        analyze() for every bar of a prepared indicator frame in one vectorized call.
+        Row L = the decision analyze(df[:L+1]) makes (bar L is the newest bar, so in
+        closed-candle mode the signal comes from bar L-1).
+        - Server time = time of bar L (bar clock); `mtf_trend`: "UP"/"DOWN"/... per bar or
+          one value (default "READY" = filter off)
+        - No position is assumed open (check_open_positions() is a live concern)
+        - sl / tp follow execute_trade() with the close of the signal bar as entry price
+        Returns a DataFrame (index of df): signal, price, sl, tp (NaN unless BUY / SELL).
+        """
+        pass
+
+    # --- Helpers for signals() ---
+    @staticmethod
+    def signal_offset():
+        """Bars between the newest bar and the bar analyze() reads (row_index -2 / -1)"""
+        return 0 if Config.USE_REALTIME_CANDLE else 1
+
+    @staticmethod
+    def mtf_array(mtf_trend, n):
+        if mtf_trend is None:
+            mtf_trend = "READY"
+        if isinstance(mtf_trend, str):
+            return np.full(n, mtf_trend, dtype=object)
+        return np.asarray(mtf_trend, dtype=object)
+
+    @staticmethod
+    def trading_hours(bars):
+        hours = pd.DatetimeIndex(bars.time).hour.to_numpy()
+        return (Config.TRADING_START_HOUR <= hours) & (hours <= Config.TRADING_END_HOUR)
+
+    def order_levels(self, bars, signal, price, atr=None, custom_sl=None, point=0.01):
+        """execute_trade() SL / TP for every BUY / SELL row (`point`: symbol point, XAUUSD 0.01)"""
+        n = len(signal)
+        buy, sell = signal == "BUY", signal == "SELL"
+        atr = np.zeros(n) if atr is None else np.nan_to_num(atr)
+        custom_sl = np.zeros(n) if custom_sl is None else np.nan_to_num(custom_sl)
+        stop = self.bot.get_setting('STOP_LOSS_POINTS') * point
+        direction = np.where(buy, 1.0, -1.0)
+
+        default_sl = price - direction * stop
+        if Config.USE_SWING_SL:
+            # Live: lows / highs of the last SWING_LOOKBACK + 4 bars before the newest one
+            window = Config.SWING_LOOKBACK + 4
+            swing_low = lag(pd.Series(bars['low']).rolling(window, min_periods=1).min().to_numpy(), 1)
+            swing_high = lag(pd.Series(bars['high']).rolling(window, min_periods=1).max().to_numpy(), 1)
+            fallback = np.where(buy, swing_low, swing_high)
+        elif Config.ENABLE_AUTO_RISK:
+            fallback = np.where(atr > 0, price - direction * atr * self.bot.get_setting('ATR_SL_MULT'), default_sl)
+        else:
+            fallback = default_sl
+        # Custom SL on the wrong side of the price -> standard SL
+        custom_ok = (custom_sl > 0) & (direction * (price - custom_sl) > 0)
+        sl = np.where(custom_sl > 0, np.where(custom_ok, custom_sl, default_sl), fallback)
+
+        risk = direction * (price - sl)
+        min_risk = 100 * point
+        max_risk = self.bot.get_setting('MAX_SL_POINTS') * point
+        risk = np.where(risk < min_risk, min_risk, risk)
+        risk = np.where(risk > max_risk, max_risk, risk)
+        sl = np.where(direction * (price - sl) == risk, sl, price - direction * risk)  # Moved only when capped
+        tp = price + direction * risk * Config.RISK_REWARD_RATIO
+
+        active = buy | sell
+        return np.where(active, sl, np.nan), np.where(active, tp, np.nan)
+
+    def signal_frame(self, bars, signal, price, atr=None, custom_sl=None):
+        sl, tp = self.order_levels(bars, signal, price, atr=atr, custom_sl=custom_sl)
+        return pd.DataFrame({'signal': signal, 'price': price, 'sl': sl, 'tp': tp}, index=bars.frame.index)
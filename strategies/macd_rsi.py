@@ -1,15 +1,18 @@
-from .base import BaseStrategy
+from .base import BaseStrategy, lag
 from config.settings import Config
-from utils.indicators import Indicators
+from utils.bar_series import BarSeries
 from datetime import datetime
-import MetaTrader5 as mt5
+import numpy as np
 
 class MACDRSIStrategy(BaseStrategy):
+    REQUIRED_INDICATORS = ('ema_trend', 'macd_line', 'macd_signal', 'rsi', 'atr', 'adx')
+
     def __init__(self, bot_instance):
         self.bot = bot_instance # Need access to bot for check_open_positions and other potential callbacks
 
     def analyze(self, df):
         if df is None: return "WAIT", "No Data", {}
+        bars = BarSeries.wrap(df)
         
         # Select Candle (Realtime vs Closed)
         if Config.USE_REALTIME_CANDLE:
@@ -19,15 +22,14 @@ class MACDRSIStrategy(BaseStrategy):
              # Use PREVIOUS closed candle [index -2] (Standard)
              row_index = -2
 
-        prev_row = df.iloc[row_index]
-        price = prev_row['close']
+        price = bars.at('close', row_index)
         
-        ema_trend = prev_row['ema_trend']
-        macd_line = prev_row['macd_line']
-        macd_signal = prev_row['macd_signal']
-        rsi = prev_row['rsi']
-        atr = prev_row['atr']
-        adx = prev_row['adx'] 
+        ema_trend = bars.at('ema_trend', row_index)
+        macd_line = bars.at('macd_line', row_index)
+        macd_signal = bars.at('macd_signal', row_index)
+        rsi = bars.at('rsi', row_index)
+        atr = bars.at('atr', row_index)
+        adx = bars.at('adx', row_index)
         
         signal = "WAIT"
         status_detail = "WAIT"
@@ -63,23 +65,23 @@ class MACDRSIStrategy(BaseStrategy):
             
             # --- FRESH SIGNAL CHECK (Prevents re-entry after SL) ---
             prev_idx = row_index - 1 
-            prev_candle = df.iloc[prev_idx]
-            
-            prev_macd_line = prev_candle['macd_line']
-            prev_macd_signal = prev_candle['macd_signal']
+            prev_macd_line = bars.at('macd_line', prev_idx)
+            prev_macd_signal = bars.at('macd_signal', prev_idx)
             
             # BUY Checks
             buy_ema = price > ema_trend
             
             # --- IMPROVED: MACD Crossover with Lookback (Catch moves if missed) ---
             # Check last 3 candles for a crossover
-            lookback_df = df.iloc[row_index-3 : row_index+1]
+            lookback = slice(row_index-3, row_index+1)
+            lookback_macd = bars['macd_line'][lookback]
+            lookback_signal = bars['macd_signal'][lookback]
             buy_macd_cross = False
-            for i in range(1, len(lookback_df)):
-                prev_m = lookback_df.iloc[i-1]['macd_line']
-                prev_s = lookback_df.iloc[i-1]['macd_signal']
-                curr_m = lookback_df.iloc[i]['macd_line']
-                curr_s = lookback_df.iloc[i]['macd_signal']
+            for i in range(1, len(lookback_macd)):
+                prev_m = lookback_macd[i-1]
+                prev_s = lookback_signal[i-1]
+                curr_m = lookback_macd[i]
+                curr_s = lookback_signal[i]
                 if curr_m > curr_s and prev_m <= prev_s:
                     buy_macd_cross = True
                     break
@@ -87,11 +89,11 @@ class MACDRSIStrategy(BaseStrategy):
             # SELL Checks (Mirror)
             sell_ema = price < ema_trend
             sell_macd_cross = False
-            for i in range(1, len(lookback_df)):
-                prev_m = lookback_df.iloc[i-1]['macd_line']
-                prev_s = lookback_df.iloc[i-1]['macd_signal']
-                curr_m = lookback_df.iloc[i]['macd_line']
-                curr_s = lookback_df.iloc[i]['macd_signal']
+            for i in range(1, len(lookback_macd)):
+                prev_m = lookback_macd[i-1]
+                prev_s = lookback_signal[i-1]
+                curr_m = lookback_macd[i]
+                curr_s = lookback_signal[i]
                 if curr_m < curr_s and prev_m >= prev_s:
                     sell_macd_cross = True
                     break
@@ -148,3 +150,44 @@ class MACDRSIStrategy(BaseStrategy):
             status_detail = f"💤 Sleeping (Time) | Server Time: {server_time.strftime('%H:%M')}"
 
         return signal, status_detail, extra_data
+
+    def signals(self, df, mtf_trend=None):
+        """Vectorized analyze() over the whole frame (see BaseStrategy.signals)"""
+        bars = BarSeries.wrap(df)
+        n = len(bars)
+        k = self.signal_offset()
+        price = lag(bars['close'], k)
+        ema_trend = lag(bars['ema_trend'], k)
+        rsi = lag(bars['rsi'], k)
+        atr = lag(bars['atr'], k)
+        adx = lag(bars['adx'], k)
+        mtf = self.mtf_array(mtf_trend, n)
+        buy_mtf_ok = np.isin(mtf, ["UP", "READY", "Unknown"])
+        sell_mtf_ok = np.isin(mtf, ["DOWN", "READY", "Unknown"])
+
+        # Crossovers in the 4-bar window ending at the signal bar (3 bar pairs).
+        # Same slice as analyze(): slice(row_index-3, row_index+1) is empty in realtime mode.
+        macd, macd_sig = bars['macd_line'], bars['macd_signal']
+        cross_up = np.zeros(n, dtype=bool)    # Cross completed on bar j
+        cross_down = np.zeros(n, dtype=bool)
+        cross_up[1:] = (macd[1:] > macd_sig[1:]) & (macd[:-1] <= macd_sig[:-1])
+        cross_down[1:] = (macd[1:] < macd_sig[1:]) & (macd[:-1] >= macd_sig[:-1])
+        buy_macd_cross = np.zeros(n, dtype=bool)
+        sell_macd_cross = np.zeros(n, dtype=bool)
+        if k == 1:
+            for d in range(1, 4):  # Signal bar L-1 and the two before it
+                buy_macd_cross |= lag(cross_up, d)
+                sell_macd_cross |= lag(cross_down, d)
+
+        with np.errstate(invalid='ignore'):
+            buy_ema = price > ema_trend
+            sell_ema = ~buy_ema & (price < ema_trend)
+            adx_ok = (Config.ADX_THRESHOLD == 0) | (adx > Config.ADX_THRESHOLD)
+            buy = buy_ema & buy_mtf_ok & adx_ok & buy_macd_cross & \
+                (rsi > Config.RSI_BUY_MIN) & (rsi < Config.RSI_OVERBOUGHT)
+            sell = sell_ema & sell_mtf_ok & adx_ok & sell_macd_cross & \
+                (rsi < Config.RSI_SELL_MAX) & (rsi > Config.RSI_OVERSOLD)
+
+        signal = np.where(buy, "BUY", np.where(sell, "SELL", "WAIT")).astype(object)
+        signal[~self.trading_hours(bars)] = "SLEEP"
+        return self.signal_frame(bars, signal, price, atr=atr)
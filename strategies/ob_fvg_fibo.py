@@ -1,21 +1,62 @@
-from .base import BaseStrategy
+from .base import BaseStrategy, lag
 from config.settings import Config
 from utils.indicators import Indicators
+from utils.bar_series import BarSeries
+from utils.order_block_tracker import OrderBlockTracker
+from utils.fvg_registry import FVGRegistry
 from datetime import datetime
+import numpy as np
 
 class OBFVGFiboStrategy(BaseStrategy):
+    REQUIRED_INDICATORS = ('ema_trend', 'rsi', 'atr', 'pattern', 'range_high', 'range_low', 'discount_below',
+                           'premium_above', 'fibo_up_618', 'fibo_up_786', 'fibo_down_618', 'fibo_down_786')
+
     def __init__(self, bot_instance):
         self.bot = bot_instance
+        self.ob_tracker = None
+        self.fvg_registry = None
+
+    def order_blocks(self, bars):
+        """(bull_ob, bear_ob) for the forming bar: incremental tracker or a full calculate_order_blocks() scan"""
+        smc_lookback = self.bot.get_setting('SMC_LOOKBACK') if self.bot.get_setting('SMC_LOOKBACK') else Config.SMC_LOOKBACK
+        max_sl_points = self.bot.get_setting('MAX_SL_POINTS')
+        
+        if Config.ENABLE_OB_TRACKER:
+            if self.ob_tracker is None or \
+                    (self.ob_tracker.lookback, self.ob_tracker.max_sl_points) != (smc_lookback, max_sl_points):
+                self.ob_tracker = OrderBlockTracker(lookback=smc_lookback, max_sl_points=max_sl_points)
+            self.ob_tracker.update(bars)
+            return self.ob_tracker.order_blocks()
+        return Indicators.calculate_order_blocks(
+            bars, 
+            lookback=smc_lookback, 
+            max_sl_points=max_sl_points
+        )
+
+    def live_inputs(self, bars):
+        """
+        What closed-candle mode still reads from the forming bar: whether it confirms the
+        newest fractal (identify_swing_points), the dealing range it is part of, and the
+        order blocks left after its mitigation / close
+        """
+        high, low = bars['high'], bars['low']
+        if len(high) < 3:
+            return None
+        confirms = (high[-3] > high[-1], low[-3] < low[-1])
+        dealing_range = (bars.at('range_high', -1), bars.at('range_low', -1))
+        if not Config.ENABLE_OB_TRACKER:
+            return confirms, dealing_range, bars.at('close', -1)  # A full OB scan costs as much as the analysis
+        return confirms, dealing_range, self.order_blocks(bars)
 
     def analyze(self, df):
         if df is None: return "WAIT", "No Data", {}
+        bars = BarSeries.wrap(df)
         
         # Select Candle
         row_index = -1 if Config.USE_REALTIME_CANDLE else -2
-        prev_row = df.iloc[row_index]
-        price = prev_row['close']
-        atr = prev_row['atr']
-        rsi = prev_row['rsi']
+        price = bars.at('close', row_index)
+        atr = bars.at('atr', row_index)
+        rsi = bars.at('rsi', row_index)
         
         # --- TIME FILTER (KILL ZONES) ---
         server_time = self.bot.get_server_time()
@@ -26,52 +67,48 @@ class OBFVGFiboStrategy(BaseStrategy):
             return "WAIT", f"Outside Kill Zone ({Config.TRADING_START_HOUR}:00-{Config.TRADING_END_HOUR}:00) | Server Time: {server_time.strftime('%H:%M')}", {}
         
         # 1. Indicators & Patterns
-        smc_lookback = self.bot.get_setting('SMC_LOOKBACK') if self.bot.get_setting('SMC_LOOKBACK') else Config.SMC_LOOKBACK
-        max_sl_points = self.bot.get_setting('MAX_SL_POINTS')
-        
-        bull_ob, bear_ob = Indicators.calculate_order_blocks(
-            df, 
-            lookback=smc_lookback, 
-            max_sl_points=max_sl_points
-        )
-        bull_fvg, bear_fvg = Indicators.calculate_fvg(df, lookback=20)
+        bull_ob, bear_ob = self.order_blocks(bars)
+        if Config.ENABLE_FVG_REGISTRY:
+            if self.fvg_registry is None:
+                self.fvg_registry = FVGRegistry()
+            # Gaps left open by the bars before the candle being evaluated
+            self.fvg_registry.update(bars if Config.USE_REALTIME_CANDLE else bars.slice(None, -1))
+            in_bull_fvg, in_bear_fvg = self.fvg_registry.in_gap(price)
+            bull_fvg, bear_fvg = [], []
+        else:
+            in_bull_fvg, in_bear_fvg = False, False
+            bull_fvg, bear_fvg = Indicators.calculate_fvg(bars, lookback=20)
         
         # 2. Advanced SMC Utils
-        swings = Indicators.identify_swing_points(df)
-        mss = Indicators.check_mss(df, swings) 
+        swings = Indicators.identify_swing_points(bars)
+        mss = Indicators.check_mss(bars, swings) 
         
         # Trend & IDM
         mtf_trend = self.bot.get_mtf_trend()
-        ema_trend = prev_row['ema_trend'] 
+        ema_trend = bars.at('ema_trend', row_index)
         trend_dir = "UP" if price > ema_trend else "DOWN"
         
         if mss == "BULL_MSS": trend_dir = "UP"
         elif mss == "BEAR_MSS": trend_dir = "DOWN"
         
-        has_idm_sweep = Indicators.check_inducement_sweep(df, swings, trend_dir)
-        
-        # Premium/Discount
-        high, low = Indicators.get_swing_high_low(df, lookback=50)
-        fibo_levels = {}
-        is_discount = False
-        is_premium = False
-        mid_point = 0
+        has_idm_sweep = Indicators.check_inducement_sweep(bars, swings, trend_dir)
         
-        if high and low and high != low:
-             fibo_levels = Indicators.calculate_fibonacci_levels(high, low, trend_dir)
-             mid_point = (high + low) / 2
-             
-             # ✅ 5% BUFFER for deeper retracements
-             buffer = (high - low) * 0.05
-             is_discount = price < (mid_point - buffer)
-             is_premium = price > (mid_point + buffer)
+        # Premium/Discount + Fibo golden zone (data layer: last PD_RANGE_LOOKBACK bars, forming bar included)
+        # Levels are NaN when there is no range, so every comparison below is False
+        high, low = bars.at('range_high', -1), bars.at('range_low', -1)
+        is_discount = price < bars.at('discount_below', -1)
+        is_premium = price > bars.at('premium_above', -1)
+        if trend_dir == "UP":
+            fibo_618, fibo_786 = bars.at('fibo_up_618', -1), bars.at('fibo_up_786', -1)
+        else:
+            fibo_618, fibo_786 = bars.at('fibo_down_618', -1), bars.at('fibo_down_786', -1)
         
         signal = "WAIT"
         status_detail = "WAIT"
         
         # Match Checks
         is_ob_match = False
-        is_fvg_match = False
+        is_fvg_match = in_bull_fvg
         is_fibo_match = False
         match_type = "None"
         
@@ -104,13 +141,10 @@ class OBFVGFiboStrategy(BaseStrategy):
                  is_fvg_match = True
                  break
 
-        if fibo_levels and trend_dir == "UP":
-            l618 = fibo_levels.get(0.618, 0)
-            l786 = fibo_levels.get(0.786, 0)
-            if l786 <= price <= (l618 + atr*0.2):
-                is_fibo_match = True
+        if trend_dir == "UP" and fibo_786 <= price <= (fibo_618 + atr*0.2):
+            is_fibo_match = True
         
-        pattern = Indicators.check_candlestick_pattern(df, index=row_index)
+        pattern = Indicators.check_candlestick_pattern(bars, index=row_index)
         candlestick_conf = pattern in ["BULLISH_ENGULFING", "BULLISH_PINBAR"]
         smc_conf = has_idm_sweep or (mss == "BULL_MSS")
         
@@ -156,7 +190,7 @@ class OBFVGFiboStrategy(BaseStrategy):
 
         # --- SELL LOGIC ---
         is_sell_ob = False
-        is_sell_fvg_match = False
+        is_sell_fvg_match = in_bear_fvg
         is_sell_fibo = False
         
         if bear_ob:
@@ -173,11 +207,8 @@ class OBFVGFiboStrategy(BaseStrategy):
                 is_sell_fvg_match = True
                 break
         
-        if fibo_levels and trend_dir == "DOWN":
-             l618 = fibo_levels.get(0.618, 99999)
-             l786 = fibo_levels.get(0.786, 99999)
-             if (l618 - atr*0.2) <= price <= l786:
-                 is_sell_fibo = True
+        if trend_dir == "DOWN" and (fibo_618 - atr*0.2) <= price <= fibo_786:
+            is_sell_fibo = True
 
         if is_sell_ob or is_sell_fvg_match or is_sell_fibo:
              match_type = "Setup Found"
@@ -228,7 +259,8 @@ class OBFVGFiboStrategy(BaseStrategy):
         extra_data = {
             "price": price,
             "atr": atr,
-            "fibo_levels": fibo_levels,
+            "fibo_618": fibo_618,
+            "fibo_786": fibo_786,
             "active_rsi_threshold": 50,
             "custom_sl": calculated_sl,
             "custom_tp": calculated_tp
@@ -236,3 +268,77 @@ class OBFVGFiboStrategy(BaseStrategy):
             
         return signal, status_detail, extra_data
 
+
+    def signals(self, df, mtf_trend=None):
+        """Vectorized analyze() over the whole frame (see BaseStrategy.signals)"""
+        bars = BarSeries.wrap(df)
+        n = len(bars)
+        k = self.signal_offset()
+        o, h, l, c = bars['open'], bars['high'], bars['low'], bars['close']
+        price = lag(c, k)
+        atr = lag(bars['atr'], k)
+        ema_trend = lag(bars['ema_trend'], k)
+        mtf = self.mtf_array(mtf_trend, n)
+
+        smc_lookback = self.bot.get_setting('SMC_LOOKBACK') if self.bot.get_setting('SMC_LOOKBACK') else Config.SMC_LOOKBACK
+        bull_top, bull_bottom, bear_top, bear_bottom = Indicators.order_blocks_history(
+            bars, lookback=smc_lookback, max_sl_points=self.bot.get_setting('MAX_SL_POINTS'))
+        if Config.ENABLE_FVG_REGISTRY:
+            in_bull_fvg, in_bear_fvg = FVGRegistry.match_history(bars, price, offset=k)
+        else:
+            in_bull_fvg, in_bear_fvg = Indicators.fvg_match_history(bars, price, lookback=20)
+
+        # Structure: newest swing high / low (identify_swing_points window), MSS / IDM on bar L-1
+        is_swing_high, is_swing_low = Indicators.swing_flags(bars)
+        last_high = Indicators.last_swing_history(is_swing_high)
+        last_low = Indicators.last_swing_history(is_swing_low)
+        swing_high_price = np.where(last_high >= 0, h[np.maximum(last_high, 0)], np.nan)
+        swing_low_price = np.where(last_low >= 0, l[np.maximum(last_low, 0)], np.nan)
+        closed_close, closed_high, closed_low = lag(c, 1), lag(h, 1), lag(l, 1)
+        with np.errstate(invalid='ignore'):
+            bull_mss = closed_close > swing_high_price
+            bear_mss = closed_close < swing_low_price
+            mss_bull = bull_mss & ~bear_mss   # Bearish MSS is checked last and wins
+            mss_bear = bear_mss
+
+            trend_up = np.where(mss_bull, True, np.where(mss_bear, False, price > ema_trend))
+            trend_dir = np.where(trend_up, "UP", "DOWN").astype(object)
+            has_idm_sweep = np.where(trend_up, closed_low < swing_low_price, closed_high > swing_high_price)
+
+            # Premium / Discount + Fibonacci golden zone: range of bar L (forming bar included), NaN = no range
+            is_discount = price < bars['discount_below']
+            is_premium = price > bars['premium_above']
+            is_fibo_match = trend_up & (bars['fibo_up_786'] <= price) & (price <= (bars['fibo_up_618'] + atr*0.2))
+            is_sell_fibo = ~trend_up & ((bars['fibo_down_618'] - atr*0.2) <= price) & (price <= bars['fibo_down_786'])
+
+            has_bull_ob = ~np.isnan(bull_top)
+            has_bear_ob = ~np.isnan(bear_top)
+            is_ob_match = has_bull_ob & (price >= (bull_bottom - atr*0.1)) & (price <= (bull_top + atr*0.5))
+            is_sell_ob = has_bear_ob & (price <= (bear_top + atr*0.1)) & (price >= (bear_bottom - atr*0.5))
+
+        codes = Indicators.PATTERN_NAMES.index
+        pattern = lag(bars['pattern'], k)
+        bull_candle = np.isin(pattern, [codes("BULLISH_ENGULFING"), codes("BULLISH_PINBAR")])
+        bear_candle = np.isin(pattern, [codes("BEARISH_ENGULFING"), codes("BEARISH_PINBAR")])
+        mtf_ok = np.isin(mtf, ["READY", "Unknown"]) | (mtf == trend_dir)
+
+        # BUY: setup in Discount + (candle or golden zone) + IDM / MSS
+        setup = is_ob_match | in_bull_fvg | is_fibo_match
+        smc_conf = has_idm_sweep | mss_bull
+        confirmed = setup & is_discount & ((bull_candle & smc_conf) | (is_ob_match & is_fibo_match & smc_conf))
+        buy_sl = np.where(has_bull_ob, bull_bottom - (atr * 0.5), price - (atr * 2))
+        with np.errstate(invalid='ignore'):
+            buy = confirmed & mtf_ok & ~(((price - buy_sl) / 0.01) > 500)
+
+        # SELL: mirror in Premium
+        setup = is_sell_ob | in_bear_fvg | is_sell_fibo
+        smc_conf = has_idm_sweep | mss_bear
+        confirmed_sell = setup & is_premium & ((bear_candle & smc_conf) | (is_sell_ob & is_sell_fibo & smc_conf))
+        sell_sl = np.where(has_bear_ob, bear_top + (atr * 0.5), price + (atr * 2))
+        with np.errstate(invalid='ignore'):
+            sell = confirmed_sell & mtf_ok & ~(((sell_sl - price) / 0.01) > 500)
+
+        signal = np.where(sell, "SELL", np.where(buy, "BUY", "WAIT")).astype(object)
+        signal[~self.trading_hours(bars)] = "WAIT"
+        custom_sl = np.where(confirmed_sell, sell_sl, np.where(confirmed, buy_sl, 0.0))
+        return self.signal_frame(bars, signal, price, atr=atr, custom_sl=custom_sl)
@@ -1,6 +1,8 @@
-from .base import BaseStrategy
+from .base import BaseStrategy, lag
 from config.settings import Config
 from utils.indicators import Indicators
+from utils.bar_series import BarSeries
+import numpy as np
 import datetime
 
 class TripleConfluenceStrategy(BaseStrategy):
@@ -10,26 +12,28 @@ class TripleConfluenceStrategy(BaseStrategy):
     2. Value: Bollinger Bands (20, 2)
     3. Momentum: RSI (14)
     """
+    REQUIRED_INDICATORS = ('ema_trend', 'bb_upper', 'bb_lower', 'rsi', 'pattern')
+
     def __init__(self, bot_instance):
         self.bot = bot_instance
 
     def analyze(self, df):
         if df is None: return "WAIT", "No Data", {}
+        bars = BarSeries.wrap(df)
 
         # Select Candle based on Config
         row_index = -1 if Config.USE_REALTIME_CANDLE else -2 
         
-        prev = df.iloc[row_index]
-        price_close = prev['close']
+        price_close = bars.at('close', row_index)
         
         # Indicators
-        ema_200 = prev['ema_trend']  # Ensure EMA_TREND is 200 in settings
-        bb_upper = prev['bb_upper']
-        bb_lower = prev['bb_lower']
-        rsi = prev['rsi']
+        ema_200 = bars.at('ema_trend', row_index)  # Ensure EMA_TREND is 200 in settings
+        bb_upper = bars.at('bb_upper', row_index)
+        bb_lower = bars.at('bb_lower', row_index)
+        rsi = bars.at('rsi', row_index)
         
         # Candlestick Pattern check on the signal candle
-        pattern = Indicators.check_candlestick_pattern(df, row_index)
+        pattern = Indicators.check_candlestick_pattern(bars, row_index)
         
         signal = "WAIT"
         status_detail = "WAIT"
@@ -49,9 +53,9 @@ class TripleConfluenceStrategy(BaseStrategy):
         is_downtrend = price_close < ema_200
         
         # 2. & 3. Value and Momentum (Bollinger Bands Check)
-        lookback_window = df.iloc[row_index-4 : row_index+1] # Last 5 relative to row_index
-        touched_lower = any(lookback_window['low'] <= lookback_window['bb_lower'])
-        touched_upper = any(lookback_window['high'] >= lookback_window['bb_upper'])
+        window = slice(row_index-4, row_index+1) # Last 5 relative to row_index
+        touched_lower = bool(np.any(bars['low'][window] <= bars['bb_lower'][window]))
+        touched_upper = bool(np.any(bars['high'][window] >= bars['bb_upper'][window]))
 
         
         # Check Trading Hours
@@ -106,3 +110,41 @@ class TripleConfluenceStrategy(BaseStrategy):
             status_detail = f"⚪ TRPL | T:{trend_str} | BB:{bb_str} | RSI:{rsi:.1f}"
 
         return signal, status_detail, extra_data
+
+    def signals(self, df, mtf_trend=None):
+        """Vectorized analyze() over the whole frame (see BaseStrategy.signals)"""
+        bars = BarSeries.wrap(df)
+        n = len(bars)
+        k = self.signal_offset()
+        price_close = lag(bars['close'], k)
+        ema_200 = lag(bars['ema_trend'], k)
+        rsi = lag(bars['rsi'], k)
+        pattern = lag(bars['pattern'], k)
+        mtf = self.mtf_array(mtf_trend, n)
+
+        # BB touch in the 5 bars ending at the signal bar.
+        # Same slice as analyze(): slice(row_index-4, row_index+1) is empty in realtime mode.
+        touched_lower = np.zeros(n, dtype=bool)
+        touched_upper = np.zeros(n, dtype=bool)
+        if k == 1:
+            lower_hits = np.cumsum(bars['low'] <= bars['bb_lower'])
+            upper_hits = np.cumsum(bars['high'] >= bars['bb_upper'])
+            for hits, touched in ((lower_hits, touched_lower), (upper_hits, touched_upper)):
+                window = hits - lag(hits, 5)
+                window[:5] = hits[:5]
+                touched[:] = lag(window > 0, 1)
+
+        with np.errstate(invalid='ignore'):
+            is_uptrend = price_close > ema_200
+            is_downtrend = price_close < ema_200
+            buy_setup = is_uptrend & touched_lower & (rsi > 40)
+            sell_setup = ~buy_setup & is_downtrend & touched_upper & (rsi < 60)
+        codes = Indicators.PATTERN_NAMES.index
+        bull_pattern = np.isin(pattern, [codes("BULLISH_PINBAR"), codes("BULLISH_ENGULFING")])
+        bear_pattern = np.isin(pattern, [codes("BEARISH_PINBAR"), codes("BEARISH_ENGULFING")])
+        buy = buy_setup & np.isin(mtf, ["UP", "READY", "Unknown"]) & bull_pattern
+        sell = sell_setup & np.isin(mtf, ["DOWN", "READY", "Unknown"]) & bear_pattern
+
+        signal = np.where(buy, "BUY", np.where(sell, "SELL", "WAIT")).astype(object)
+        signal[~self.trading_hours(bars)] = "SLEEP"
+        return self.signal_frame(bars, signal, price_close)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Project root on the path, so tests import config / utils / strategies like main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
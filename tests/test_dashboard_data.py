@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.dashboard_data import IncrementalCSVLoader
+from utils.data_tool import MARKET_COLUMNS, append_market_bars
+
+
+def market_bars(start, n):
+    times = pd.date_range('2025-01-06', periods=start + n, freq='15min')[start:]
+    close = 2000 + np.arange(start, start + n) / 10
+    return pd.DataFrame({'time': times, 'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+                         'tick_volume': 100, 'spread': 20})[MARKET_COLUMNS]
+
+
+def touch(path):
+    # A new mtime even when two writes land in the same clock tick
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def assert_same_as_file(frame, path):
+    pd.testing.assert_frame_equal(frame, pd.read_csv(path, parse_dates=['time']))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'export_market_data.csv')
+
+
+def test_append_parses_only_new_rows(path):
+    market_bars(0, 200).to_csv(path, index=False)
+    loader = IncrementalCSVLoader(path, parse_dates=['time'])
+    loader.load()
+
+    market_bars(200, 10).to_csv(path, mode='a', header=False, index=False)
+    touch(path)
+    assert_same_as_file(loader.load(), path)
+    assert loader.stats == {'full_loads': 1, 'incremental_loads': 1, 'cache_hits': 0, 'rows_appended': 10}
+
+    assert loader.load() is loader.frame
+    assert loader.stats['cache_hits'] == 1
+
+
+def test_half_written_row_waits_for_its_newline(path):
+    market_bars(0, 50).to_csv(path, index=False)
+    loader = IncrementalCSVLoader(path, parse_dates=['time'])
+    loader.load()
+
+    row = market_bars(50, 1).to_csv(header=False, index=False)
+    with open(path, 'a') as f:
+        f.write(row[:10])
+    touch(path)
+    assert len(loader.load()) == 50
+    with open(path, 'a') as f:
+        f.write(row[10:])
+    touch(path)
+    assert_same_as_file(loader.load(), path)
+    assert loader.stats['full_loads'] == 1
+
+
+def test_rewrite_reloads(path):
+    market_bars(0, 200).to_csv(path, index=False)
+    loader = IncrementalCSVLoader(path, parse_dates=['time'])
+    loader.load()
+
+    # Rolling window: the head moves, the file grows
+    market_bars(5, 210).to_csv(path, index=False)
+    touch(path)
+    assert_same_as_file(loader.load(), path)
+    assert loader.stats['full_loads'] == 2 and loader.stats['incremental_loads'] == 0
+
+
+def test_truncation_reloads(path):
+    market_bars(0, 200).to_csv(path, index=False)
+    loader = IncrementalCSVLoader(path, parse_dates=['time'])
+    loader.load()
+
+    market_bars(0, 150).to_csv(path, index=False)
+    touch(path)
+    assert_same_as_file(loader.load(), path)
+    assert loader.stats['full_loads'] == 2
+
+    os.remove(path)
+    assert loader.load() is None
+
+
+def test_concurrent_loads_see_every_row_once(path, monkeypatch):
+    market_bars(0, 100).to_csv(path, index=False)
+    loader = IncrementalCSVLoader(path, parse_dates=['time'])
+    loader.load()
+    parse = loader._parse
+
+    def slow_parse(raw, header):
+        time.sleep(0.002)  # Widens the window between reading the new bytes and moving the offset
+        return parse(raw, header)
+    monkeypatch.setattr(loader, '_parse', slow_parse)
+    sessions = 8
+    barrier = threading.Barrier(sessions + 1)
+    frames = []
+
+    def session():
+        for _ in range(20):
+            barrier.wait()  # Writer appended
+            frames.append(loader.load())
+            barrier.wait()  # Everyone loaded
+
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for i in range(20):
+        market_bars(100 + 5 * i, 5).to_csv(path, mode='a', header=False, index=False)
+        touch(path)
+        barrier.wait()
+        barrier.wait()
+    for thread in threads:
+        thread.join()
+
+    assert_same_as_file(loader.frame, path)
+    assert loader.stats['incremental_loads'] == 20 and loader.stats['rows_appended'] == 100
+    assert all(len(frame) >= 100 for frame in frames)
+
+
+def test_market_export_appends(path):
+    # Three dashboard refreshes over a rolling 200-bar fetch
+    loader = IncrementalCSVLoader(path, parse_dates=['time'])
+    assert append_market_bars(market_bars(0, 200), path) == 200
+    loader.load()
+    assert append_market_bars(market_bars(3, 200), path) == 3
+    touch(path)
+    loader.load()
+    assert append_market_bars(market_bars(3, 200), path) == 0
+    touch(path)
+
+    assert_same_as_file(loader.load(), path)
+    pd.testing.assert_frame_equal(loader.frame, market_bars(0, 203))
+    assert loader.stats['full_loads'] == 1 and loader.stats['rows_appended'] == 3
+
+
+def test_market_export_rewrites_after_a_gap(path):
+    append_market_bars(market_bars(0, 200), path)
+    assert append_market_bars(market_bars(300, 200), path) == 200
+    pd.testing.assert_frame_equal(pd.read_csv(path, parse_dates=['time']), market_bars(300, 200))
+
+    # A cut-short last row is not appended to either
+    with open(path, 'a') as f:
+        f.write('2025-01-')
+    assert append_market_bars(market_bars(300, 210), path) == 210
+    pd.testing.assert_frame_equal(pd.read_csv(path, parse_dates=['time']), market_bars(300, 210))
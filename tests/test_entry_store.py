@@ -0,0 +1,123 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils.entry_store
+from app.bot import XAUUSDBot
+from utils.entry_store import MIGRATIONS, SCHEMA_VERSION, EntryStore
+
+ENTRY_TIME = pd.Timestamp('2025-01-06 10:15:00')
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'entry_log.sqlite')
+
+
+def on_disk(path):
+    """Rows another process would see (a fresh store has nothing queued)"""
+    return EntryStore(path).load()
+
+
+def append(store, ticket, **indicators):
+    store.append(ticket, "BUY", 2000.5 + ticket, "Signal Confirmed", indicators, strategy="MACD_RSI",
+                 symbol="XAUUSD", entry_time=ENTRY_TIME + pd.Timedelta(minutes=ticket), sl=1995.0, tp=0.0)
+
+
+def user_version(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_round_trip(path):
+    store = EntryStore(path)
+    append(store, 1, rsi=np.float64(54.6), mtf_trend="UP")
+    append(store, 2, rsi=float('nan'), atr=1.25)  # New indicator column; NaN -> NULL
+    assert store.flush() == 2
+
+    entries = store.load()
+    assert list(entries['ticket']) == [1, 2]
+    assert entries['time'].tolist() == [ENTRY_TIME + pd.Timedelta(minutes=1), ENTRY_TIME + pd.Timedelta(minutes=2)]
+    assert entries['ind_rsi'].dtype == np.float64 and entries['ind_rsi'].iloc[0] == 54.6
+    assert np.isnan(entries['ind_rsi'].iloc[1])
+    assert entries['ind_mtf_trend'].iloc[0] == "UP" and pd.isna(entries['ind_mtf_trend'].iloc[1])
+    assert np.isnan(entries['ind_atr'].iloc[0]) and entries['ind_atr'].iloc[1] == 1.25
+    assert entries['sl'].tolist() == [1995.0, 1995.0]
+    assert entries['tp'].isna().all()  # 0 = no TP
+    assert list(store.load(strategy="OTHER")['ticket']) == []
+
+
+def test_flush_on_batch_size(path):
+    store = EntryStore(path, batch_size=3)
+    append(store, 1)
+    append(store, 2)
+    assert len(on_disk(path)) == 0
+    append(store, 3)
+    assert list(on_disk(path)['ticket']) == [1, 2, 3]
+    assert store.pending == []
+
+
+def test_flush_on_age(path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(utils.entry_store.time, 'time', lambda: clock[0])
+    store = EntryStore(path, batch_size=20, flush_seconds=60)
+    append(store, 1)
+    clock[0] += 30
+    append(store, 2)
+    store.flush_if_due()
+    assert len(on_disk(path)) == 0
+    clock[0] += 30  # The oldest row is now 60 s old
+    store.flush_if_due()
+    assert list(on_disk(path)['ticket']) == [1, 2]
+
+
+def test_failed_flush_keeps_rows(path, monkeypatch):
+    store = EntryStore(path)
+    append(store, 1)
+    monkeypatch.setattr(store, '_connect', lambda: sqlite3.connect('file:missing?mode=ro', uri=True))
+    assert store.flush() == 0
+    assert len(store.pending) == 1
+    monkeypatch.undo()
+    assert store.flush() == 1
+    assert list(on_disk(path)['ticket']) == [1]
+
+
+def test_new_database_has_current_schema(path):
+    store = EntryStore(path)
+    append(store, 1)
+    store.flush()
+    assert user_version(path) == SCHEMA_VERSION
+
+
+def test_v1_database_is_migrated(path):
+    with sqlite3.connect(path) as conn:
+        for statement in MIGRATIONS[1]:
+            conn.execute(statement)
+        conn.execute("INSERT INTO entries VALUES ('2024-12-31 09:00:00', 7, 'XAUUSD', 'MACD_RSI', 'SELL', 2010.0, '')")
+        conn.execute("PRAGMA user_version = 1")
+
+    store = EntryStore(path)
+    append(store, 1)
+    entries = store.load()
+    assert user_version(path) == SCHEMA_VERSION
+    assert list(entries['ticket']) == [7, 1]
+    assert np.isnan(entries['sl'].iloc[0]) and entries['sl'].iloc[1] == 1995.0
+
+
+def test_newer_schema_is_refused(path):
+    with sqlite3.connect(path) as conn:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    with pytest.raises(RuntimeError):
+        EntryStore(path).load()
+
+
+def test_bot_writes_each_fill(path):
+    bot = XAUUSDBot.__new__(XAUUSDBot)  # Only what save_entry_log() reads
+    bot.entry_store = EntryStore(path, batch_size=20, flush_seconds=60)
+    bot.strategy_name = "MACD_RSI"
+    bot.symbol = "XAUUSD"
+    bot.save_entry_log(42, "BUY", 2001.0, "Signal Confirmed", {'rsi': 55.0}, sl=1995.0, tp=2010.0)
+    entries = on_disk(path)
+    assert list(entries['ticket']) == [42] and entries['ind_rsi'].iloc[0] == 55.0
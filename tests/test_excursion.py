@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.settings import Config
+from utils.excursion import build_trades, excursions
+
+T0 = pd.Timestamp('2026-03-02 10:00')
+M15 = pd.Timedelta(minutes=15)
+
+
+def make_bars():
+    """M15 bars around 2000; bar 0 dips to 1990 before the fill at 10:05"""
+    rows = [  # open, high, low, close
+        (2000, 2001, 1990, 2000),  # 10:00 fill bar (dip happened before the fill)
+        (2000, 2003, 1998, 2002),  # 10:15
+        (2002, 2006, 2001, 2005),  # 10:30
+        (2005, 2009, 2004, 2008),  # 10:45 exit bar
+        (2008, 2050, 1950, 2000),  # 11:00 after the exit
+    ]
+    bars = pd.DataFrame(rows, columns=['open', 'high', 'low', 'close'], dtype=float)
+    bars.insert(0, 'time', [T0 + i * M15 for i in range(len(rows))])
+    return bars
+
+
+def make_entries(*rows):
+    return pd.DataFrame(list(rows), columns=['time', 'ticket', 'symbol', 'strategy', 'side', 'price', 'sl', 'tp'])
+
+
+def closed(*positions):
+    return pd.DataFrame([{'time': t, 'position': ticket, 'profit': 1.0} for ticket, t in positions])
+
+
+def test_fill_bar_before_the_fill_is_not_counted():
+    entries = make_entries((T0 + pd.Timedelta(minutes=5), 1, Config.SYMBOL, 'SMC', 'BUY', 2000.0, 1995.0, 2010.0))
+    trades = closed((1, T0 + 3 * M15 + pd.Timedelta(minutes=5)))
+    result = excursions(build_trades(entries, trades), make_bars(), be_percent=0.5, lock_percent=0.8)
+
+    row = result.iloc[0]
+    assert row['mae'] == pytest.approx(2.0)  # 10:15 low 1998, not the 1990 dip at 10:00
+    assert row['mfe'] == pytest.approx(9.0)  # Exit bar high 2009, nothing after it
+    assert row['mae_sl'] == pytest.approx(0.4)
+    assert row['reached_be'] and row['minutes_to_be'] == pytest.approx(25.0)    # +5 at 10:30
+    assert row['reached_lock'] and row['minutes_to_lock'] == pytest.approx(40.0)  # +8 at 10:45
+
+
+def test_other_symbols_and_open_trades_are_left_out():
+    entries = make_entries(
+        (T0 + pd.Timedelta(minutes=5), 1, Config.SYMBOL, 'SMC', 'BUY', 2000.0, 1995.0, 2010.0),
+        (T0 + pd.Timedelta(minutes=5), 2, 'BTCUSD', 'BTC_RSI_EMA', 'BUY', 65000.0, 64000.0, 66000.0),
+        (T0 + pd.Timedelta(minutes=5), 3, None, 'BTC_RSI_EMA', 'SELL', 65000.0, 66000.0, 64000.0),  # Legacy import
+        (T0 + pd.Timedelta(minutes=5), 4, None, 'SMC', 'SELL', 2000.0, 2005.0, 1990.0),             # Legacy import
+        (T0 + pd.Timedelta(minutes=20), 5, Config.SYMBOL, 'SMC', 'BUY', 2002.0, 1995.0, 2010.0),    # Still open
+        (T0 + pd.Timedelta(minutes=20), 6, Config.SYMBOL, 'SMC', 'BUY', 2002.0, 1995.0, 2010.0),    # Closed in its fill bar
+    )
+    trades = closed(*[(ticket, T0 + 3 * M15 + pd.Timedelta(minutes=5)) for ticket in (1, 2, 3, 4)],
+                    (6, T0 + pd.Timedelta(minutes=25)))
+    table = build_trades(entries, trades, symbol=Config.SYMBOL)
+    assert sorted(table['ticket']) == [1, 4, 5, 6]
+
+    result = excursions(table, make_bars())
+    assert sorted(result['ticket']) == [1, 4]
+    assert np.all(result['mae'] < 10) and np.all(result['mfe'] < 10)
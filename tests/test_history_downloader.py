@@ -0,0 +1,113 @@
+import calendar
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from config import timeframes as tf
+from utils.data_tool import HistoryDownloader
+
+RATE_DTYPE = [('time', 'i8'), ('open', 'f8'), ('high', 'f8'), ('low', 'f8'), ('close', 'f8'),
+              ('tick_volume', 'i8'), ('spread', 'i4'), ('real_volume', 'i8')]
+
+START = datetime(2024, 1, 1)  # Monday
+GAP_START = datetime(2024, 1, 17, 10)  # 2 hours of missing M15 bars
+GAP_END = datetime(2024, 1, 17, 12)
+
+
+def unix(dt):
+    return calendar.timegm(dt.timetuple())
+
+
+class FakeTerminal:
+    """copy_rates_range over a Mon-Fri M15 calendar with one gap; `fail_after` windows then None"""
+    def __init__(self, fail_after=None):
+        t = np.arange(unix(START), unix(START + timedelta(days=120)), 900, dtype=np.int64)
+        weekday = (t // 86400 + 3) % 7  # 0 = Monday
+        keep = (weekday < 5) & ~((t >= unix(GAP_START)) & (t < unix(GAP_END)))
+        self.times = t[keep]
+        self.fail_after = fail_after
+        self.requests = []
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        if self.fail_after is not None and len(self.requests) >= self.fail_after:
+            return None
+        self.requests.append((date_from, date_to))
+        t = self.times[(self.times >= unix(date_from)) & (self.times <= unix(date_to))]
+        rates = np.zeros(len(t), dtype=RATE_DTYPE)
+        rates['time'] = t
+        rates['open'] = rates['high'] = rates['low'] = rates['close'] = 2000.0 + (t % 1000) / 100
+        return rates
+
+    def last_error(self):
+        return (-1, 'fake failure')
+
+
+def make_downloader(tmp_path, terminal):
+    return HistoryDownloader(symbol='XAUUSD', timeframe=tf.TIMEFRAME_M15, terminal=terminal,
+                             window_days=7, data_dir=str(tmp_path), max_retries=1, retry_delay=0)
+
+
+def expected_times(terminal, date_from, date_to):
+    t = terminal.times
+    return t[(t >= unix(date_from)) & (t <= unix(date_to))]
+
+
+def written_times(df):
+    return df['time'].values.astype('datetime64[s]').astype(np.int64)
+
+
+def test_download_dedups_window_edges(tmp_path):
+    terminal = FakeTerminal()
+    date_to = START + timedelta(days=40)
+    df = make_downloader(tmp_path, terminal).download(START, date_to)
+
+    np.testing.assert_array_equal(written_times(df), expected_times(terminal, START, date_to))
+    assert len(terminal.requests) == 6
+
+
+def test_resume_on_a_later_day_keeps_progress(tmp_path):
+    # First run dies after 3 windows
+    failing = FakeTerminal(fail_after=3)
+    with pytest.raises(RuntimeError):
+        make_downloader(tmp_path, failing).download(START, START + timedelta(days=60))
+    output_path = make_downloader(tmp_path, failing).output_path
+    assert os.path.exists(output_path)
+
+    # Retried the next day: range shifted by one day
+    terminal = FakeTerminal()
+    date_from, date_to = START + timedelta(days=1), START + timedelta(days=61)
+    df = make_downloader(tmp_path, terminal).download(date_from, date_to)
+
+    assert terminal.requests[0][0] == START + timedelta(days=21)  # Resumed from next_from
+    np.testing.assert_array_equal(written_times(df), expected_times(terminal, START, date_to))
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.csv')] == [os.path.basename(output_path)]
+
+
+def test_range_not_covered_sets_old_output_aside(tmp_path):
+    make_downloader(tmp_path, FakeTerminal()).download(START + timedelta(days=10), START + timedelta(days=20))
+
+    terminal = FakeTerminal()
+    date_to = START + timedelta(days=20)
+    df = make_downloader(tmp_path, terminal).download(START, date_to)
+
+    np.testing.assert_array_equal(written_times(df), expected_times(terminal, START, date_to))
+    assert len([name for name in os.listdir(tmp_path) if name.endswith('.csv')]) == 2
+
+
+def test_find_gaps_skips_weekends(tmp_path):
+    downloader = make_downloader(tmp_path, FakeTerminal())
+    df = downloader.download(START, START + timedelta(days=30))
+    gaps = downloader.find_gaps(df)
+
+    assert len(gaps) == 1
+    gap = gaps.iloc[0]
+    assert gap['gap_start'] == GAP_START - timedelta(minutes=15)
+    assert gap['gap_end'] == GAP_END
+    assert gap['missing_bars'] == 8
+
+
+def test_unsupported_timeframe_raises(tmp_path):
+    with pytest.raises(ValueError):
+        HistoryDownloader(symbol='XAUUSD', timeframe=32769, terminal=FakeTerminal(), data_dir=str(tmp_path))
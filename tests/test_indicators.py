@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tests.test_signals_parity import swing_bars
+from utils.indicators import Indicators
+
+RECORDED_BARS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'data', 'export_market_data.csv')
+
+
+def series_atr(df, period):
+    """ATR as computed before the array kernel"""
+    high_low = df['high'] - df['low']
+    high_close = abs(df['high'] - df['close'].shift())
+    low_close = abs(df['low'] - df['close'].shift())
+    return np.fmax(np.fmax(high_low, high_close), low_close).rolling(window=period).mean()
+
+
+def series_adx(df, period, atr=None):
+    """ADX as computed before the array kernel"""
+    high = df['high']
+    low = df['low']
+    close = df['close']
+    plus_dm = high.diff()
+    minus_dm = low.diff()
+    plus_dm[plus_dm < 0] = 0
+    minus_dm[minus_dm > 0] = 0
+    if atr is None:
+        tr1 = pd.DataFrame(high - low)
+        tr2 = pd.DataFrame(abs(high - close.shift(1)))
+        tr3 = pd.DataFrame(abs(low - close.shift(1)))
+        tr = pd.concat([tr1, tr2, tr3], axis=1, join='outer').max(axis=1)
+        atr = tr.rolling(period).mean()
+    plus_di = 100 * (plus_dm.ewm(alpha=1/period).mean() / atr)
+    minus_di = 100 * (abs(minus_dm).ewm(alpha=1/period).mean() / atr)
+    dx = (abs(plus_di - minus_di) / abs(plus_di + minus_di)) * 100
+    adx = ((dx.shift(1) * (period - 1)) + dx) / period
+    return adx.ewm(alpha=1/period).mean()
+
+
+def assert_identical(actual, expected):
+    np.testing.assert_array_equal(np.asarray(actual), np.asarray(expected))
+
+
+@pytest.fixture(params=['recorded', 'swings'])
+def bars(request):
+    if request.param == 'recorded':
+        return pd.read_csv(RECORDED_BARS, parse_dates=['time'])
+    return swing_bars()
+
+
+@pytest.mark.parametrize('period', [5, 14, 20])
+def test_kernel_matches_series_code(bars, period):
+    atr = Indicators.calculate_atr(bars, period)
+    assert_identical(atr, series_atr(bars, period))
+    assert_identical(Indicators.calculate_adx(bars, period), series_adx(bars, period))
+    assert_identical(Indicators.calculate_adx(bars, period, atr=atr), series_adx(bars, period, atr=atr))
+
+
+def test_kernel_matches_series_code_on_panel(bars):
+    # NaN-padded (bars x symbols) panel: the shorter symbol starts later
+    other = swing_bars(seed=3, n=len(bars) // 2)
+    panel = {field: pd.DataFrame({'A': bars[field],
+                                  'B': pd.concat([pd.Series(np.nan, index=range(len(bars) - len(other))),
+                                                  other[field]], ignore_index=True)})
+             for field in ('high', 'low', 'close')}
+    atr = Indicators.calculate_atr(panel, 14)
+    assert_identical(atr, series_atr(panel, 14))
+    assert_identical(Indicators.calculate_adx(panel, 14, atr=atr), series_adx(panel, 14, atr=atr))
+
+
+def test_recurrences_match_pandas_windows():
+    rng = np.random.default_rng(1)
+    values = rng.normal(0, 3, 500)
+    values[rng.random(500) < 0.1] = np.nan
+    values[100:140] = 2.5           # Constant run
+    values[200:300] = np.abs(values[200:300])  # All-positive stretch
+    for period in (1, 3, 14):
+        assert_identical(Indicators._rolling_mean(values, period), pd.Series(values).rolling(period).mean())
+        assert_identical(Indicators._ewm(values, 1 / period), pd.Series(values).ewm(alpha=1 / period).mean())
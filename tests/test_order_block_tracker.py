@@ -0,0 +1,65 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from utils.indicator_graph import IndicatorEngine
+from utils.indicators import Indicators
+from utils.order_block_tracker import OrderBlockTracker
+
+RECORDED_BARS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'data', 'export_market_data.csv')
+WINDOW = 800  # Bars per update(), like the live fetch
+
+
+@pytest.fixture(scope='module')
+def bars():
+    df = pd.read_csv(RECORDED_BARS, parse_dates=['time'])
+    return IndicatorEngine().compute(df, ['atr'])
+
+
+def assert_matches_batch(tracker, window, lookback, max_sl_points, label):
+    expected = Indicators.calculate_order_blocks(window, lookback=lookback, max_sl_points=max_sl_points)
+    assert tracker.order_blocks() == expected, label
+
+
+@pytest.mark.parametrize('lookback, max_sl_points', [(300, 500), (50, 500), (50, 2000)])
+def test_tracker_matches_batch_on_sliding_windows(bars, lookback, max_sl_points):
+    tracker = OrderBlockTracker(lookback=lookback, max_sl_points=max_sl_points)
+    restore_at = len(bars) // 2
+    for L in range(1, len(bars)):
+        window = bars.iloc[max(0, L + 1 - WINDOW):L + 1].reset_index(drop=True)
+        if L % 3 == 0:
+            # Same closed bars, different forming bar (another tick of the same candle)
+            ticked = window.copy()
+            ticked.loc[len(ticked) - 1, 'close'] += 5
+            tracker.update(ticked)
+            assert_matches_batch(tracker, ticked, lookback, max_sl_points, f"tick at bar {L}")
+        if L == restore_at:
+            # Warm restart: state through JSON into a fresh tracker
+            state = json.loads(json.dumps(tracker.snapshot(), default=float))
+            tracker = OrderBlockTracker(lookback=lookback, max_sl_points=max_sl_points)
+            assert tracker.restore(state)
+        tracker.update(window)
+        assert_matches_batch(tracker, window, lookback, max_sl_points, f"bar {L}")
+
+
+def test_restore_rejects_other_settings(bars):
+    tracker = OrderBlockTracker(lookback=300, max_sl_points=500)
+    tracker.update(bars.iloc[:WINDOW])
+    assert not OrderBlockTracker(lookback=50, max_sl_points=500).restore(tracker.snapshot())
+
+
+def test_window_gap_rebuilds(bars):
+    lookback, max_sl_points, size = 300, 2000, 300
+    tracker = OrderBlockTracker(lookback=lookback, max_sl_points=max_sl_points)
+
+    # Each window starts 100 bars after the last bar folded in: the bars in between were never seen
+    for end in range(size, len(bars), size + 100):
+        window = bars.iloc[end - size:end].reset_index(drop=True)
+        if tracker.last_time is not None:
+            assert window['time'].iloc[0].timestamp() > tracker.last_time
+        tracker.update(window)
+        assert tracker.count == size - 1
+        assert_matches_batch(tracker, window, lookback, max_sl_points, f"window ending at {end}")
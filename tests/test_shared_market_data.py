@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+from utils.bar_series import BarSeries
+from utils.shared_market_data import SharedBarBuffer, SharedBars, SharedMarketFeed, consistent, segment_name
+
+COLUMNS = ['time', 'open', 'high', 'low', 'close']
+
+
+def bar_columns(start, n, close=2000.0):
+    times = 1_700_000_000 + 300 * np.arange(start, start + n, dtype=np.float64)
+    prices = close + np.arange(start, start + n, dtype=np.float64)
+    return {'time': times, 'open': prices, 'high': prices + 1, 'low': prices - 1, 'close': prices}
+
+
+@pytest.fixture
+def feed():
+    symbol, timeframe = f"TEST{os.getpid()}", 5
+    buffer = SharedBarBuffer.create(segment_name(symbol, timeframe), capacity=64, columns=COLUMNS)
+    buffer.write(bar_columns(0, 50))
+    reader = SharedMarketFeed(max_age_seconds=60)
+    reader.buffers[(symbol, timeframe)] = buffer  # Same process as the publisher: no attach()
+    yield reader, buffer, symbol, timeframe
+    buffer.close()
+
+
+def test_get_bars_is_zero_copy(feed):
+    reader, buffer, symbol, timeframe = feed
+    bars = reader.get_bars(symbol, timeframe, 20)
+
+    assert isinstance(bars, SharedBars) and len(bars) == 20
+    assert np.shares_memory(bars['close'], buffer.data)
+    np.testing.assert_array_equal(bars['close'], bar_columns(30, 20)['close'])
+    assert bars.time[-1] == np.datetime64(int(bar_columns(49, 1)['time'][0]), 's')
+    assert bars.is_current()
+
+
+def test_consistent_rereads_after_a_publish(feed):
+    reader, buffer, symbol, timeframe = feed
+    bars = reader.get_bars(symbol, timeframe, 20)
+    seen = []
+
+    def use(b):
+        seen.append(b.at('close', -1))
+        if len(seen) == 1:
+            buffer.write(bar_columns(49, 2, close=2100.0))  # Forming bar rewritten + a new bar, mid-read
+        return b.at('close', -1)
+
+    final, result = consistent(bars, use)
+    assert len(seen) == 2
+    assert result == 2100.0 + 50 and final.is_current()
+
+
+def test_consistent_falls_back_to_a_copy(feed):
+    reader, buffer, symbol, timeframe = feed
+    bars = reader.get_bars(symbol, timeframe, 20)
+    calls = []
+
+    def use(b):
+        calls.append(type(b))
+        buffer.write(bar_columns(49 + len(calls), 1))  # Publisher writes during every read
+        return len(calls)
+
+    final, result = consistent(bars, use)
+    assert calls == [SharedBars, SharedBars, BarSeries]
+    assert type(final) is BarSeries and result == 3
+    assert not np.shares_memory(final['close'], buffer.data)
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+import app.bot
+from config.settings import Config
+from strategies.macd_rsi import MACDRSIStrategy
+from strategies.ob_fvg_fibo import OBFVGFiboStrategy
+from tests.test_signals_parity import WINDOW, FakeTerminal, ReplayBot, recorded_bars, swing_bars
+from utils.indicator_graph import IndicatorEngine
+
+BARS = 160  # Bar closes replayed per case
+
+
+class GuardedBot(ReplayBot):
+    """ReplayBot whose open-position guard can be flipped between ticks"""
+    def __init__(self, strategy_cls, config_overrides):
+        super().__init__(strategy_cls, dict(config_overrides))
+        self.positions = False
+
+    def check_open_positions(self):
+        return self.positions
+
+
+def ticks(window, clock, mtf):
+    """(label, window, clock, mtf, open positions) of the loops run while one bar is forming"""
+    flipped = {"UP": "DOWN", "DOWN": "UP"}.get(mtf, "UP")
+    forming = window.copy()
+    last = forming.index[-1]
+    forming.loc[last, 'close'] += 3
+    forming.loc[last, 'high'] = max(forming.loc[last, 'high'], forming.loc[last, 'close'])
+    return [
+        ('first loop', window, clock, mtf, False),
+        ('same loop', window, clock, mtf, False),
+        ('position opened', window, clock, mtf, True),
+        ('mtf flipped', window, clock, flipped, True),
+        ('mtf back', window, clock, mtf, False),
+        ('out of hours', window, clock.replace(hour=23), mtf, False),
+        ('back in hours', window, clock, mtf, False),
+        ('forming bar moved', forming, clock, mtf, False),
+        ('forming bar back', window, clock, mtf, False),
+    ]
+
+
+def set_state(bots, clock, mtf, positions):
+    for bot in bots:
+        bot.clock, bot.mtf, bot.positions = clock, mtf, positions
+
+
+def assert_same(memoized, fresh, label):
+    assert memoized[:2] == fresh[:2], label
+    np.testing.assert_equal(memoized[2], fresh[2], err_msg=label)
+
+
+@pytest.fixture(autouse=True)
+def closed_candle(monkeypatch):
+    monkeypatch.setattr(Config, 'USE_REALTIME_CANDLE', False)
+    monkeypatch.setattr(Config, 'ENABLE_SIGNAL_MEMO', True)
+    monkeypatch.setattr(Config, 'TRADING_START_HOUR', 1)
+    monkeypatch.setattr(Config, 'TRADING_END_HOUR', 22)
+    monkeypatch.setattr(app.bot, 'mt5', FakeTerminal())
+
+
+# start: first replayed bar (a stretch with entries, so the open-position guard is read)
+# Without the OB tracker the order blocks are not part of the memo key: only the settings check sees an override
+@pytest.mark.parametrize('strategy_cls, config_overrides, bars, start, settings, config_change, override_change', [
+    (MACDRSIStrategy, Config.MACD_CONFIG, recorded_bars, -BARS, {},
+     ('ADX_THRESHOLD', 1000), ('MAX_SL_POINTS', 400)),
+    (OBFVGFiboStrategy, Config.SMC_CONFIG, swing_bars, 1640, {},
+     ('TRADING_START_HOUR', 23), ('SMC_LOOKBACK', 30)),
+    (OBFVGFiboStrategy, Config.SMC_CONFIG, swing_bars, 1640, {'ENABLE_OB_TRACKER': False},
+     ('TRADING_START_HOUR', 23), ('MAX_SL_POINTS', 50)),
+], ids=['macd_recorded', 'smc_swings', 'smc_swings_scan'])
+def test_evaluate_matches_analyze(strategy_cls, config_overrides, bars, start, settings, config_change,
+                                  override_change, monkeypatch):
+    for name, value in settings.items():
+        monkeypatch.setattr(Config, name, value)
+    df = bars()
+    memo_bot = GuardedBot(strategy_cls, config_overrides)
+    fresh_bot = GuardedBot(strategy_cls, config_overrides)
+    bots = (memo_bot, fresh_bot)
+    IndicatorEngine().compute(df, memo_bot.strategy)
+    mtf = np.random.default_rng(0).choice(["UP", "DOWN", "READY", "UP"], len(df)).astype(object)
+
+    signals = set()
+    start %= len(df)
+    for L in range(start, start + BARS):
+        window = df.iloc[L - WINDOW + 1:L + 1]
+        clock = window['time'].iloc[-1].to_pydatetime()
+        for label, bars_now, clock_now, mtf_now, positions in ticks(window, clock, mtf[L]):
+            set_state(bots, clock_now, mtf_now, positions)
+            fresh = fresh_bot.strategy.analyze(bars_now)
+            assert_same(memo_bot.strategy.evaluate(bars_now), fresh, f"bar {L}: {label}")
+            signals.add(fresh[0])
+
+        # Settings changed while the bar is still forming, then put back
+        set_state(bots, clock, mtf[L], False)
+        name, value = config_change
+        saved = getattr(Config, name)
+        for label, setting in (('setting changed', value), ('setting restored', saved)):
+            monkeypatch.setattr(Config, name, setting)
+            assert_same(memo_bot.strategy.evaluate(window), fresh_bot.strategy.analyze(window), f"bar {L}: {label}")
+        name, value = override_change
+        saved = fresh_bot.config_overrides.get(name)
+        for label, setting in (('override changed', value), ('override restored', saved)):
+            for bot in bots:
+                bot.config_overrides[name] = setting
+            assert_same(memo_bot.strategy.evaluate(window), fresh_bot.strategy.analyze(window), f"bar {L}: {label}")
+
+    memo = memo_bot.strategy.signal_memo
+    assert memo.hits > BARS  # 'same loop', 'mtf back', 'back in hours', 'forming bar back' reuse the decision
+    assert memo.misses > BARS
+    assert {"BUY", "SELL"} & signals  # The open-position guard was read by at least one decision
@@ -0,0 +1,141 @@
+import os
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app.bot
+from app.bot import XAUUSDBot
+from config.settings import Config
+from strategies.macd_rsi import MACDRSIStrategy
+from strategies.ob_fvg_fibo import OBFVGFiboStrategy
+from strategies.triple_confluence import TripleConfluenceStrategy
+from utils.indicator_graph import IndicatorEngine
+
+RECORDED_BARS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'data', 'export_market_data.csv')
+WINDOW = 800  # Bars handed to analyze(), like the live fetch
+
+
+def recorded_bars():
+    return pd.read_csv(RECORDED_BARS, parse_dates=['time'])
+
+
+def swing_bars(seed=9, n=2400, vol=0.6):
+    """M5 random walk with drifting legs near 2000: order blocks / gaps tight enough for SMC entries"""
+    rng = np.random.default_rng(seed)
+    drift = np.repeat(rng.normal(0, 0.15, n // 200 + 1), 200)[:n]
+    close = 2000 + np.cumsum(drift + rng.normal(0, vol, n))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, vol * 0.6, n))
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, vol * 0.6, n))
+    return pd.DataFrame({'time': pd.date_range('2025-01-06', periods=n, freq='5min'),
+                         'open': open_, 'high': high, 'low': low, 'close': close,
+                         'tick_volume': 100, 'spread': 20})
+
+
+class FakeTerminal:
+    """What execute_trade() reads from the terminal: the tick (bid = ask = signal price), no positions"""
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    TRADE_RETCODE_DONE = 10009
+
+    def __init__(self):
+        self.price = 0.0
+
+    def symbol_info_tick(self, symbol):
+        return types.SimpleNamespace(bid=self.price, ask=self.price, time=0)
+
+    def positions_get(self, **kwargs):
+        return ()
+
+
+class RecordingExecutor:
+    """Order template + send() that keeps the SL / TP instead of placing the order"""
+    def __init__(self):
+        self.sent = []
+
+    def template(self, symbol):
+        return types.SimpleNamespace(point=0.01)
+
+    def send(self, symbol, order_type, volume, sl=None, tp=None, **kwargs):
+        self.sent.append((sl, tp))
+        return None
+
+
+class ReplayBot(XAUUSDBot):
+    """XAUUSDBot settings + execute_trade() on a bar clock, without a terminal connection"""
+    def __init__(self, strategy_cls, config_overrides):
+        self.symbol = Config.SYMBOL
+        self.symbol_overrides = {}
+        self.config_overrides = config_overrides
+        self.magic_number = Config.MAGIC_NUM
+        self.last_error_time = 0
+        self.last_trade_candle_time = None
+        self.state = None
+        self.order_executor = RecordingExecutor()
+        self.clock = None
+        self.mtf = None
+        self.strategy = strategy_cls(self)
+
+    def get_server_time(self):
+        return self.clock
+
+    def get_mtf_trend(self):
+        return self.mtf
+
+    def check_open_positions(self):
+        return False
+
+    def get_dynamic_lot_size(self, sl_points=0, symbol_info=None):
+        return 0.01
+
+
+def replay(strategy_cls, config_overrides, df, terminal):
+    """Returns (signals() frame, [(L, signal, sl, tp)] of analyze() on every window + execute_trade())"""
+    bot = ReplayBot(strategy_cls, config_overrides)
+    IndicatorEngine().compute(df, bot.strategy)
+    mtf = np.random.default_rng(0).choice(["UP", "DOWN", "READY", "UP"], len(df)).astype(object)
+    expected = bot.strategy.signals(df, mtf_trend=mtf)
+
+    decisions = []
+    for L in range(WINDOW - 1, len(df)):
+        window = df.iloc[L - WINDOW + 1:L + 1]
+        bot.clock = window['time'].iloc[-1].to_pydatetime()
+        bot.mtf = mtf[L]
+        signal, _, extra = bot.strategy.analyze(window)
+        sl = tp = np.nan
+        if signal in ("BUY", "SELL"):
+            terminal.price = extra['price']
+            bot.last_error_time = 0
+            bot.execute_trade(signal, atr=extra.get('atr', 0), custom_sl=extra.get('custom_sl', 0.0))
+            sl, tp = bot.order_executor.sent.pop()
+        decisions.append((L, signal, sl, tp))
+    return expected, decisions
+
+
+@pytest.fixture(params=[False, True], ids=['closed_candle', 'realtime_candle'])
+def terminal(request, monkeypatch):
+    monkeypatch.setattr(Config, 'USE_REALTIME_CANDLE', request.param)
+    fake = FakeTerminal()
+    monkeypatch.setattr(app.bot, 'mt5', fake)
+    return fake
+
+
+@pytest.mark.parametrize('strategy_cls, config_overrides, bars', [
+    (MACDRSIStrategy, Config.MACD_CONFIG, recorded_bars),
+    (TripleConfluenceStrategy, {}, recorded_bars),
+    (OBFVGFiboStrategy, Config.SMC_CONFIG, recorded_bars),
+    (OBFVGFiboStrategy, Config.SMC_CONFIG, swing_bars),
+], ids=['macd_recorded', 'triple_recorded', 'smc_recorded', 'smc_swings'])
+def test_signals_match_analyze(strategy_cls, config_overrides, bars, terminal):
+    df = bars()
+    expected, decisions = replay(strategy_cls, config_overrides, df, terminal)
+
+    for L, signal, sl, tp in decisions:
+        row = expected.iloc[L]
+        assert signal == row['signal'], f"bar {L}"
+        np.testing.assert_equal((sl, tp), (row['sl'], row['tp']), err_msg=f"bar {L}")
+    if bars is swing_bars:
+        assert {"BUY", "SELL"} <= {signal for _, signal, _, _ in decisions}  # Entry branches reached
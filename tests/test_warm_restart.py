@@ -0,0 +1,97 @@
+import types
+
+import pandas as pd
+import pytest
+
+import app.bot
+from app.bot import XAUUSDBot
+from config.settings import Config
+from strategies.macd_rsi import MACDRSIStrategy
+from utils.state_journal import StateJournal
+
+CANDLE = pd.Timestamp('2026-03-02 10:15')
+NAME = 'XAUUSD_test'
+
+
+class Crash(BaseException):
+    """Process dies (not an Exception: execute_trade must not swallow it)"""
+
+
+class FakeTerminal:
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    TRADE_RETCODE_DONE = 10009
+
+    def symbol_info_tick(self, symbol):
+        return types.SimpleNamespace(bid=2000.0, ask=2000.0, time=0)
+
+    def positions_get(self, **kwargs):
+        return ()
+
+
+class Executor:
+    """send(): `outcome` = 'crash' (filled, then the process dies before returning) or a retcode"""
+    def __init__(self, outcome):
+        self.outcome = outcome
+        self.fills = 0
+
+    def template(self, symbol):
+        return types.SimpleNamespace(point=0.01)
+
+    def send(self, symbol, order_type, volume, **kwargs):
+        if self.outcome == 'crash':
+            self.fills += 1
+            raise Crash()
+        return types.SimpleNamespace(retcode=self.outcome, comment='rejected', order=0, price=0.0)
+
+
+class JournaledBot(XAUUSDBot):
+    """XAUUSDBot state handling (remember / restore_state / execute_trade) on a journal in tmp_path"""
+    def __init__(self, directory, outcome=None):
+        self.symbol = Config.SYMBOL
+        self.symbol_overrides = {}
+        self.config_overrides = {}
+        self.strategy_name = 'MACD_RSI'
+        self.strategy = MACDRSIStrategy(self)
+        self.magic_number = Config.MAGIC_NUM
+        self.last_error_time = 0
+        self.last_trade_candle_time = None
+        self.partially_closed_tickets = set()
+        self.server_time_offset = 0
+        self.history_synced_until = None
+        self.mtf_resampler = None
+        self.snapshot = None
+        self.order_executor = Executor(outcome)
+        self.state = StateJournal(NAME, directory=directory)
+        self.restore_state()
+
+    def check_open_positions(self):
+        return False
+
+    def get_dynamic_lot_size(self, sl_points=0, symbol_info=None):
+        return 0.01
+
+
+@pytest.fixture(autouse=True)
+def terminal(monkeypatch):
+    monkeypatch.setattr(app.bot, 'mt5', FakeTerminal())
+
+
+def test_crash_after_fill_keeps_the_candle_guard(tmp_path):
+    bot = JournaledBot(str(tmp_path), outcome='crash')
+    with pytest.raises(Crash):
+        bot.execute_trade("BUY", candle_time=CANDLE)
+    assert bot.order_executor.fills == 1
+
+    restarted = JournaledBot(str(tmp_path))
+    assert restarted.last_trade_candle_time == CANDLE  # process_market_data skips this candle
+
+
+def test_rejected_order_clears_the_candle_guard(tmp_path):
+    bot = JournaledBot(str(tmp_path), outcome=10027)
+    bot.execute_trade("BUY", candle_time=CANDLE)
+    assert bot.last_trade_candle_time is None
+
+    restarted = JournaledBot(str(tmp_path))
+    assert restarted.last_trade_candle_time is None
+    assert restarted.last_error_time > 0
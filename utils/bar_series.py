@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+
+class BarSeries:
+    """
+    Struct-of-arrays view of bars: one contiguous float64 NumPy array per column.
+    - `bars['close']` -> ndarray (no copy)
+    - `bars.at('close', -2)` -> scalar in O(1), no Series allocation
+    - `bars.frame` / `to_frame()` -> DataFrame view for logging and the dashboard
+    """
+    __slots__ = ('columns', 'time', '_frame')
+
+    def __init__(self, columns, time=None, frame=None):
+        self.columns = columns  # {name: float64 ndarray}, all the same length
+        self.time = time        # datetime64[ns] ndarray (or None)
+        self._frame = frame
+
+    @classmethod
+    def from_frame(cls, df):
+        columns = {}
+        time = None
+        for name in df.columns:
+            col = df[name]
+            if name == 'time':
+                time = col.to_numpy(dtype='datetime64[ns]')
+            elif pd.api.types.is_numeric_dtype(col.dtype):
+                columns[name] = np.ascontiguousarray(col.to_numpy(dtype=np.float64, na_value=np.nan))
+        return cls(columns, time=time, frame=df)
+
+    @classmethod
+    def wrap(cls, data):
+        """Returns `data` unchanged if it is already a BarSeries, else converts a DataFrame"""
+        if data is None or isinstance(data, BarSeries):
+            return data
+        return cls.from_frame(data)
+
+    # --- Access ---
+    def __len__(self):
+        if self.time is not None:
+            return len(self.time)
+        for values in self.columns.values():
+            return len(values)
+        return 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def at(self, name, i):
+        """Scalar value of column `name` at position `i` (negative positions allowed)"""
+        return self.columns[name][i]
+
+    def time_at(self, i):
+        return pd.Timestamp(self.time[i])
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def slice(self, start=None, stop=None):
+        """Positional slice sharing memory with this series (like df.iloc[start:stop])"""
+        s = slice(start, stop)
+        time = self.time[s] if self.time is not None else None
+        return BarSeries({name: values[s] for name, values in self.columns.items()}, time=time)
+
+    def tail(self, n):
+        return self.slice(-n if n > 0 else len(self), None)
+
+    # --- DataFrame view ---
+    @property
+    def frame(self):
+        return self.to_frame()
+
+    def to_frame(self):
+        if self._frame is None:
+            data = {}
+            if self.time is not None:
+                data['time'] = self.time
+            data.update(self.columns)
+            self._frame = pd.DataFrame(data)
+        return self._frame
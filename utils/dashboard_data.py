@@ -0,0 +1,135 @@
+import io
+import os
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+
+# Bytes hashed at the start of a file / before the last read offset to detect rewrites
+FINGERPRINT_BYTES = 64 * 1024
+
+
+class IncrementalCSVLoader:
+    """
+    Keeps a CSV in memory and only parses rows appended since the last load.
+    - Fingerprint = (size, mtime_ns). Unchanged fingerprint -> cached frame, no I/O.
+    - File grew and the already-read prefix is intact -> parse only the new bytes.
+    - Anything else (rewrite, truncation) -> full reload. The market export is append-only
+      (data_tool.append_market_bars), so this stays the rare path.
+    - load() holds a lock: one loader is shared by every dashboard session (st.cache_resource).
+    """
+    def __init__(self, path, parse_dates=None):
+        self.path = path
+        self.parse_dates = parse_dates or []
+        self.frame = None
+        self.columns = None
+        self.fingerprint = None
+        self.offset = 0            # Bytes consumed (always ends on a line boundary)
+        self.prefix_hash = None    # Hash of the file head when last read
+        self.tail_hash = None      # Hash of the bytes just before `offset`
+        self.stats = {'full_loads': 0, 'incremental_loads': 0, 'cache_hits': 0, 'rows_appended': 0}
+        self.lock = threading.Lock()
+
+    def _hash_range(self, f, start, length):
+        f.seek(max(start, 0))
+        return hashlib.md5(f.read(length)).hexdigest()
+
+    def _parse(self, raw, header):
+        if header:
+            df = pd.read_csv(io.BytesIO(raw))
+        else:
+            df = pd.read_csv(io.BytesIO(raw), header=None, names=self.columns)
+        for col in self.parse_dates:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col])
+        return df
+
+    def _remember(self, f):
+        self.prefix_hash = self._hash_range(f, 0, min(FINGERPRINT_BYTES, self.offset))
+        tail_len = min(FINGERPRINT_BYTES, self.offset)
+        self.tail_hash = self._hash_range(f, self.offset - tail_len, tail_len)
+
+    def _full_load(self, f):
+        f.seek(0)  # The prefix check may have moved the position
+        raw = f.read()
+        end = raw.rfind(b'\n') + 1  # A half-written last line is picked up on the next load
+        if end == 0:
+            end = len(raw)
+        self.frame = self._parse(raw[:end], header=True)
+        self.columns = list(self.frame.columns)
+        self.offset = end
+        self._remember(f)
+        self.stats['full_loads'] += 1
+
+    def _prefix_intact(self, f):
+        if self.prefix_hash is None:
+            return False
+        if self._hash_range(f, 0, min(FINGERPRINT_BYTES, self.offset)) != self.prefix_hash:
+            return False
+        tail_len = min(FINGERPRINT_BYTES, self.offset)
+        return self._hash_range(f, self.offset - tail_len, tail_len) == self.tail_hash
+
+    def load(self):
+        """Returns the up-to-date frame, or None if the file does not exist"""
+        with self.lock:
+            return self._load()
+
+    def _load(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self.frame = None
+            self.fingerprint = None
+            return None
+
+        fingerprint = (st.st_size, st.st_mtime_ns)
+        if fingerprint == self.fingerprint and self.frame is not None:
+            self.stats['cache_hits'] += 1
+            return self.frame
+
+        with open(self.path, mode='rb') as f:
+            if self.frame is not None and st.st_size >= self.offset and self._prefix_intact(f):
+                f.seek(self.offset)
+                raw = f.read()
+                end = raw.rfind(b'\n') + 1
+                if end > 0:
+                    new_rows = self._parse(raw[:end], header=False)
+                    self.frame = pd.concat([self.frame, new_rows], ignore_index=True)
+                    self.offset += end
+                    self._remember(f)
+                    self.stats['incremental_loads'] += 1
+                    self.stats['rows_appended'] += len(new_rows)
+            else:
+                self._full_load(f)
+
+        self.fingerprint = fingerprint
+        return self.frame
+
+
+def classify_trades(df):
+    """Vectorized TP / BR / WIN / SL / BE classification (same rules as the old row-wise version)"""
+    profit = df['profit'].to_numpy(dtype=float)
+    comment = df['comment'].astype(str).str.lower()
+    has_tp = comment.str.contains('tp', regex=False).to_numpy()
+    has_sl = comment.str.contains('sl', regex=False).to_numpy()
+
+    conditions = [
+        (profit > 0) & has_tp,
+        (profit > 0) & has_sl,
+        profit > 0,
+        profit < 0,
+    ]
+    choices = ['TP 🎯', 'BR 🛡️', 'WIN ✅', 'SL ❌']
+    return np.select(conditions, choices, default='BE ➖')
+
+
+def load_trades(loader):
+    """Trade history with derived columns (cumulative profit, date)"""
+    trades = loader.load()
+    if trades is None:
+        return None
+    trades = trades.copy()
+    if not trades.empty:
+        trades['cumulative_profit'] = trades['profit'].cumsum()
+        trades['date'] = trades['time'].dt.date
+    return trades
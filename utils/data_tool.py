@@ -1,7 +1,9 @@
-import MetaTrader5 as mt5
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import logging
+import json
+import time
 import sys
 import os
 
@@ -9,6 +11,8 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.settings import Config
+from utils.mt5_gateway import terminal as mt5
+from utils.resampler import TIMEFRAME_SECONDS
 
 # Setup Basic Logging
 logging.basicConfig(
@@ -60,7 +64,9 @@ def export_trade_history(days=365):
                         'commission': deal.commission,
                         'swap': deal.swap,
                         'profit': deal.profit,
-                        'comment': deal.comment
+                        'comment': deal.comment,
+                        'position': deal.position_id, # Joins fill_log.csv ticket (utils/fill_quality.py)
+                        'magic': deal.magic
                     })
 
             
@@ -82,8 +88,47 @@ def export_trade_history(days=365):
     except Exception as e:
         logging.error(f"Error export_trade_history: {e}")
 
+MARKET_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'tick_volume', 'spread']
+
+def last_exported_time(filename, columns=MARKET_COLUMNS):
+    """Time of the last complete row of an exported CSV, or None if it can't be appended to"""
+    try:
+        with open(filename, mode='rb') as f:
+            if f.readline().decode().strip().split(',') != columns:
+                return None
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 4096))
+            lines = f.read().split(b'\n')
+    except (FileNotFoundError, UnicodeDecodeError):
+        return None
+    # Rows end with a newline: the piece after the last one is empty unless a write was cut short
+    if len(lines) < 3 or lines[-1]:
+        return None
+    try:
+        return pd.Timestamp(lines[-2].split(b',', 1)[0].decode())
+    except ValueError:
+        return None
+
+def append_market_bars(df, filename):
+    """
+    Appends closed bars newer than the file's last row, so earlier rows never change and the
+    dashboard loader parses only the new ones. The file is written from scratch when it is
+    missing or unreadable, or when `df` no longer reaches back to its last row (a gap).
+    Returns the number of bars written.
+    """
+    last_time = last_exported_time(filename)
+    if last_time is None or df.empty or df['time'].iloc[0] > last_time:
+        df.to_csv(filename, index=False)
+        return len(df)
+    df = df[df['time'] > last_time]
+    df.to_csv(filename, mode='a', header=False, index=False)
+    return len(df)
+
 def export_market_data(days=30):
-    """Exports Candle Data (OHLC) for Backtesting"""
+    """
+    Exports Candle Data (OHLC) for Backtesting.
+    Closed candles only, appended to the existing file: `days` bounds the fetch, not the file.
+    """
     try:
         if not connect_mt5(): return
         
@@ -93,14 +138,15 @@ def export_market_data(days=30):
         
         logging.info(f"⏳ Fetching Market Data ({days} days)...")
         
-        rates = mt5.copy_rates_from_pos(Config.SYMBOL, Config.TIMEFRAME, 0, count)
+        # Position 1: skip the forming candle (it would be frozen half-built in an append-only file)
+        rates = mt5.copy_rates_from_pos(Config.SYMBOL, Config.TIMEFRAME, 1, count)
         
         if rates is not None:
             df = pd.DataFrame(rates)
             df['time'] = pd.to_datetime(df['time'], unit='s')
             
             # Select columns for backtest
-            df = df[['time', 'open', 'high', 'low', 'close', 'tick_volume', 'spread']]
+            df = df[MARKET_COLUMNS]
             
             # Ensure data dir exists
             data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
@@ -108,8 +154,8 @@ def export_market_data(days=30):
                 os.makedirs(data_dir)
             
             filename = os.path.join(data_dir, 'export_market_data.csv')
-            df.to_csv(filename, index=False)
-            logging.info(f"✅ Market Data saved to: {filename} ({len(df)} candles)")
+            written = append_market_bars(df, filename)
+            logging.info(f"✅ Market Data saved to: {filename} ({written} new candles)")
             return df
         else:
             logging.warning("❌ No market data found.")
@@ -118,13 +164,236 @@ def export_market_data(days=30):
     except Exception as e:
         logging.error(f"Error export_market_data: {e}")
 
+# MT5 timeframe constants -> bar length in seconds
+WEEK_SECONDS = 7 * 86400
+WEEKEND_START = 5 * 86400   # Saturday 00:00 measured from Monday 00:00
+EPOCH_TO_MONDAY = 3 * 86400 # 1970-01-01 was a Thursday
+
+
+def weekend_seconds_before(t):
+    """Cumulative weekend (Sat+Sun) seconds from the epoch up to unix time(s) t"""
+    t_mon = np.asarray(t, dtype=np.int64) + EPOCH_TO_MONDAY
+    weeks, rem = np.divmod(t_mon, WEEK_SECONDS)
+    return weeks * (WEEK_SECONDS - WEEKEND_START) + np.maximum(rem - WEEKEND_START, 0)
+
+
+class HistoryDownloader:
+    """
+    Downloads long-range history by walking `copy_rates_range` over fixed-size windows.
+    - Progress is checkpointed after every window, so a failed run resumes where it stopped.
+    - Bars are deduplicated on bar time (window edges overlap by design).
+    - `terminal` can be any object exposing `copy_rates_range` / `last_error` (e.g. a fake for tests).
+    """
+    def __init__(self, symbol=None, timeframe=None, terminal=None, window_days=30,
+                 data_dir=None, max_retries=3, retry_delay=2.0):
+        self.symbol = symbol or Config.SYMBOL
+        self.timeframe = timeframe if timeframe is not None else Config.TIMEFRAME
+        self.terminal = terminal if terminal is not None else mt5
+        self.window = timedelta(days=window_days)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        if self.timeframe not in TIMEFRAME_SECONDS:
+            raise ValueError(f"Unsupported timeframe for history download: {self.timeframe}")
+        self.tf_seconds = TIMEFRAME_SECONDS[self.timeframe]
+
+        if data_dir is None:
+            data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+        self.data_dir = data_dir
+        base_name = f"history_{self.symbol}_{self.tf_seconds // 60}m"
+        self.output_path = os.path.join(data_dir, base_name + '.csv')
+        self.checkpoint_path = os.path.join(data_dir, base_name + '.checkpoint.json')
+
+        self.last_time = None  # Newest bar time already written (unix seconds)
+        self.stats = {'bars': 0, 'windows': 0, 'duplicates': 0, 'seconds': 0.0}
+
+    # --- Checkpoint ---
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, mode='r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"⚠️ Ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+            return None
+
+    def save_checkpoint(self, date_from, date_to, next_from, completed=False):
+        state = {
+            'symbol': self.symbol,
+            'timeframe': self.timeframe,
+            'date_from': date_from.isoformat(),
+            'date_to': date_to.isoformat(),
+            'next_from': next_from.isoformat(),
+            'last_time': self.last_time,
+            'completed': completed,
+        }
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, mode='w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    # --- Fetch ---
+    def fetch_window(self, start, end):
+        """Fetches one window with bounded retries. Returns a structured array (possibly empty)."""
+        for attempt in range(self.max_retries):
+            rates = self.terminal.copy_rates_range(self.symbol, self.timeframe, start, end)
+            if rates is not None:
+                return rates
+            logging.warning(
+                f"⚠️ copy_rates_range failed for {start} -> {end} "
+                f"(Attempt {attempt + 1}/{self.max_retries}): {self.terminal.last_error()}"
+            )
+            if attempt < self.max_retries - 1:
+                time.sleep(self.retry_delay)
+        raise RuntimeError(f"copy_rates_range failed for window {start} -> {end}")
+
+    def append_bars(self, rates):
+        """Appends bars newer than the last written bar. Returns the number of new bars."""
+        if rates is None or len(rates) == 0:
+            return 0
+
+        df = pd.DataFrame(rates)
+        df = df.drop_duplicates(subset='time').sort_values('time')
+        if self.last_time is not None:
+            fresh = df['time'] > self.last_time
+            self.stats['duplicates'] += int((~fresh).sum())
+            df = df[fresh]
+        if df.empty:
+            return 0
+
+        self.last_time = int(df['time'].iloc[-1])
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        df = df[['time', 'open', 'high', 'low', 'close', 'tick_volume', 'spread']]
+
+        write_header = not os.path.exists(self.output_path)
+        df.to_csv(self.output_path, mode='a', header=write_header, index=False)
+        return len(df)
+
+    def set_aside_output(self):
+        """Renames an output file that can't be resumed (kept next to the new download)"""
+        stale_path = self.output_path[:-len('.csv')] + f".{datetime.now():%Y%m%d_%H%M%S}.csv"
+        os.replace(self.output_path, stale_path)
+        logging.warning(f"⚠️ Existing history can't be resumed, moved to {stale_path}")
+
+    def download(self, date_from, date_to=None):
+        """
+        Downloads [date_from, date_to] window by window.
+        A checkpoint of the same symbol / timeframe that starts at or before `date_from`
+        is resumed from its `next_from` (its own `date_from` is kept and `date_to` is
+        extended), so a retry on a later day keeps the bars already written.
+        Any other existing output is set aside, never deleted.
+        """
+        if date_to is None:
+            date_to = datetime.now()
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+
+        start = date_from
+        checkpoint = self.load_checkpoint()
+        if (checkpoint and checkpoint.get('symbol') == self.symbol
+                and checkpoint.get('timeframe') == self.timeframe
+                and datetime.fromisoformat(checkpoint['date_from']) <= date_from
+                and os.path.exists(self.output_path)):
+            date_from = datetime.fromisoformat(checkpoint['date_from'])
+            date_to = max(date_to, datetime.fromisoformat(checkpoint['date_to']))
+            start = datetime.fromisoformat(checkpoint['next_from'])
+            self.last_time = checkpoint.get('last_time')
+            logging.info(f"♻️ Resuming {self.symbol} history from {start} (checkpoint from {date_from})")
+        elif os.path.exists(self.output_path):
+            # Requested range not covered by the checkpoint: start over
+            self.set_aside_output()
+
+        t0 = time.perf_counter()
+        while start < date_to:
+            end = min(start + self.window, date_to)
+            w0 = time.perf_counter()
+            rates = self.fetch_window(start, end)
+            added = self.append_bars(rates)
+            elapsed = time.perf_counter() - w0
+
+            self.stats['bars'] += added
+            self.stats['windows'] += 1
+            self.save_checkpoint(date_from, date_to, end)
+            logging.info(
+                f"📥 {self.symbol} {start:%Y-%m-%d} -> {end:%Y-%m-%d}: {added} bars "
+                f"({added / elapsed if elapsed > 0 else 0:,.0f} bars/s)"
+            )
+            start = end
+
+        self.stats['seconds'] = time.perf_counter() - t0
+        self.save_checkpoint(date_from, date_to, date_to, completed=True)
+        logging.info(
+            f"✅ History Download Done: {self.stats['bars']} bars in {self.stats['windows']} windows, "
+            f"{self.stats['duplicates']} duplicates dropped | {self.throughput():,.0f} bars/s"
+        )
+        return self.load()
+
+    def throughput(self):
+        """Bars per second over the whole run"""
+        if self.stats['seconds'] <= 0:
+            return 0.0
+        return self.stats['bars'] / self.stats['seconds']
+
+    def load(self):
+        if not os.path.exists(self.output_path):
+            return None
+        df = pd.read_csv(self.output_path, parse_dates=['time'])
+        return df.drop_duplicates(subset='time').sort_values('time').reset_index(drop=True)
+
+    # --- Gap Detection ---
+    def find_gaps(self, df, max_break_minutes=65):
+        """
+        Detects missing bars against a Mon-Fri trading calendar.
+        Weekend closures are not gaps, and short breaks up to `max_break_minutes`
+        (daily maintenance/rollover) are tolerated.
+        Returns a DataFrame of (gap_start, gap_end, missing_bars).
+        """
+        if df is None or len(df) < 2:
+            return pd.DataFrame(columns=['gap_start', 'gap_end', 'missing_bars'])
+
+        t = df['time'].values.astype('datetime64[s]').astype(np.int64)
+        prev_t, next_t = t[:-1], t[1:]
+        trading_seconds = (next_t - prev_t) - (weekend_seconds_before(next_t) - weekend_seconds_before(prev_t))
+        missing = trading_seconds // self.tf_seconds - 1
+        tolerated = max(max_break_minutes * 60 // self.tf_seconds, 0)
+
+        mask = missing > tolerated
+        return pd.DataFrame({
+            'gap_start': pd.to_datetime(prev_t[mask], unit='s'),
+            'gap_end': pd.to_datetime(next_t[mask], unit='s'),
+            'missing_bars': missing[mask],
+        })
+
+
+def export_market_history(days=365, window_days=30, timeframe=None):
+    """Downloads long-range market history in resumable chunks and reports gaps"""
+    try:
+        if not connect_mt5(): return
+
+        downloader = HistoryDownloader(timeframe=timeframe, window_days=window_days)
+        date_to = datetime.now()
+        date_from = datetime(date_to.year, date_to.month, date_to.day) - timedelta(days=days)
+        df = downloader.download(date_from, date_to)
+
+        gaps = downloader.find_gaps(df)
+        if not gaps.empty:
+            logging.warning(f"⚠️ Found {len(gaps)} gaps ({int(gaps['missing_bars'].sum())} missing bars)")
+            for row in gaps.head(10).itertuples():
+                logging.warning(f"   {row.gap_start} -> {row.gap_end}: {row.missing_bars} bars")
+        logging.info(f"✅ Market History saved to: {downloader.output_path}")
+        return df
+
+    except Exception as e:
+        logging.error(f"Error export_market_history: {e}")
+
 if __name__ == "__main__":
     print("--- MT5 Data Exporter ---")
     print("1. Export Trade History (Profit/Loss)")
     print("2. Export Market Data (Price for Backtest)")
     print("3. Export Both")
+    print("4. Download Long History (Chunked, Resumable)")
     
-    choice = input("Select (1-3): ")
+    choice = input("Select (1-4): ")
     
     if choice == '1':
         export_trade_history(days=365) # 1 Year
@@ -133,5 +402,8 @@ if __name__ == "__main__":
     elif choice == '3':
         export_trade_history()
         export_market_data()
+    elif choice == '4':
+        export_market_history(days=365 * 2) # 2 Years
     
+    mt5.log_report()
     mt5.shutdown()
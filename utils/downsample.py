@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+
+def bucket_edges(n, n_buckets):
+    """Start index of each of `n_buckets` near-equal buckets over n points"""
+    n_buckets = max(1, min(n_buckets, n))
+    return np.linspace(0, n, n_buckets + 1).astype(np.int64)[:-1]
+
+
+def downsample_ohlc(df, max_candles=1500):
+    """
+    Min/max per pixel bucket for candles: each bucket keeps first open, max high,
+    min low and last close, so every wick extreme survives the downsampling.
+    """
+    n = len(df)
+    if n <= max_candles:
+        return df
+
+    starts = bucket_edges(n, max_candles)
+    ends = np.append(starts[1:], n) - 1
+
+    return pd.DataFrame({
+        'time': df['time'].to_numpy()[starts],
+        'open': df['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(), starts),
+        'close': df['close'].to_numpy()[ends],
+    })
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: picks `n_out` indices that preserve the visual
+    shape of a line. First and last points are always kept.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Inner buckets (first/last point are their own buckets)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average point of the next bucket (or the last point)
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            avg_x = x[nlo:nhi].mean()
+            avg_y = y[nlo:nhi].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a]) -
+            (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def downsample_line(df, x_col, y_col, max_points=2000):
+    """LTTB downsampling of a line series (e.g. equity curve)"""
+    if len(df) <= max_points:
+        return df
+    x = df[x_col]
+    x_num = x.astype('int64').to_numpy() if pd.api.types.is_datetime64_any_dtype(x) else x.to_numpy()
+    idx = lttb_indices(x_num, df[y_col].to_numpy(), max_points)
+    return df.iloc[idx]
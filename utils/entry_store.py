@@ -0,0 +1,245 @@
+import atexit
+import csv
+import logging
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from numbers import Number
+
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+ENTRY_DB_PATH = os.path.join(DATA_DIR, 'entry_log.sqlite')
+LEGACY_CSV_PATH = os.path.join(DATA_DIR, 'entry_log.csv')
+
+# PRAGMA user_version of the database. Bump + add a step to MIGRATIONS when the layout changes.
+SCHEMA_VERSION = 2
+
+BASE_COLUMNS = ['time', 'ticket', 'symbol', 'strategy', 'side', 'price', 'reason', 'sl', 'tp']
+INDICATOR_PREFIX = 'ind_'  # Indicator `rsi` -> column `ind_rsi` (REAL, or TEXT for labels like mtf_trend)
+
+MIGRATIONS = {
+    1: [
+        """CREATE TABLE IF NOT EXISTS entries (
+            time TEXT NOT NULL,
+            ticket INTEGER PRIMARY KEY,
+            symbol TEXT,
+            strategy TEXT,
+            side TEXT,
+            price REAL,
+            reason TEXT
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_entries_strategy_time ON entries (strategy, time)",
+    ],
+    2: [
+        # Initial SL/TP (excursion analysis measures MAE/MFE against them)
+        "ALTER TABLE entries ADD COLUMN sl REAL",
+        "ALTER TABLE entries ADD COLUMN tp REAL",
+    ],
+}
+
+
+def indicator_column(name):
+    """Safe SQL column name for an indicator key"""
+    return INDICATOR_PREFIX + re.sub(r'\W', '_', str(name)).lower()
+
+
+def to_typed(value):
+    """float for numbers (NumPy scalars included), str for labels, None for missing"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, Number):
+        value = float(value)
+        return None if math.isnan(value) else value
+    return str(value)
+
+
+class EntryStore:
+    """
+    Entry log as typed rows in SQLite (data/entry_log.sqlite).
+    - One column per indicator (ind_rsi, ind_atr, ...): REAL for numbers, TEXT for
+      labels. New indicator keys add a column; older rows read as NULL.
+    - Schema version in PRAGMA user_version, upgraded step by step on open
+    - append() only queues; rows are written in one transaction when `batch_size`
+      rows are waiting, when flush_if_due() finds the oldest row older than
+      `flush_seconds`, or on flush() / interpreter exit. A crash (no atexit) loses
+      the queued rows: up to `batch_size` rows or `flush_seconds` of records.
+      The bots flush right after each fill, so only bulk writes (legacy import)
+      and rows kept after a failed flush (retried by flush_if_due) ever wait.
+    - load() -> DataFrame of every entry in one query
+    """
+    def __init__(self, path=ENTRY_DB_PATH, batch_size=20, flush_seconds=60):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.pending = []
+        self.pending_since = None
+        self.columns = None  # {column: SQL type} of the entries table
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            conn.close()
+            raise RuntimeError(f"{self.path} has schema v{version}, this code knows v{SCHEMA_VERSION}")
+        if version < SCHEMA_VERSION:
+            with conn:
+                for step in range(version + 1, SCHEMA_VERSION + 1):
+                    for statement in MIGRATIONS[step]:
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            logging.info(f"🗄️ Entry Log schema v{version} -> v{SCHEMA_VERSION}")
+        # Re-read every time: the other bot may have added indicator columns
+        self.columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(entries)")}
+        return conn
+
+    def append(self, ticket, signal, price, reason="", indicators=None, strategy="", symbol=None, entry_time=None,
+               sl=None, tp=None):
+        row = {
+            'time': (entry_time or pd.Timestamp.now()).strftime('%Y-%m-%d %H:%M:%S'),
+            'ticket': int(ticket),
+            'symbol': symbol,
+            'strategy': strategy,
+            'side': signal,
+            'price': to_typed(price),
+            'reason': reason,
+            'sl': to_typed(sl) or None,
+            'tp': to_typed(tp) or None,
+        }
+        for name, value in (indicators or {}).items():
+            row[indicator_column(name)] = to_typed(value)
+        with self._lock:
+            if not self.pending:
+                self.pending_since = time.time()
+            self.pending.append(row)
+            full = len(self.pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush_if_due(self):
+        if self.pending and time.time() - self.pending_since >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Writes every queued row in one transaction"""
+        with self._lock:
+            rows, self.pending = self.pending, []
+            if not rows:
+                return 0
+            try:
+                conn = self._connect()
+                try:
+                    with conn:
+                        self._add_columns(conn, rows)
+                        names = list(dict.fromkeys(name for row in rows for name in row))
+                        sql = (f"INSERT OR REPLACE INTO entries ({', '.join(names)}) "
+                               f"VALUES ({', '.join('?' * len(names))})")
+                        conn.executemany(sql, [tuple(row.get(name) for name in names) for row in rows])
+                finally:
+                    conn.close()
+            except Exception as e:
+                logging.error(f"Save Entry Log Error: {e}")
+                self.pending = rows + self.pending  # Keep them for the next flush
+                return 0
+            return len(rows)
+
+    def _add_columns(self, conn, rows):
+        for row in rows:
+            for name, value in row.items():
+                if name not in self.columns:
+                    sql_type = 'TEXT' if isinstance(value, str) else 'REAL'
+                    conn.execute(f"ALTER TABLE entries ADD COLUMN {name} {sql_type}")
+                    self.columns[name] = sql_type
+
+    def load(self, strategy=None):
+        """Every entry (optionally one strategy) as a DataFrame; indicator columns are float64 / object"""
+        self.flush()
+        if not os.path.isfile(self.path):
+            return pd.DataFrame(columns=BASE_COLUMNS)
+        conn = self._connect()
+        try:
+            if strategy is None:
+                return pd.read_sql_query("SELECT * FROM entries ORDER BY time", conn, parse_dates=['time'])
+            return pd.read_sql_query("SELECT * FROM entries WHERE strategy = ? ORDER BY time", conn,
+                                     params=(strategy,), parse_dates=['time'])
+        finally:
+            conn.close()
+
+    def import_legacy_csv(self, path=LEGACY_CSV_PATH):
+        """
+        One-off import of the old entry_log.csv (Indicators = "rsi: np.float64(54.6) | ...").
+        Safe to run twice: rows are keyed by ticket.
+        """
+        if not os.path.isfile(path):
+            return 0
+        count = 0
+        with open(path, mode='r', encoding='utf-8-sig', newline='') as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            for row in reader:
+                if len(row) < 7:
+                    continue
+                entry_time, ticket, strategy, side, price, reason, ind_str = row[:7]
+                try:
+                    self.append(int(ticket), side, float(price), reason, parse_legacy_indicators(ind_str),
+                                strategy=strategy, entry_time=pd.Timestamp(entry_time))
+                    count += 1
+                except ValueError:
+                    logging.warning(f"Legacy Entry Log: skipped row {row[:2]}")
+        self.flush()
+        return count
+
+
+_NUMBER_WRAPPER = re.compile(r'^np\.\w+\((.*)\)$')
+_COMPACT_PAIR = re.compile(r'([A-Za-z_]\w*):(-?[\d.]+)')
+_COMPACT_NAMES = {'rsi': 'rsi', 'ema': 'ema_trend'}  # BOT-BTC wrote "RSI:54.1 EMA:50000.0"
+
+
+def _legacy_value(text):
+    text = text.strip()
+    match = _NUMBER_WRAPPER.match(text)
+    if match:
+        text = match.group(1)
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def parse_legacy_indicators(text):
+    """Old Indicators column -> {name: float | str}"""
+    indicators = {}
+    text = (text or "").strip()
+    if not text:
+        return indicators
+    if ': ' not in text:
+        for name, value in _COMPACT_PAIR.findall(text):
+            indicators[_COMPACT_NAMES.get(name.lower(), name.lower())] = float(value)
+        return indicators
+    for part in text.split(' | '):
+        name, sep, value = part.partition(': ')
+        if sep:
+            indicators[name.strip()] = _legacy_value(value)
+    return indicators
+
+
+if __name__ == "__main__":
+    # Set default encoding for stdout to handle emojis
+    if sys.stdout.encoding != 'utf-8':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    store = EntryStore()
+    imported = store.import_legacy_csv()
+    print(f"✅ Imported {imported} legacy entries from {LEGACY_CSV_PATH} -> {ENTRY_DB_PATH}")
+    entries = store.load()
+    print(f"📊 {len(entries)} entries | columns: {', '.join(entries.columns)}")
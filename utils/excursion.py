@@ -0,0 +1,207 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Config
+from utils.entry_store import EntryStore
+from utils.fill_quality import load_fills
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+# Rows imported from the old entry_log.csv carry no symbol. BOT-BTC wrote its rows into the
+# same file as BTC_RSI_EMA; every other row came from the XAUUSD bot (Config.SYMBOL).
+LEGACY_STRATEGY_SYMBOLS = {'BTC_RSI_EMA': 'BTCUSD'}
+
+
+class SparseTable:
+    """
+    Range maximum over a fixed array: O(n log n) build, O(1) per query.
+    query(left, right) takes arrays of inclusive bounds and answers them all at once.
+    """
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        levels = [values]
+        span = 1
+        while span * 2 <= len(values):
+            prev = levels[-1]
+            levels.append(np.maximum(prev[:-span], prev[span:]))
+            span *= 2
+        # Level k holds max(values[i : i + 2**k]); pad to one 2-D table for fancy indexing
+        self.table = np.full((len(levels), len(values)), -np.inf)
+        for k, level in enumerate(levels):
+            self.table[k, :len(level)] = level
+
+    def query(self, left, right):
+        left = np.asarray(left, dtype=np.int64)
+        right = np.asarray(right, dtype=np.int64)
+        k = np.frexp((right - left + 1).astype(np.float64))[1] - 1  # floor(log2(length))
+        return np.maximum(self.table[k, left], self.table[k, right - (1 << k) + 1])
+
+
+def _first_reach(table, start, stop, target):
+    """First index j in [start, stop] with max(values[start..j]) >= target (-1 if never), by vectorized bisection"""
+    reached = table.query(start, stop) >= target
+    lo, hi = start.copy(), stop.copy()
+    while True:
+        active = reached & (lo < hi)
+        if not active.any():
+            break
+        mid = (lo + hi) // 2
+        hit = table.query(start, mid) >= target
+        hi = np.where(active & hit, mid, hi)
+        lo = np.where(active & ~hit, mid + 1, lo)
+    return np.where(reached, lo, -1)
+
+
+def entry_symbols(entries):
+    """Symbol of every entry-log row (legacy rows without one: by strategy, else Config.SYMBOL)"""
+    legacy = entries['strategy'].map(LEGACY_STRATEGY_SYMBOLS).fillna(Config.SYMBOL)
+    return entries['symbol'].where(entries['symbol'].notna(), legacy)
+
+
+def build_trades(entries, trades=None, fills=None, offset_hours=0, symbol=None):
+    """
+    One row per position: entry (entry log, with server-time fill time/price from the fill
+    log when present) + exit (last OUT deal of the position in the trade history export).
+    `symbol`: only that symbol's entries (the symbol of the bar archive they are measured on).
+    `offset_hours` shifts entry-log / trade-history times (local clock) onto bar time (server clock).
+    """
+    if symbol is not None:
+        entries = entries[(entry_symbols(entries) == symbol).to_numpy()]
+    df = entries.rename(columns={'time': 'entry_time', 'price': 'entry_price'})
+    df = df[['ticket', 'strategy', 'side', 'entry_time', 'entry_price', 'sl', 'tp']].copy()
+    df['entry_time'] = df['entry_time'].astype('datetime64[ns]') + pd.Timedelta(hours=offset_hours)
+
+    if fills is not None and not fills.empty:
+        fill = fills.drop_duplicates('ticket', keep='last').set_index('ticket')
+        matched = df['ticket'].map(fill['time'].astype('datetime64[ns]'))
+        df['entry_time'] = matched.fillna(df['entry_time'])
+        df['entry_price'] = df['ticket'].map(fill['fill_price']).fillna(df['entry_price'])
+
+    df['exit_time'] = pd.NaT
+    df['profit'] = np.nan
+    if trades is not None and not trades.empty and 'position' in trades:
+        money = trades[['profit'] + [c for c in ('commission', 'swap') if c in trades]].sum(axis=1)
+        closed = pd.DataFrame({
+            'exit_time': trades.groupby('position')['time'].max().astype('datetime64[ns]') + pd.Timedelta(hours=offset_hours),
+            'profit': money.groupby(trades['position']).sum(),
+        })
+        df['exit_time'] = df['ticket'].map(closed['exit_time'])
+        df['profit'] = df['ticket'].map(closed['profit'])
+    return df.sort_values('entry_time').reset_index(drop=True)
+
+
+def excursions(trades, bars, be_percent=0.5, lock_percent=0.8, default_tp=None):
+    """
+    MAE / MFE (price distance, >= 0) for every closed trade over the bars it was open, plus
+    time to reach `be_percent` / `lock_percent` of the TP distance.
+    - First bar: the first one opening at or after the fill (the fill bar's range before the
+      fill is not the position's). Last bar: the one containing the exit (SL / TP touch included)
+    - Left out: trades without a matched exit (still open, or missing from the trade export),
+      trades closed before the next bar opened (use finer bars, e.g. M1, to measure those)
+      and trades outside the bars
+    - mae_sl = MAE / SL distance, mfe_tp = MFE / TP distance (`default_tp` when no TP was set)
+    """
+    bars = bars.sort_values('time').reset_index(drop=True)
+    bar_time = bars['time'].to_numpy(dtype='datetime64[ns]')
+    high = SparseTable(bars['high'].to_numpy())
+    neg_low = SparseTable(-bars['low'].to_numpy())
+
+    df = trades[trades['exit_time'].notna()].reset_index(drop=True)
+    entry_time = df['entry_time'].to_numpy(dtype='datetime64[ns]')
+    exit_time = df['exit_time'].to_numpy(dtype='datetime64[ns]')
+    start = np.searchsorted(bar_time, entry_time, side='left')     # First bar opened at / after the fill
+    stop = np.searchsorted(bar_time, exit_time, side='right') - 1  # As-of: bar containing the exit
+    # Exits after the archive's last bar can't be measured (as-of would pin them to it)
+    bar_step = np.median(np.diff(bar_time)) if len(bar_time) > 1 else np.timedelta64(0, 'ns')
+    inside = exit_time < bar_time[-1] + bar_step
+    valid = (start < len(bar_time)) & (stop >= start) & inside
+    df = df[valid].reset_index(drop=True)
+    start, stop = start[valid], stop[valid]
+
+    buy = (df['side'] == 'BUY').to_numpy()
+    entry = df['entry_price'].to_numpy(dtype=np.float64)
+    top = high.query(start, stop)
+    bottom = -neg_low.query(start, stop)
+    df['mfe'] = np.maximum(np.where(buy, top - entry, entry - bottom), 0.0)
+    df['mae'] = np.maximum(np.where(buy, entry - bottom, top - entry), 0.0)
+
+    tp = df['tp'].to_numpy(dtype=np.float64)
+    sl = df['sl'].to_numpy(dtype=np.float64)
+    tp_dist = np.abs(tp - entry)
+    if default_tp is not None:
+        tp_dist = np.where(np.isnan(tp_dist) | (tp_dist == 0), default_tp, tp_dist)
+    sl_dist = np.abs(entry - sl)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['mae_sl'] = df['mae'] / np.where(sl_dist > 0, sl_dist, np.nan)
+        df['mfe_tp'] = df['mfe'] / np.where(tp_dist > 0, tp_dist, np.nan)
+
+    for name, percent in (('be', be_percent), ('lock', lock_percent)):
+        distance = percent * tp_dist
+        # BUY: high >= entry + d  |  SELL: -low >= -(entry - d)
+        hit_buy = _first_reach(high, start, stop, entry + distance)
+        hit_sell = _first_reach(neg_low, start, stop, distance - entry)
+        hit = np.where(np.isnan(distance), -1, np.where(buy, hit_buy, hit_sell))
+        reached = hit >= 0
+        hit_time = bar_time[np.where(reached, hit, 0)]
+        minutes = (hit_time - df['entry_time'].to_numpy(dtype='datetime64[ns]')) / np.timedelta64(1, 'm')
+        df[f'reached_{name}'] = reached
+        df[f'minutes_to_{name}'] = np.where(reached, minutes, np.nan)
+    return df
+
+
+def excursion_summary(df, by='strategy'):
+    """Per-strategy distribution of MAE (in SL units), MFE (in TP units) and BE / lock timing"""
+    grouped = df.groupby(by)
+    summary = pd.DataFrame({
+        'trades': grouped.size(),
+        'mae_sl_p50': grouped['mae_sl'].quantile(0.5),
+        'mae_sl_p75': grouped['mae_sl'].quantile(0.75),
+        'mae_sl_p90': grouped['mae_sl'].quantile(0.9),
+        'mfe_tp_p25': grouped['mfe_tp'].quantile(0.25),
+        'mfe_tp_p50': grouped['mfe_tp'].quantile(0.5),
+        'mfe_tp_p75': grouped['mfe_tp'].quantile(0.75),
+        'be_rate': grouped['reached_be'].mean(),
+        'lock_rate': grouped['reached_lock'].mean(),
+        'min_to_be_p50': grouped['minutes_to_be'].median(),
+        'min_to_lock_p50': grouped['minutes_to_lock'].median(),
+    })
+    return summary
+
+
+if __name__ == "__main__":
+    # Set default encoding for stdout to handle emojis
+    if sys.stdout.encoding != 'utf-8':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    # Usage: python utils/excursion.py [bars.csv] [offset_hours] [symbol]
+    bars_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(DATA_DIR, 'export_market_data.csv')
+    offset_hours = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+    symbol = sys.argv[3] if len(sys.argv) > 3 else Config.SYMBOL  # Symbol of the bar archive
+    trades_path = os.path.join(DATA_DIR, 'export_trade_history.csv')
+
+    entries = EntryStore().load()
+    if entries.empty:
+        print("❌ Entry log is empty (run `python utils/entry_store.py` to import entry_log.csv)")
+        sys.exit(0)
+    trades = pd.read_csv(trades_path, parse_dates=['time']) if os.path.isfile(trades_path) else None
+    bars = pd.read_csv(bars_path, parse_dates=['time'])
+
+    start = time.perf_counter()
+    table = build_trades(entries, trades, load_fills(), offset_hours=offset_hours, symbol=symbol)
+    result = excursions(table, bars, be_percent=Config.BREAK_EVEN_PERCENT, lock_percent=Config.PROFIT_LOCK_PERCENT,
+                        default_tp=Config.TAKE_PROFIT_POINTS * 0.01)  # Points -> price (XAUUSD point = 0.01)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"⏱️ {symbol}: {len(result)} trades over {len(bars)} bars in {elapsed:.1f} ms "
+          f"({len(table) - len(result)} left out: open / no exit match / inside one bar / outside the bars)")
+
+    pd.set_option('display.width', 200)
+    print("\n=== MAE / MFE by Strategy ===")
+    print(excursion_summary(result).round(2).to_string())
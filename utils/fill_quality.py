@@ -0,0 +1,148 @@
+import csv
+import logging
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+FILL_LOG_PATH = os.path.join(DATA_DIR, 'fill_log.csv')
+
+# One row per filled order. `ticket` = order ticket = MT5 position id (joins entry_log / trade history)
+FILL_COLUMNS = [
+    'time', 'ticket', 'deal', 'symbol', 'strategy', 'side', 'volume',
+    'decision_price', 'request_price', 'fill_price', 'spread_points',
+    'point', 'value_per_point', 'attempts', 'latency_ms', 'send_ms',
+]
+
+SPREAD_BUCKETS = [0, 10, 20, 30, 50, 100, 300, 1000, np.inf]  # Points
+
+
+class FillLog:
+    """Append-only CSV of fills (data/fill_log.csv), shared by both bots"""
+    def __init__(self, path=FILL_LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                file_exists = os.path.isfile(self.path)
+                with open(self.path, mode='a', newline='', encoding='utf-8') as file:
+                    writer = csv.writer(file)
+                    if not file_exists:
+                        writer.writerow(FILL_COLUMNS)
+                    writer.writerow([record.get(col, '') for col in FILL_COLUMNS])
+        except Exception as e:
+            logging.error(f"Save Fill Log Error: {e}")
+
+
+def load_fills(path=FILL_LOG_PATH):
+    if not os.path.isfile(path):
+        return pd.DataFrame(columns=FILL_COLUMNS)
+    return pd.read_csv(path, parse_dates=['time'])
+
+
+def execution_costs(fills):
+    """
+    Adds per-order execution cost columns (points are signed: > 0 = against us).
+    - latency_points: decision price -> price actually requested (market drift while we worked)
+    - slippage_points: requested price -> fill price
+    - cost_money: (latency + slippage) in account currency for the filled volume
+    """
+    df = fills.copy()
+    sign = np.where(df['side'].to_numpy() == 'BUY', 1.0, -1.0)
+    point = df['point'].to_numpy(dtype=np.float64)
+    decision = df['decision_price'].to_numpy(dtype=np.float64)
+    request = df['request_price'].to_numpy(dtype=np.float64)
+    fill = df['fill_price'].to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['latency_points'] = sign * (request - decision) / point
+        df['slippage_points'] = sign * (fill - request) / point
+    df['cost_points'] = df['latency_points'] + df['slippage_points']
+    df['cost_money'] = df['cost_points'] * df['value_per_point'] * df['volume']
+    return df
+
+
+def attach_market_spread(fills, market):
+    """Fills rows with no recorded spread from the bar spread of the market data export (as-of join on time)"""
+    if market is None or market.empty or 'spread' not in market:
+        return fills
+    bars = market[['time', 'spread']].astype({'time': 'datetime64[ns]'}).sort_values('time')
+    df = fills.astype({'time': 'datetime64[ns]'}).sort_values('time')
+    df = pd.merge_asof(df, bars.rename(columns={'spread': 'bar_spread'}), on='time', direction='backward')
+    df['spread_points'] = df['spread_points'].fillna(df['bar_spread'])
+    return df.drop(columns='bar_spread')
+
+
+def attach_trade_results(fills, trades):
+    """
+    Realised profit per position from the trade history export (several OUT deals per
+    position after partial closes are summed). Needs the `position` column.
+    """
+    if trades is None or trades.empty or 'position' not in trades:
+        fills = fills.copy()
+        fills['profit'] = np.nan
+        return fills
+    money = trades[['profit'] + [c for c in ('commission', 'swap') if c in trades]].sum(axis=1)
+    profit = money.groupby(trades['position']).sum().rename('profit')
+    return fills.merge(profit, left_on='ticket', right_index=True, how='left')
+
+
+def execution_report(fills, trades=None, market=None, by='strategy'):
+    """
+    Per group (strategy / hour / spread_bucket): orders, latency, slippage and how much
+    of the edge execution cost. edge_money = realised profit + execution cost (what the
+    trades would have made at the decision price); cost_share = cost / edge.
+    """
+    if fills is None or fills.empty:
+        return pd.DataFrame()
+    df = execution_costs(attach_market_spread(fills, market))
+    df = attach_trade_results(df, trades)
+    df['hour'] = df['time'].dt.hour
+    df['spread_bucket'] = pd.cut(df['spread_points'], SPREAD_BUCKETS, right=False)
+
+    grouped = df.groupby(by, observed=True)
+    report = pd.DataFrame({
+        'orders': grouped.size(),
+        'latency_ms': grouped['latency_ms'].mean(),
+        'latency_ms_p95': grouped['latency_ms'].quantile(0.95),
+        'requoted': grouped['attempts'].apply(lambda a: int((a > 1).sum())),
+        'latency_points': grouped['latency_points'].mean(),
+        'slippage_points': grouped['slippage_points'].mean(),
+        'cost_money': grouped['cost_money'].sum(),
+        'profit': grouped['profit'].sum(min_count=1),
+    })
+    report['edge_money'] = report['profit'] + report['cost_money']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        report['cost_share'] = report['cost_money'] / report['edge_money'].abs()
+    return report
+
+
+if __name__ == "__main__":
+    # Set default encoding for stdout to handle emojis
+    if sys.stdout.encoding != 'utf-8':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    fills = load_fills()
+    if fills.empty:
+        print(f"❌ No fills recorded yet ({FILL_LOG_PATH})")
+        sys.exit(0)
+
+    def read_export(name):
+        path = os.path.join(DATA_DIR, name)
+        return pd.read_csv(path, parse_dates=['time']) if os.path.isfile(path) else None
+
+    trades = read_export('export_trade_history.csv')
+    market = read_export('export_market_data.csv')
+    if trades is None or 'position' not in trades:
+        print("⚠️ export_trade_history.csv has no position column (re-export with data_tool) - profit not joined")
+
+    pd.set_option('display.width', 200)
+    for by in ('strategy', 'hour', 'spread_bucket'):
+        print(f"\n=== Execution Quality by {by} ===")
+        print(execution_report(fills, trades, market, by=by).round(2).to_string())
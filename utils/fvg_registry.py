@@ -0,0 +1,143 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from utils.bar_series import BarSeries
+
+
+class _GapIndex:
+    """
+    Unfilled parts of one side's gaps as sorted, disjoint [low, high] intervals.
+    Bullish gaps fill from the top (a bar's low trades down into them), so a fill
+    cuts everything above that low: pops from the end + one clamp.
+    Bearish gaps are stored with negated prices so they fill the same way.
+    """
+    __slots__ = ('lows', 'highs')
+
+    def __init__(self):
+        self.lows = []
+        self.highs = []
+
+    def add(self, low, high):
+        """Unions [low, high] in, merging every interval it overlaps or touches"""
+        i = bisect_left(self.highs, low)
+        j = bisect_right(self.lows, high)
+        if i < j:
+            low = min(low, self.lows[i])
+            high = max(high, self.highs[j - 1])
+        self.lows[i:j] = [low]
+        self.highs[i:j] = [high]
+
+    def fill(self, level):
+        """Price traded down to `level`: nothing above it is open any more (partial / full fill)"""
+        lows, highs = self.lows, self.highs
+        while highs and highs[-1] > level:
+            if lows[-1] >= level:
+                lows.pop()
+                highs.pop()
+            else:
+                highs[-1] = level
+                break
+
+    def contains(self, price):
+        i = bisect_right(self.lows, price) - 1
+        return i >= 0 and self.highs[i] >= price
+
+    def intervals(self, sign=1):
+        if sign > 0:
+            return list(zip(self.lows, self.highs))
+        return [(-high, -low) for low, high in reversed(list(zip(self.lows, self.highs)))]
+
+
+class FVGRegistry:
+    """
+    Fair Value Gaps (the calculate_fvg() pattern) tracked from the bar that forms
+    them until price has traded all the way through, with no lookback limit.
+    - update(bars): folds in closed bars newer than the last call; the last row is
+      the bar being evaluated (forming bar, or the signal candle in closed-candle mode)
+      and is not folded in. Each folded bar first fills older gaps with its low / high
+      (only the part price has not reached stays open), then records the gap whose
+      third candle it is.
+    - in_gap(price) -> (in_bull, in_bear): price inside the open part of a gap, O(log n)
+    - snapshot() / restore(): plain-dict state for warm restarts
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.bull = _GapIndex()
+        self.bear = _GapIndex()
+        self.last_time = None   # Time of the last bar folded in (epoch seconds)
+        self.recent = []        # (open, high, low, close) of the last two bars folded in
+
+    def _close_bar(self, t, o, h, l, c, atr):
+        self.bull.fill(l)
+        self.bear.fill(-h)
+        if len(self.recent) == 2:
+            (_, first_high, first_low, _), (gap_open, _, _, gap_close) = self.recent
+            big_body = abs(gap_close - gap_open) > atr * 0.5
+            if first_high < l and gap_close > gap_open and big_body:
+                self.bull.add(first_high, l)
+            if first_low > h and gap_close < gap_open and big_body:
+                self.bear.add(-first_low, -h)
+        self.recent = self.recent[-1:] + [(o, h, l, c)]
+        self.last_time = t
+
+    def update(self, data):
+        bars = BarSeries.wrap(data)
+        if bars is None or len(bars) == 0:
+            return
+        times = bars.time.astype('datetime64[s]').astype(np.int64)
+        start = 0
+        if self.last_time is not None:
+            if times[0] > self.last_time:
+                self.reset()  # Bars between the last call and this window are missing: rebuild
+            else:
+                start = int(np.searchsorted(times, self.last_time, side='right'))
+        o, h, l, c, atr = bars['open'], bars['high'], bars['low'], bars['close'], bars['atr']
+        for i in range(start, len(times) - 1):
+            self._close_bar(int(times[i]), o[i], h[i], l[i], c[i], atr[i])
+
+    def in_gap(self, price):
+        return self.bull.contains(price), self.bear.contains(-price)
+
+    def open_gaps(self):
+        """(bull, bear) lists of open (bottom, top) zones, lowest first"""
+        return self.bull.intervals(), self.bear.intervals(-1)
+
+    def snapshot(self):
+        return {
+            'last_time': self.last_time,
+            'recent': [list(bar) for bar in self.recent],
+            'bull': [list(self.bull.lows), list(self.bull.highs)],
+            'bear': [list(self.bear.lows), list(self.bear.highs)],
+        }
+
+    def restore(self, state):
+        self.reset()
+        self.last_time = state['last_time']
+        self.recent = [tuple(bar) for bar in state['recent']]
+        self.bull.lows, self.bull.highs = list(state['bull'][0]), list(state['bull'][1])
+        self.bear.lows, self.bear.highs = list(state['bear'][0]), list(state['bear'][1])
+        return True
+
+    @classmethod
+    def match_history(cls, df, price, offset=0):
+        """
+        in_gap() for every row of a frame in one pass: row L = what a registry fed
+        df[:L+1 - offset] answers for price[L] (offset 1 = closed-candle mode).
+        Returns (in_bull, in_bear) bool arrays.
+        """
+        bars = BarSeries.wrap(df)
+        o, h, l, c, atr = bars['open'], bars['high'], bars['low'], bars['close'], bars['atr']
+        n = len(o)
+        registry = cls()
+        in_bull, in_bear = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+        folded = 0
+        for L in range(offset, n):
+            while folded < L - offset:  # Every bar before the evaluated one
+                registry._close_bar(None, o[folded], h[folded], l[folded], c[folded], atr[folded])
+                folded += 1
+            if price[L] == price[L]:  # Not NaN
+                in_bull[L], in_bear[L] = registry.in_gap(price[L])
+        return in_bull, in_bear
@@ -0,0 +1,183 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config.settings import Config
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+
+
+def _digest(parts):
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else repr(part).encode())
+    return h.hexdigest()
+
+
+def _field_values(data, name):
+    values = data[name]
+    return values.to_numpy(dtype=np.float64) if hasattr(values, 'to_numpy') else np.asarray(values, dtype=np.float64)
+
+
+def fingerprint(data):
+    """
+    Cheap content address of an indicator input.
+    - Bars with a `time` column: length + first / last bar time + first / last bar OHLC
+      (closed bars never change; the forming bar is the last row)
+    - Anything else (a close Series, a batch panel): hash of the values
+    """
+    if isinstance(data, pd.Series):
+        return _digest(['series', np.ascontiguousarray(data.to_numpy(dtype=np.float64)).tobytes()])
+    fields = [name for name in PRICE_FIELDS if name in data]
+    if isinstance(data, pd.DataFrame) and 'time' in data and len(data):
+        times = data['time'].to_numpy(dtype='datetime64[ns]')
+        edges = [np.ascontiguousarray([_field_values(data, name)[i] for name in fields]).tobytes() for i in (0, -1)]
+        return _digest(['bars', len(data), tuple(fields), int(times[0].astype(np.int64)),
+                        int(times[-1].astype(np.int64))] + edges)
+    return _digest(['values', tuple(fields)] + [np.ascontiguousarray(_field_values(data, name)).tobytes() for name in fields])
+
+
+class IndicatorCache:
+    """
+    LRU memo of indicator results keyed by (computation, parameters, input fingerprint).
+    - Results are kept as float64 arrays and handed out as copies on the caller's index
+    - Bounded by `max_bytes`: least recently used results are evicted first
+    - Optional disk tier (`disk_dir`, .npz per result) for offline tools / research runs
+      that recompute the same history across processes
+    - hits / misses / evictions for the periodic report
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.entries = OrderedDict()  # key -> {column: ndarray}
+        self.sizes = {}
+        self.bytes = 0
+        self.hits = self.misses = self.disk_hits = self.evictions = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, _digest([key]) + '.npz')
+
+    def get(self, key):
+        """{column: ndarray} (private copies) or None"""
+        with self._lock:
+            columns = self.entries.get(key)
+            if columns is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return {col: values.copy() for col, values in columns.items()}
+        if self.disk_dir:
+            path = self._path(key)
+            if os.path.isfile(path):
+                try:
+                    with np.load(path) as saved:
+                        columns = {col: saved[col] for col in saved.files}
+                    self._store(key, columns)
+                    with self._lock:
+                        self.hits += 1
+                        self.disk_hits += 1
+                    return {col: values.copy() for col, values in columns.items()}
+                except Exception as e:
+                    logging.warning(f"Indicator Cache: unreadable {path}: {e}")
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, columns):
+        columns = {col: np.array(values, dtype=np.float64) for col, values in columns.items()}
+        self._store(key, columns)
+        if self.disk_dir:
+            try:
+                buffer = io.BytesIO()
+                np.savez(buffer, **columns)
+                path = self._path(key)
+                with open(path + '.tmp', 'wb') as f:
+                    f.write(buffer.getvalue())
+                os.replace(path + '.tmp', path)
+            except Exception as e:
+                logging.error(f"Indicator Cache Disk Error: {e}")
+
+    def _store(self, key, columns):
+        size = sum(values.nbytes for values in columns.values())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self.entries:
+                self.bytes -= self.sizes[key]
+            self.entries[key] = columns
+            self.entries.move_to_end(key)
+            self.sizes[key] = size
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                old, _ = self.entries.popitem(last=False)
+                self.bytes -= self.sizes.pop(old)
+                self.evictions += 1
+
+    def call(self, func, data, *args, **kwargs):
+        """
+        func(data, *args, **kwargs) memoized, for direct Indicators.calculate_* calls.
+        `func` must return a Series or a tuple of Series on data's index.
+        """
+        key = (func.__qualname__, fingerprint(data), repr(args), repr(sorted(kwargs.items())))
+        cached = self.get(key)
+        if cached is not None:
+            if 'value' in cached:
+                return pd.Series(cached['value'], index=data.index)
+            return tuple(pd.Series(cached[str(i)], index=data.index) for i in range(len(cached)))
+        result = func(data, *args, **kwargs)
+        if isinstance(result, tuple):
+            self.put(key, {str(i): output.to_numpy(dtype=np.float64) for i, output in enumerate(result)})
+        else:
+            self.put(key, {'value': result.to_numpy(dtype=np.float64)})
+        return result
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.bytes = 0
+
+    def report(self):
+        lookups = self.hits + self.misses
+        if not lookups:
+            return ""
+        line = (f"hits {self.hits}/{lookups} ({self.hits / lookups:.0%}) | "
+                f"{self.bytes / 1024 / 1024:.1f} MB in {len(self.entries)} results | {self.evictions} evicted")
+        if self.disk_dir:
+            line += f" | disk hits {self.disk_hits}"
+        return line
+
+    def log_report(self):
+        report = self.report()
+        if report:
+            logging.info(f"🧮 Indicator Cache -> {report}")
+
+
+_default_cache = None
+
+
+def default_cache():
+    """Process-wide cache from Config (None when ENABLE_INDICATOR_CACHE is off)"""
+    global _default_cache
+    if not Config.ENABLE_INDICATOR_CACHE:
+        return None
+    if _default_cache is None:
+        _default_cache = IndicatorCache(max_bytes=int(Config.INDICATOR_CACHE_MB * 1024 * 1024),
+                                        disk_dir=Config.INDICATOR_CACHE_DIR)
+    return _default_cache
+
+
+def cached_call(func, data, *args, **kwargs):
+    """func(data, ...) through the process-wide cache (plain call when it is off)"""
+    cache = default_cache()
+    if cache is None:
+        return func(data, *args, **kwargs)
+    return cache.call(func, data, *args, **kwargs)
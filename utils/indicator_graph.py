@@ -0,0 +1,286 @@
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from config.settings import Config
+from utils.indicators import Indicators
+from utils.indicator_cache import default_cache, fingerprint
+
+
+class IndicatorNode:
+    """One computation in the graph. It can produce several columns (e.g. MACD line + signal)."""
+    def __init__(self, name, outputs, defaults, compute, deps=None):
+        self.name = name
+        self.outputs = outputs    # Column names written to the frame
+        self.defaults = defaults  # () -> default params (read from Config at call time)
+        self.compute = compute    # (df, params, inputs) -> {column: Series}
+        self.deps = deps or (lambda params: [])  # params -> [(node_name, params)]
+
+
+def _ema(df, p, inputs):
+    return {'ema_trend': Indicators.calculate_ema(df['close'], p['period'])}
+
+def _macd(df, p, inputs):
+    line, signal = Indicators.calculate_macd(df['close'], p['fast'], p['slow'], p['signal'])
+    return {'macd_line': line, 'macd_signal': signal}
+
+def _rsi(df, p, inputs):
+    return {'rsi': Indicators.calculate_rsi(df['close'], p['period'])}
+
+def _bollinger(df, p, inputs):
+    upper, middle, lower = Indicators.calculate_bollinger_bands(df['close'], p['period'], p['std'])
+    return {'bb_upper': upper, 'bb_middle': middle, 'bb_lower': lower}
+
+def _true_range(df, p, inputs):
+    return {'true_range': Indicators.calculate_true_range(df)}
+
+def _atr(df, p, inputs):
+    return {'atr': Indicators.calculate_atr(df, p['period'], true_range=inputs['true_range'])}
+
+def _adx(df, p, inputs):
+    return {'adx': Indicators.calculate_adx(df, p['period'], atr=inputs['atr'])}
+
+def _like(template, values):
+    """Kernel output with the index (and symbol columns, in a batch panel) of an input field"""
+    if isinstance(template, pd.DataFrame):
+        return pd.DataFrame(values, index=template.index, columns=template.columns)
+    return pd.Series(values, index=template.index)
+
+def _pattern(df, p, inputs):
+    return {'pattern': _like(df['close'], Indicators.candlestick_pattern_codes(df))}
+
+def _sweep(df, p, inputs):
+    return {'sweep': _like(df['close'], Indicators.liquidity_sweep_codes(df, p['lookback']))}
+
+def _dealing_range(df, p, inputs):
+    # pandas rolling max / min: monotonic-deque window, O(1) amortised per bar (forming bar included)
+    high = df['high'].rolling(p['lookback'], min_periods=1).max()
+    low = df['low'].rolling(p['lookback'], min_periods=1).min()
+    levels = Indicators.range_levels(high.to_numpy(), low.to_numpy())
+    columns = {'range_high': high, 'range_low': low}
+    columns.update({name: _like(high, values) for name, values in levels.items()})
+    return columns
+
+
+NODES = {node.name: node for node in [
+    IndicatorNode('ema_trend', ('ema_trend',), lambda: {'period': Config.EMA_TREND}, _ema),
+    IndicatorNode('macd', ('macd_line', 'macd_signal'),
+                  lambda: {'fast': Config.MACD_FAST, 'slow': Config.MACD_SLOW, 'signal': Config.MACD_SIGNAL}, _macd),
+    IndicatorNode('rsi', ('rsi',), lambda: {'period': Config.RSI_PERIOD}, _rsi),
+    IndicatorNode('bollinger', ('bb_upper', 'bb_middle', 'bb_lower'),
+                  lambda: {'period': Config.BB_PERIOD, 'std': Config.BB_STD}, _bollinger),
+    IndicatorNode('true_range', ('true_range',), lambda: {}, _true_range),
+    IndicatorNode('atr', ('atr',), lambda: {'period': Config.ATR_PERIOD}, _atr,
+                  deps=lambda p: [('true_range', {})]),
+    # ADX reuses the ATR node when ADX_PERIOD == ATR_PERIOD
+    IndicatorNode('adx', ('adx',), lambda: {'period': Config.ADX_PERIOD}, _adx,
+                  deps=lambda p: [('atr', {'period': p['period']})]),
+    # Categorical codes (Indicators.PATTERN_NAMES / SWEEP_NAMES), one per bar
+    IndicatorNode('pattern', ('pattern',), lambda: {}, _pattern),
+    IndicatorNode('sweep', ('sweep',), lambda: {'lookback': Indicators.SWEEP_LOOKBACK}, _sweep),
+    # Premium / Discount + Fibonacci golden zone of the last `lookback` bars
+    IndicatorNode('dealing_range', ('range_high', 'range_low', 'discount_below', 'premium_above',
+                                    'fibo_up_618', 'fibo_up_786', 'fibo_down_618', 'fibo_down_786'),
+                  lambda: {'lookback': Config.PD_RANGE_LOOKBACK}, _dealing_range),
+]}
+
+COLUMN_TO_NODE = {col: node.name for node in NODES.values() for col in node.outputs}
+ALL_COLUMNS = [col for node in NODES.values() for col in node.outputs if col != 'true_range']
+
+
+# Raw fields the nodes read; a batch panel holds one (bars x symbols) frame per field
+BATCH_FIELDS = ('open', 'high', 'low', 'close')
+
+
+def build_panel(frames):
+    """
+    Right-aligns every symbol's bars into one 2-D (bars x symbols) frame per field.
+    Shorter histories are padded with leading NaN, which the indicators skip over,
+    so each column matches what the symbol would get on its own.
+    """
+    symbols = list(frames)
+    length = max(len(df) for df in frames.values())
+    panel = {}
+    for field in BATCH_FIELDS:
+        data = np.full((length, len(symbols)), np.nan)
+        for j, symbol in enumerate(symbols):
+            values = frames[symbol][field].to_numpy(dtype=np.float64)
+            data[length - len(values):, j] = values
+        panel[field] = pd.DataFrame(data, columns=symbols)
+    return panel
+
+
+def node_key(name, params):
+    return (name, tuple(sorted(params.items())))
+
+
+def column_key(col, params):
+    """Node key a column request resolves to (defaults filled in)"""
+    node = NODES[COLUMN_TO_NODE[col]]
+    full = dict(node.defaults())
+    full.update(params)
+    return node_key(node.name, full)
+
+
+def normalize_requests(requests):
+    """
+    Accepts a list of column names, a {column: params} dict, or a strategy
+    (REQUIRED_INDICATORS / INDICATOR_PARAMS). Returns {column: params}.
+    """
+    if requests is None:
+        return {}
+    if hasattr(requests, 'REQUIRED_INDICATORS'):
+        overrides = getattr(requests, 'INDICATOR_PARAMS', {})
+        return {col: dict(overrides.get(col, {})) for col in requests.REQUIRED_INDICATORS}
+    if isinstance(requests, dict):
+        return {col: dict(params or {}) for col, params in requests.items()}
+    return {col: {} for col in requests}
+
+
+class IndicatorEngine:
+    """
+    Resolves the indicator columns requested by one or more strategies into a
+    dependency graph and computes every (node, params) exactly once.
+    Keeps per-owner (strategy) timing stats.
+    Node results are memoized in `cache` (default: the process-wide IndicatorCache,
+    False = off), so the same bars are not recomputed by another owner or engine.
+    """
+    def __init__(self, cache=None):
+        self.stats = {}  # owner -> {'calls', 'seconds'}
+        self.cache = default_cache() if cache is None else (cache or None)
+
+    def plan(self, requests):
+        """Topologically ordered [(key, node, params)] plus {column: key} for the requested columns"""
+        order = []
+        visited = {}
+        column_keys = {}
+
+        def visit(name, params):
+            node = NODES[name]
+            full = dict(node.defaults())
+            full.update(params)
+            key = node_key(name, full)
+            if key in visited:
+                return key
+            inputs = {}
+            for dep_name, dep_params in node.deps(full):
+                dep_key = visit(dep_name, dep_params)
+                for col in NODES[dep_name].outputs:
+                    inputs[col] = dep_key
+            visited[key] = inputs
+            order.append((key, node, full))
+            return key
+
+        for col, params in requests.items():
+            name = COLUMN_TO_NODE.get(col)
+            if name is None:
+                raise KeyError(f"Unknown indicator column: {col}")
+            key = visit(name, params)
+            if col in column_keys and column_keys[col] != key:
+                raise ValueError(f"Conflicting parameters requested for column '{col}'")
+            column_keys[col] = key
+        return order, visited, column_keys
+
+    def _evaluate(self, data, requests):
+        order, inputs_of, column_keys = self.plan(requests)
+        results = {}
+        node_seconds = {}
+        address = fingerprint(data) if self.cache is not None else None
+        for key, node, params in order:
+            inputs = {col: results[dep_key][col] for col, dep_key in inputs_of[key].items()}
+            t0 = time.perf_counter()
+            cached = self.cache.get((key, address)) if address is not None else None
+            if cached is not None:
+                results[key] = {col: _like(data['close'], values) for col, values in cached.items()}
+            else:
+                results[key] = node.compute(data, params, inputs)
+                if address is not None:
+                    self.cache.put((key, address), results[key])
+            node_seconds[key] = time.perf_counter() - t0
+        return results, node_seconds, inputs_of, column_keys
+
+    def _run(self, df, requests):
+        results, node_seconds, inputs_of, column_keys = self._evaluate(df, requests)
+        for col, key in column_keys.items():
+            df[col] = results[key][col]
+        return node_seconds, inputs_of, column_keys
+
+    def compute(self, df, requests, owner=None):
+        """Adds only the requested columns (and nothing else) to df, in place"""
+        requests = normalize_requests(requests)
+        node_seconds, _, _ = self._run(df, requests)
+        if owner:
+            self._record(owner, sum(node_seconds.values()))
+        return df
+
+    def compute_shared(self, df, owners):
+        """
+        Computes the union of several strategies' requirements in one pass.
+        `owners` is {owner_name: requests}. Each owner is charged the cost of every
+        node in its own dependency closure (shared nodes are charged to each user),
+        which is what that strategy would cost if it ran alone.
+        """
+        normalized = {owner: normalize_requests(req) for owner, req in owners.items()}
+        union = {}
+        for req in normalized.values():
+            for col, params in req.items():
+                if col in union and column_key(col, union[col]) != column_key(col, params):
+                    raise ValueError(f"Strategies request conflicting parameters for column '{col}'")
+                union.setdefault(col, params)
+        node_seconds, inputs_of, _ = self._run(df, union)
+
+        for owner, req in normalized.items():
+            _, _, column_keys = self.plan(req)
+            closure = set()
+            stack = list(column_keys.values())
+            while stack:
+                key = stack.pop()
+                if key in closure:
+                    continue
+                closure.add(key)
+                stack.extend(inputs_of.get(key, {}).values())
+            self._record(owner, sum(node_seconds.get(key, 0.0) for key in closure))
+        return df
+
+    def compute_batch(self, frames, requests, owner=None):
+        """
+        Computes the same requested columns for several symbols at once.
+        `frames` is {symbol: df}. Every node runs once over a 2-D (bars x symbols)
+        panel instead of once per symbol, then the columns are written back into
+        each symbol's frame, in place.
+        """
+        frames = {symbol: df for symbol, df in frames.items() if df is not None and len(df) > 0}
+        if not frames:
+            return frames
+        panel = build_panel(frames)
+        results, node_seconds, _, column_keys = self._evaluate(panel, normalize_requests(requests))
+
+        length = len(panel['close'])
+        for col, key in column_keys.items():
+            wide = results[key][col].to_numpy()
+            for j, (symbol, df) in enumerate(frames.items()):
+                df[col] = wide[length - len(df):, j]
+        if owner:
+            self._record(owner, sum(node_seconds.values()))
+        return frames
+
+    def _record(self, owner, seconds):
+        entry = self.stats.setdefault(owner, {'calls': 0, 'seconds': 0.0})
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+
+    def report(self):
+        """One line per owner: calls and average compute time"""
+        lines = []
+        for owner, entry in self.stats.items():
+            avg_ms = entry['seconds'] / entry['calls'] * 1000 if entry['calls'] else 0.0
+            lines.append(f"{owner}: {entry['calls']} calls | avg {avg_ms:.2f} ms")
+        return " | ".join(lines)
+
+    def log_report(self):
+        if self.stats:
+            logging.info(f"⏱️ Indicator Compute Time -> {self.report()}")
+        if self.cache is not None:
+            self.cache.log_report()
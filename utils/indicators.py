@@ -1,8 +1,16 @@
 import pandas as pd
+import numpy as np
 import logging
+import math
 from config.settings import Config
+from utils.bar_series import BarSeries
 
 class Indicators:
+    # Categorical codes of the pattern / sweep kernels (0 = none). Stored as float columns.
+    PATTERN_NAMES = (None, "BULLISH_ENGULFING", "BEARISH_ENGULFING", "BULLISH_PINBAR", "BEARISH_PINBAR")
+    SWEEP_NAMES = (None, "BULL_SWEEP", "BEAR_SWEEP")
+    SWEEP_LOOKBACK = 10  # Lookback of the `sweep` column
+
     @staticmethod
     def calculate_ema(series, period):
         return series.ewm(span=period, adjust=False).mean()
@@ -33,41 +41,162 @@ class Indicators:
         return upper_band, sma, lower_band
 
     @staticmethod
-    def calculate_atr(df, period=14):
-        high_low = df['high'] - df['low']
-        high_close = abs(df['high'] - df['close'].shift())
-        low_close = abs(df['low'] - df['close'].shift())
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = ranges.max(axis=1)
-        atr = true_range.rolling(window=period).mean()
-        return atr
+    def _like(template, values):
+        """Kernel output as a Series (or a 2-D panel frame) on the template's index"""
+        if isinstance(template, pd.DataFrame):
+            return pd.DataFrame(values, index=template.index, columns=template.columns)
+        return pd.Series(values, index=template.index)
 
     @staticmethod
-    def calculate_adx(df, period=14):
-        """Calculates Average Directional Index (ADX)"""
-        high = df['high']
-        low = df['low']
-        close = df['close']
-        
-        plus_dm = high.diff()
-        minus_dm = low.diff()
-        
-        plus_dm[plus_dm < 0] = 0
-        minus_dm[minus_dm > 0] = 0
-        
-        tr1 = pd.DataFrame(high - low)
-        tr2 = pd.DataFrame(abs(high - close.shift(1)))
-        tr3 = pd.DataFrame(abs(low - close.shift(1)))
-        frames = [tr1, tr2, tr3]
-        tr = pd.concat(frames, axis=1, join='outer').max(axis=1)
-        atr = tr.rolling(period).mean()
-        
-        plus_di = 100 * (plus_dm.ewm(alpha=1/period).mean() / atr)
-        minus_di = 100 * (abs(minus_dm).ewm(alpha=1/period).mean() / atr)
-        dx = (abs(plus_di - minus_di) / abs(plus_di + minus_di)) * 100
-        adx = ((dx.shift(1) * (period - 1)) + dx) / period
-        adx_smooth = adx.ewm(alpha=1/period).mean()
-        return adx_smooth
+    def _values(field):
+        return field.to_numpy(dtype=np.float64) if hasattr(field, 'to_numpy') else np.asarray(field, dtype=np.float64)
+
+    @staticmethod
+    def true_range_kernel(high, low, close):
+        """max(H-L, |H-prevC|, |L-prevC|) ignoring NaN, over 1-D or 2-D (bars x symbols) arrays"""
+        prev_close = np.empty_like(close)
+        prev_close[:1] = np.nan
+        prev_close[1:] = close[:-1]
+        return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+    @staticmethod
+    def _by_column(recurrence, values, *args):
+        """Runs a scalar recurrence down a 1-D array, or down each column of a 2-D (bars x symbols) array"""
+        if values.ndim == 1:
+            return np.array(recurrence(values.tolist(), *args), dtype=np.float64)
+        out = np.empty_like(values)
+        for j in range(values.shape[1]):
+            out[:, j] = recurrence(values[:, j].tolist(), *args)
+        return out
+
+    @staticmethod
+    def _rolling_mean_column(values, period):
+        # pandas' roll_mean step for step (Kahan running sum, add / remove compensations, sign and
+        # constant-run corrections), so results match Series.rolling(period).mean() bit for bit
+        out = [np.nan] * len(values)
+        total = add_comp = remove_comp = 0.0
+        nobs = negatives = same_run = 0
+        prev = values[0] if values else np.nan
+        for i, val in enumerate(values):
+            if i >= period:
+                old = values[i - period]
+                if old == old:
+                    nobs -= 1
+                    y = -old - remove_comp
+                    t = total + y
+                    remove_comp = t - total - y
+                    total = t
+                    if math.copysign(1.0, old) < 0:
+                        negatives -= 1
+            if val == val:
+                nobs += 1
+                y = val - add_comp
+                t = total + y
+                add_comp = t - total - y
+                total = t
+                if math.copysign(1.0, val) < 0:
+                    negatives += 1
+                same_run = same_run + 1 if val == prev else 1
+                prev = val
+            if nobs >= period and nobs > 0:
+                mean = total / nobs
+                if same_run >= nobs:
+                    mean = prev
+                elif negatives == 0 and mean < 0:
+                    mean = 0.0
+                elif negatives == nobs and mean > 0:
+                    mean = 0.0
+                out[i] = mean
+        return out
+
+    @staticmethod
+    def _ewm_column(values, alpha):
+        # pandas' adjusted EWM (adjust=True, ignore_na=False) step for step, so results match
+        # Series.ewm(alpha=alpha).mean() bit for bit. pandas turns alpha into com and back first.
+        com = (1.0 - alpha) / alpha
+        decay = 1.0 - 1.0 / (1.0 + com)
+        out = [np.nan] * len(values)
+        if not values:
+            return out
+        weighted = out[0] = values[0]
+        old_weight = 1.0
+        for i in range(1, len(values)):
+            cur = values[i]
+            if weighted == weighted:
+                old_weight *= decay
+                if cur == cur:
+                    if weighted != cur:
+                        weighted = (old_weight * weighted + cur) / (old_weight + 1.0)
+                    old_weight += 1.0
+            elif cur == cur:
+                weighted = cur
+            out[i] = weighted
+        return out
+
+    @staticmethod
+    def _rolling_mean(values, period):
+        return Indicators._by_column(Indicators._rolling_mean_column, values, period)
+
+    @staticmethod
+    def _ewm(values, alpha):
+        return Indicators._by_column(Indicators._ewm_column, values, alpha)
+
+    @staticmethod
+    def directional_kernel(high, low, close, period=14, atr=None, true_range=None):
+        """
+        True range, ATR and ADX in one pass over contiguous float64 arrays (1-D or 2-D).
+        TR is computed once; the rolling mean and the Wilder EWMs run as scalar recurrences
+        down each column, with the same arithmetic as the original Series code (identical results).
+        Returns (true_range, atr, adx).
+        """
+        if atr is None:
+            if true_range is None:
+                true_range = Indicators.true_range_kernel(high, low, close)
+            atr = Indicators._rolling_mean(true_range, period)
+
+        plus_dm = np.empty_like(high)
+        minus_dm = np.empty_like(low)
+        plus_dm[:1] = minus_dm[:1] = np.nan
+        np.subtract(high[1:], high[:-1], out=plus_dm[1:])
+        np.subtract(low[1:], low[:-1], out=minus_dm[1:])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            plus_dm[plus_dm < 0] = 0
+            minus_dm[minus_dm > 0] = 0
+
+            plus_smooth = Indicators._ewm(plus_dm, 1 / period)
+            minus_smooth = Indicators._ewm(np.abs(minus_dm), 1 / period)
+
+            plus_di = 100 * (plus_smooth / atr)
+            minus_di = 100 * (minus_smooth / atr)
+            dx = (np.abs(plus_di - minus_di) / np.abs(plus_di + minus_di)) * 100
+            prev_dx = np.empty_like(dx)
+            prev_dx[:1] = np.nan
+            prev_dx[1:] = dx[:-1]
+            adx = ((prev_dx * (period - 1)) + dx) / period
+        adx_smooth = Indicators._ewm(adx, 1 / period)
+        return true_range, atr, adx_smooth
+
+    @staticmethod
+    def calculate_true_range(df):
+        # Element-wise max ignoring NaN: works for a Series or a 2-D (bars x symbols) frame
+        values = Indicators._values
+        tr = Indicators.true_range_kernel(values(df['high']), values(df['low']), values(df['close']))
+        return Indicators._like(df['close'], tr)
+
+    @staticmethod
+    def calculate_atr(df, period=14, true_range=None):
+        if true_range is None:
+            values = Indicators._values
+            true_range = Indicators.true_range_kernel(values(df['high']), values(df['low']), values(df['close']))
+        return Indicators._like(df['close'], Indicators._rolling_mean(Indicators._values(true_range), period))
+
+    @staticmethod
+    def calculate_adx(df, period=14, atr=None):
+        """Calculates Average Directional Index (ADX). `atr` (same period) can be passed in to reuse it."""
+        values = Indicators._values
+        _, _, adx = Indicators.directional_kernel(values(df['high']), values(df['low']), values(df['close']), period,
+                                                  atr=None if atr is None else values(atr))
+        return Indicators._like(df['close'], adx)
 
     @staticmethod
     def calculate_order_blocks(df, lookback=50, max_sl_points=500):
@@ -76,38 +205,37 @@ class Indicators:
         bear_ob = None
         
         try:
+            bars = BarSeries.wrap(df)
+            o, h, l, c, atr = bars['open'], bars['high'], bars['low'], bars['close'], bars['atr']
             # Iterate backwards to find the latest unmitigated blocks
-            for i in range(len(df)-2, len(df)-lookback, -1):
+            for i in range(len(bars)-2, len(bars)-lookback, -1):
                 if i < 5: break
                 
-                curr = df.iloc[i]
-                prev = df.iloc[i-1]
-                
                 # ATR for size context
-                atr_val = df.iloc[i]['atr']
-                if pd.isna(atr_val): continue
+                atr_val = atr[i]
+                if np.isnan(atr_val): continue
                 
-                body_size = abs(curr['close'] - curr['open'])
+                body_size = abs(c[i] - o[i])
                 is_impulse = body_size > (atr_val * 1.0) # Strong move
                 
                 # Bullsih OB Search
-                if is_impulse and curr['close'] > curr['open']: # Bullish Impulse
-                    if prev['close'] < prev['open']: # Prev was Bearish
-                        ob_top = prev['high']
-                        ob_bottom = prev['low']
+                if is_impulse and c[i] > o[i]: # Bullish Impulse
+                    if c[i-1] < o[i-1]: # Prev was Bearish
+                        ob_top = h[i-1]
+                        ob_bottom = l[i-1]
                         
                         # Check Mitigation: Has price touched this zone deeply AFTER it was formed?
                         # Zone: ob_bottom to ob_top
                         is_mitigated = False
                         
                         # Check candles from i+1 to now
-                        subsequent_candles = df.iloc[i+1:]
-                        if not subsequent_candles.empty:
+                        subsequent_lows = l[i+1:]
+                        if len(subsequent_lows) > 0:
                             # If any candle closed below the OB Top (deep retest) -> Mitigated?
                             # Standard SMC: Wicks are okay (retest), but if body closes inside/below, it might be used up.
                             # Strict Mitigation: If price touched 50% of the block, count as mitigated.
                             ob_mid = (ob_top + ob_bottom) / 2
-                            min_low_after = subsequent_candles['low'].min()
+                            min_low_after = subsequent_lows.min()
                             
                             # If price dipped below 50% of the OB, consider it mitigated/unsafe for a fresh entry
                             if min_low_after < ob_mid:
@@ -121,32 +249,30 @@ class Indicators:
                         if (ob_top - ob_bottom) > max_width:
                              is_mitigated = True # Treat as 'bad' OB
                         
-                        if not is_mitigated and df.iloc[-1]['close'] > ob_bottom: 
+                        if not is_mitigated and c[-1] > ob_bottom: 
                             bull_ob = (ob_top, ob_bottom)
                             if bull_ob: break 
 
             # Bearish OB Search
-            for i in range(len(df)-2, len(df)-lookback, -1):
+            for i in range(len(bars)-2, len(bars)-lookback, -1):
                 if i < 5: break
-                curr = df.iloc[i]
-                prev = df.iloc[i-1]
-                atr_val = df.iloc[i]['atr']
-                if pd.isna(atr_val): continue
+                atr_val = atr[i]
+                if np.isnan(atr_val): continue
                 
-                body_size = abs(curr['close'] - curr['open'])
+                body_size = abs(c[i] - o[i])
                 is_impulse = body_size > (atr_val * 1.0)
                 
-                if is_impulse and curr['close'] < curr['open']: # Bearish Impulse
-                    if prev['close'] > prev['open']: # Prev was Bullish
-                        ob_top = prev['high']
-                        ob_bottom = prev['low']
+                if is_impulse and c[i] < o[i]: # Bearish Impulse
+                    if c[i-1] > o[i-1]: # Prev was Bullish
+                        ob_top = h[i-1]
+                        ob_bottom = l[i-1]
                         
                         # Mitigation Check
                         is_mitigated = False
-                        subsequent_candles = df.iloc[i+1:]
-                        if not subsequent_candles.empty:
+                        subsequent_highs = h[i+1:]
+                        if len(subsequent_highs) > 0:
                             ob_mid = (ob_top + ob_bottom) / 2
-                            max_high_after = subsequent_candles['high'].max()
+                            max_high_after = subsequent_highs.max()
                             
                             # If price poked above 50% of the OB
                             if max_high_after > ob_mid:
@@ -157,7 +283,7 @@ class Indicators:
                         if (ob_top - ob_bottom) > max_width:
                              is_mitigated = True
 
-                        if not is_mitigated and df.iloc[-1]['close'] < ob_top:
+                        if not is_mitigated and c[-1] < ob_top:
                             bear_ob = (ob_top, ob_bottom)
                             if bear_ob: break
                             
@@ -173,8 +299,11 @@ class Indicators:
         bear_fvg = []
         
         try:
+            bars = BarSeries.wrap(df)
+            o, h, l, c, atr = bars['open'], bars['high'], bars['low'], bars['close'], bars['atr']
+
             # Check last 'lookback' candles
-            for i in range(len(df)-2, len(df)-lookback, -1):
+            for i in range(len(bars)-2, len(bars)-lookback, -1):
                 # Need candle i, i-1, i-2 (current, prev, prev-prev) 
                 # FVG is formed by Candle 1, 2, 3. 
                 # Let's say i is candle 3 (latest completed)
@@ -186,21 +315,18 @@ class Indicators:
                 
                 # Check for FVG formation at index j (Candle 2)
                 j = i # Current candle in loop
-                
-                c3 = df.iloc[j]     # Candle 3
-                c2 = df.iloc[j-1]   # Candle 2 (The Gap Candle)
-                c1 = df.iloc[j-2]   # Candle 1
+                # Candle 3 = j, Candle 2 (The Gap Candle) = j-1, Candle 1 = j-2
                 
                 # Bullish FVG: Candle 1 High < Candle 3 Low
-                if c1['high'] < c3['low'] and c2['close'] > c2['open']:
+                if h[j-2] < l[j] and c[j-1] > o[j-1]:
                     # Validation: Big body on C2
-                    if abs(c2['close'] - c2['open']) > df.iloc[j]['atr'] * 0.5:
-                        bull_fvg.append((c1['high'], c3['low'])) # Zone
+                    if abs(c[j-1] - o[j-1]) > atr[j] * 0.5:
+                        bull_fvg.append((h[j-2], l[j])) # Zone
                 
                 # Bearish FVG: Candle 1 Low > Candle 3 High
-                if c1['low'] > c3['high'] and c2['close'] < c2['open']:
-                    if abs(c2['close'] - c2['open']) > df.iloc[j]['atr'] * 0.5:
-                         bear_fvg.append((c3['high'], c1['low'])) # Zone
+                if l[j-2] > h[j] and c[j-1] < o[j-1]:
+                    if abs(c[j-1] - o[j-1]) > atr[j] * 0.5:
+                         bear_fvg.append((h[j], l[j-2])) # Zone
 
         except Exception as e:
             logging.error(f"FVG Calc Error: {e}")
@@ -211,9 +337,9 @@ class Indicators:
     def get_swing_high_low(df, lookback=50):
         """Finds the highest high and lowest low in the lookback period"""
         try:
-            recent_data = df.iloc[-lookback:]
-            highest_high = recent_data['high'].max()
-            lowest_low = recent_data['low'].min()
+            bars = BarSeries.wrap(df)
+            highest_high = bars['high'][-lookback:].max()
+            lowest_low = bars['low'][-lookback:].min()
             return highest_high, lowest_low
         except Exception as e:
             logging.error(f"Swing High/Low Error: {e}")
@@ -222,12 +348,12 @@ class Indicators:
     @staticmethod
     def get_swing_low(df, lookback):
         """Gets the lowest low in the lookback period (Tail)"""
-        return df['low'].tail(lookback).min()
+        return BarSeries.wrap(df)['low'][-lookback:].min()
 
     @staticmethod
     def get_swing_high(df, lookback):
         """Gets the highest high in the lookback period (Tail)"""
-        return df['high'].tail(lookback).max()
+        return BarSeries.wrap(df)['high'][-lookback:].max()
 
             
     @staticmethod
@@ -261,92 +387,67 @@ class Indicators:
             
         return levels
 
+    @staticmethod
+    def range_levels(high, low):
+        """
+        Premium / Discount thresholds (mid-point -/+ 5% buffer) and golden-zone bounds
+        (0.618 / 0.786 retracement, up and down) of a high-low range. Element-wise over
+        scalars or arrays; NaN where there is no range (high == low or a zero bound).
+        """
+        high = np.asarray(high, dtype=np.float64)
+        low = np.asarray(low, dtype=np.float64)
+        diff = high - low
+        mid_point = (high + low) / 2
+        buffer = (high - low) * 0.05  # ✅ 5% BUFFER for deeper retracements
+        levels = {
+            'discount_below': mid_point - buffer,
+            'premium_above': mid_point + buffer,
+            'fibo_up_618': high - (diff * 0.618),
+            'fibo_up_786': high - (diff * 0.786),
+            'fibo_down_618': low + (diff * 0.618),
+            'fibo_down_786': low + (diff * 0.786),
+        }
+        with np.errstate(invalid='ignore'):
+            has_range = (high != low) & (high != 0) & (low != 0)
+        return {name: np.where(has_range, values, np.nan) for name, values in levels.items()}
+
     @staticmethod
     def check_candlestick_pattern(df, index=-1):
-        """Checks for Rejection Patterns (Engulfing, Pinbar)"""
+        """
+        Checks for Rejection Patterns (Engulfing, Pinbar) on bar `index`.
+        Reads the `pattern` column when the data layer computed it, else runs the
+        kernel on that bar and the one before it.
+        """
         try:
-            curr = df.iloc[index]
-            prev = df.iloc[index-1]
-            
-            # Helper for candle properties
-            def get_body(row): return abs(row['close'] - row['open'])
-            def is_bull(row): return row['close'] > row['open']
-            def is_bear(row): return row['close'] < row['open']
-            
-            curr_body = get_body(curr)
-            prev_body = get_body(prev)
-            
-            # 1. Engulfing
-            # Bullish Engulfing: Prev Bearish, Curr Bullish, Curr Body covers Prev Body
-            is_bull_engulfing = (
-                is_bear(prev) and 
-                is_bull(curr) and 
-                curr['close'] > prev['open'] and 
-                curr['open'] < prev['close']
-            )
-            
-            # Bearish Engulfing: Prev Bullish, Curr Bearish
-            is_bear_engulfing = (
-                is_bull(prev) and 
-                is_bear(curr) and 
-                curr['close'] < prev['open'] and 
-                curr['open'] > prev['close']
-            )
-            
-            if is_bull_engulfing: return "BULLISH_ENGULFING"
-            if is_bear_engulfing: return "BEARISH_ENGULFING"
-            
-            # 2. Pinbar (Rejection Candle)
-            # Long Wick, Small Body. Wick should be > 2/3 of total length
-            total_len = curr['high'] - curr['low']
-            if total_len == 0: return None
-            
-            ratio = curr_body / total_len
-            
-            # Bullish Pinbar (Hammer): Long Lower Wick
-            lower_wick = min(curr['close'], curr['open']) - curr['low']
-            if lower_wick > (total_len * 0.6): # 60% is wick
-                return "BULLISH_PINBAR"
-                
-            # Bearish Pinbar (Shooting Star): Long Upper Wick
-            upper_wick = curr['high'] - max(curr['close'], curr['open'])
-            if upper_wick > (total_len * 0.6):
-                return "BEARISH_PINBAR"
-                
-            return None
-            
+            bars = BarSeries.wrap(df)
+            if 'pattern' in bars:
+                return Indicators.PATTERN_NAMES[int(bars.at('pattern', index))]
+            i = index % len(bars)
+            window = slice(max(i - 1, 0), i + 1)
+            code = Indicators.pattern_codes(bars['open'][window], bars['high'][window],
+                                            bars['low'][window], bars['close'][window])[-1]
+            return Indicators.PATTERN_NAMES[code]
         except Exception as e:
             logging.error(f"Pattern Check Error: {e}")
             return None
-            
+
     @staticmethod
     def check_liquidity_sweep(df, lookback=10):
-        """Checks if current candle swept a recent High/Low (NON-REPAINT)"""
+        """
+        Checks if the last CLOSED candle swept the High/Low of the `lookback` bars
+        before it (NON-REPAINT). Reads the `sweep` column when the data layer
+        computed it (same lookback), else runs the kernel on the last lookback + 2 bars.
+        """
         try:
-            # NON-REPAINT: Use the last CLOSED candle
-            curr = df.iloc[-2]
-            
-            # Data Window: From -lookback-2 to -2 (Exclude current and completed)
-            # Actually we just need to look back from the candle BEFORE the completed one
-            data_window = df.iloc[-lookback-2:-2] 
-            
-            if data_window.empty: return None
-            
-            recent_low = data_window['low'].min()
-            recent_high = data_window['high'].max()
-            
-            sweep_status = None
-            
-            # Bullish Sweep: Price dipped below recent Low but closed above it
-            if curr['low'] < recent_low and curr['close'] > recent_low:
-                sweep_status = "BULL_SWEEP"
-            
-            # Bearish Sweep: Price poked above recent High but closed below it
-            if curr['high'] > recent_high and curr['close'] < recent_high:
-                sweep_status = "BEAR_SWEEP"
-                
-            return sweep_status
-            
+            bars = BarSeries.wrap(df)
+            if len(bars) < 3:
+                return None
+            if 'sweep' in bars and lookback == Indicators.SWEEP_LOOKBACK:
+                return Indicators.SWEEP_NAMES[int(bars.at('sweep', -2))]
+            tail = slice(-lookback - 2, None)
+            code = Indicators.sweep_codes(bars['high'][tail], bars['low'][tail], bars['close'][tail],
+                                          lookback=lookback)[-2]
+            return Indicators.SWEEP_NAMES[code]
         except Exception as e:
             return None
 
@@ -361,6 +462,8 @@ class Indicators:
         try:
             # We need at least 5 candles to form a fractal
             if len(df) < 5: return []
+            bars = BarSeries.wrap(df)
+            h, l = bars['high'], bars['low']
             
             # Iterate through valid range (leaving space for left/right neighbors)
             start_index = max(2, len(df) - 100)
@@ -383,19 +486,19 @@ class Indicators:
             
             for i in range(start_index, end_index):
                 # Swing High: Middle High > Left 2 Highs AND Middle High > Right 2 Highs
-                current_high = df.iloc[i]['high']
-                if (current_high > df.iloc[i-1]['high'] and 
-                    current_high > df.iloc[i-2]['high'] and 
-                    current_high > df.iloc[i+1]['high'] and 
-                    current_high > df.iloc[i+2]['high']):
+                current_high = h[i]
+                if (current_high > h[i-1] and 
+                    current_high > h[i-2] and 
+                    current_high > h[i+1] and 
+                    current_high > h[i+2]):
                     swings.append({'index': i, 'price': current_high, 'type': 'HIGH'})
                     
                 # Swing Low: Middle Low < Left 2 Lows AND Middle Low < Right 2 Lows
-                current_low = df.iloc[i]['low']
-                if (current_low < df.iloc[i-1]['low'] and 
-                    current_low < df.iloc[i-2]['low'] and 
-                    current_low < df.iloc[i+1]['low'] and 
-                    current_low < df.iloc[i+2]['low']):
+                current_low = l[i]
+                if (current_low < l[i-1] and 
+                    current_low < l[i-2] and 
+                    current_low < l[i+1] and 
+                    current_low < l[i+2]):
                     swings.append({'index': i, 'price': current_low, 'type': 'LOW'})
                     
             return swings
@@ -409,13 +512,13 @@ class Indicators:
         Checks for Market Structure Shift (MSS) based on BODY CLOSE.
         - Bullish MSS: Price closes above the most recent major Swing High.
         - Bearish MSS: Price closes below the most recent major Swing Low.
-        - NON-REPAINT: Uses df.iloc[-2] (Last Completed Candle)
+        - NON-REPAINT: Uses bar [-2] (Last Completed Candle)
         """
         try:
             if not swing_points or len(df) < 2: return None
             
             # NON-REPAINT: Use the last CLOSED candle
-            last_candle = df.iloc[-2]
+            last_close = BarSeries.wrap(df)['close'][-2]
             
             # Filter swings by type
             swing_highs = [s for s in swing_points if s['type'] == 'HIGH']
@@ -426,13 +529,13 @@ class Indicators:
             # Check Bullish MSS
             if swing_highs:
                 last_swing_high = swing_highs[-1]
-                if last_candle['close'] > last_swing_high['price']:
+                if last_close > last_swing_high['price']:
                     mss_status = "BULL_MSS"
             
             # Check Bearish MSS
             if swing_lows:
                 last_swing_low = swing_lows[-1]
-                if last_candle['close'] < last_swing_low['price']:
+                if last_close < last_swing_low['price']:
                     mss_status = "BEAR_MSS"
                     
             return mss_status
@@ -446,13 +549,14 @@ class Indicators:
         Checks if Inducement (IDM) has been swept.
         - Uptrend: Look for a recent Swing Low (IDM) to be swept.
         - Downtrend: Look for a recent Swing High (IDM) to be swept.
-        - NON-REPAINT: Uses df.iloc[-2] (Last Completed Candle)
+        - NON-REPAINT: Uses bar [-2] (Last Completed Candle)
         """
         try:
             if not swing_points or len(df) < 2: return False
             
             # NON-REPAINT: Use the last CLOSED candle
-            curr = df.iloc[-2]
+            bars = BarSeries.wrap(df)
+            curr_low, curr_high = bars['low'][-2], bars['high'][-2]
             swept = False
             
             if current_trend == "UP":
@@ -460,14 +564,14 @@ class Indicators:
                 recent_lows = [s for s in swing_points if s['type'] == 'LOW']
                 if recent_lows:
                     last_idm = recent_lows[-1] 
-                    if curr['low'] < last_idm['price']:
+                    if curr_low < last_idm['price']:
                          swept = True
             elif current_trend == "DOWN":
                 # In Down trend, we look for price to come back up to sweep a recent HIGH
                 recent_highs = [s for s in swing_points if s['type'] == 'HIGH']
                 if recent_highs:
                     last_idm = recent_highs[-1]
-                    if curr['high'] > last_idm['price']:
+                    if curr_high > last_idm['price']:
                         swept = True
                         
             return swept
@@ -475,3 +579,165 @@ class Indicators:
         except Exception as e:
             return False
 
+    # --- Whole-history kernels ---------------------------------------------------
+    # Row L of each result = what the single-bar function above returns on df[:L+1]
+    # (bar L is the newest / forming bar). Used by BaseStrategy.signals().
+
+    @staticmethod
+    def pattern_codes(o, h, l, c):
+        """
+        Engulfing / pinbar of every bar vs the bar before it, as int8 codes into PATTERN_NAMES.
+        Arrays are bars along axis 0 (1-D, or 2-D bars x symbols). Bar 0 has no previous
+        bar, so it can only be a pinbar.
+        """
+        o, h, l, c = (np.asarray(x, dtype=np.float64) for x in (o, h, l, c))
+        gap = np.full((1,) + o.shape[1:], np.nan)
+        p_open, p_close = np.concatenate((gap, o[:-1])), np.concatenate((gap, c[:-1]))
+        c_open, c_high, c_low, c_close = o, h, l, c
+
+        with np.errstate(invalid='ignore'):
+            bull_engulfing = (p_close < p_open) & (c_close > c_open) & (c_close > p_open) & (c_open < p_close)
+            bear_engulfing = (p_close > p_open) & (c_close < c_open) & (c_close < p_open) & (c_open > p_close)
+            total_len = c_high - c_low
+            bull_pinbar = (np.minimum(c_close, c_open) - c_low) > (total_len * 0.6)
+            bear_pinbar = (c_high - np.maximum(c_close, c_open)) > (total_len * 0.6)
+            has_range = total_len != 0
+
+        # Same precedence as the single-bar check
+        return np.select(
+            [bull_engulfing, bear_engulfing, has_range & bull_pinbar, has_range & bear_pinbar],
+            [1, 2, 3, 4], default=0).astype(np.int8)
+
+    @staticmethod
+    def sweep_codes(h, l, c, lookback=10):
+        """
+        Liquidity sweep of every bar vs the `lookback` bars before it, as int8 codes into
+        SWEEP_NAMES (bearish wins when a bar sweeps both sides). 1-D or 2-D (bars x symbols).
+        """
+        shape = np.shape(h)
+        window = lambda values: pd.DataFrame(np.reshape(values, (shape[0], -1))).rolling(lookback, min_periods=1)
+        recent_low = window(l).min().shift(1).to_numpy().reshape(shape)
+        recent_high = window(h).max().shift(1).to_numpy().reshape(shape)
+        with np.errstate(invalid='ignore'):
+            bull = (l < recent_low) & (c > recent_low)
+            bear = (h > recent_high) & (c < recent_high)
+        return np.where(bear, 2, np.where(bull, 1, 0)).astype(np.int8)
+
+    @staticmethod
+    def candlestick_pattern_codes(df):
+        """check_candlestick_pattern(df, i) for every bar i (codes into PATTERN_NAMES)"""
+        return Indicators.pattern_codes(*(np.asarray(df[k], dtype=np.float64) for k in ('open', 'high', 'low', 'close')))
+
+    @staticmethod
+    def liquidity_sweep_codes(df, lookback=10):
+        """Sweep code of every bar; check_liquidity_sweep(df[:L+1]) = codes[L-1] (codes into SWEEP_NAMES)"""
+        return Indicators.sweep_codes(*(np.asarray(df[k], dtype=np.float64) for k in ('high', 'low', 'close')),
+                                      lookback=lookback)
+
+    @staticmethod
+    def order_blocks_history(df, lookback=50, max_sl_points=500):
+        """
+        calculate_order_blocks(df[:L+1], lookback, max_sl_points) for every L.
+        Returns (bull_top, bull_bottom, bear_top, bear_bottom), NaN where there is no block.
+        One vectorized pass per bar offset (lookback passes in total).
+        """
+        bars = BarSeries.wrap(df)
+        o, h, l, c, atr = bars['open'], bars['high'], bars['low'], bars['close'], bars['atr']
+        n = len(o)
+        bull_top, bull_bottom = np.full(n, np.nan), np.full(n, np.nan)
+        bear_top, bear_bottom = np.full(n, np.nan), np.full(n, np.nan)
+
+        # Block candle i-1 before impulse candle i (facts that don't depend on L)
+        top, bottom = np.full(n, np.nan), np.full(n, np.nan)
+        top[1:], bottom[1:] = h[:-1], l[:-1]
+        mid = (top + bottom) / 2
+        prev_bear, prev_bull = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+        prev_bear[1:], prev_bull[1:] = c[:-1] < o[:-1], c[:-1] > o[:-1]
+        with np.errstate(invalid='ignore'):
+            impulse = ~np.isnan(atr) & (np.abs(c - o) > atr * 1.0)
+        not_too_wide = ~((top - bottom) > max_sl_points * 0.01)
+        index = np.arange(n)
+        bull_candidate = impulse & (c > o) & prev_bear & not_too_wide & (index >= 5)
+        bear_candidate = impulse & (c < o) & prev_bull & not_too_wide & (index >= 5)
+
+        # Lowest low / highest high of the bars after i up to L (grows by one bar per offset)
+        low_after = l.copy()
+        high_after = h.copy()
+        bull_found = np.zeros(n, dtype=bool)
+        bear_found = np.zeros(n, dtype=bool)
+        for d in range(1, lookback - 1):  # i = L - d, newest first
+            if d >= n:
+                break
+            last = slice(d, n)     # Rows L with i = L - d >= 0
+            block = slice(0, n - d)
+            hit = bull_candidate[block] & ~bull_found[last] & ~(low_after[last] < mid[block]) & (c[last] > bottom[block])
+            rows = np.flatnonzero(hit) + d
+            bull_top[rows], bull_bottom[rows] = top[rows - d], bottom[rows - d]
+            bull_found[rows] = True
+
+            hit = bear_candidate[block] & ~bear_found[last] & ~(high_after[last] > mid[block]) & (c[last] < top[block])
+            rows = np.flatnonzero(hit) + d
+            bear_top[rows], bear_bottom[rows] = top[rows - d], bottom[rows - d]
+            bear_found[rows] = True
+
+            # Include bar i = L - d for the next (older) offset
+            np.minimum(low_after[last], l[block], out=low_after[last])
+            np.maximum(high_after[last], h[block], out=high_after[last])
+        return bull_top, bull_bottom, bear_top, bear_bottom
+
+    @staticmethod
+    def fvg_match_history(df, price, lookback=10):
+        """
+        For every L: is price[L] inside one of the gaps calculate_fvg(df[:L+1], lookback) returns?
+        Returns (in_bull_fvg, in_bear_fvg) bool arrays.
+        """
+        bars = BarSeries.wrap(df)
+        o, h, l, c, atr = bars['open'], bars['high'], bars['low'], bars['close'], bars['atr']
+        n = len(o)
+        # Gap with third candle j (j-1 = gap candle, j-2 = first candle)
+        gap_low, gap_high = np.full(n, np.nan), np.full(n, np.nan)  # h[j-2], l[j-2]
+        body, bullish, bearish = np.full(n, np.nan), np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+        gap_low[2:], gap_high[2:] = h[:-2], l[:-2]
+        body[1:] = np.abs(c[:-1] - o[:-1])
+        bullish[1:], bearish[1:] = c[:-1] > o[:-1], c[:-1] < o[:-1]
+        with np.errstate(invalid='ignore'):
+            big_body = body > atr * 0.5
+            bull = (gap_low < l) & bullish & big_body
+            bear = (gap_high > h) & bearish & big_body
+
+        in_bull, in_bear = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+        for d in range(1, lookback - 1):  # j = L - d
+            if d >= n:
+                break
+            last = slice(d, n)
+            gap = slice(0, n - d)
+            p = price[last]
+            in_bull[last] |= bull[gap] & (np.minimum(gap_low[gap], l[gap]) <= p) & (p <= np.maximum(gap_low[gap], l[gap]))
+            in_bear[last] |= bear[gap] & (np.minimum(h[gap], gap_high[gap]) <= p) & (p <= np.maximum(h[gap], gap_high[gap]))
+        return in_bull, in_bear
+
+    @staticmethod
+    def swing_flags(df):
+        """(is_swing_high, is_swing_low) per bar: the 2-left / 2-right fractal of identify_swing_points"""
+        bars = BarSeries.wrap(df)
+        h, l = bars['high'], bars['low']
+        n = len(h)
+        is_high, is_low = np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+        if n >= 5:
+            mid = slice(2, n - 2)
+            is_high[mid] = (h[mid] > h[1:n-3]) & (h[mid] > h[0:n-4]) & (h[mid] > h[3:n-1]) & (h[mid] > h[4:n])
+            is_low[mid] = (l[mid] < l[1:n-3]) & (l[mid] < l[0:n-4]) & (l[mid] < l[3:n-1]) & (l[mid] < l[4:n])
+        return is_high, is_low
+
+    @staticmethod
+    def last_swing_history(flags, window=100):
+        """
+        For every L: index of the newest swing in identify_swing_points(df[:L+1]) (it scans
+        i in [max(2, L+1-window), L-2]), -1 if there is none.
+        """
+        n = len(flags)
+        newest = np.maximum.accumulate(np.where(flags, np.arange(n), -1))
+        last = np.full(n, -1)
+        last[2:] = newest[:-2]
+        oldest_allowed = np.maximum(2, np.arange(n) + 1 - window)
+        return np.where(last >= oldest_allowed, last, -1)
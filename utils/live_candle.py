@@ -0,0 +1,290 @@
+import math
+
+from utils.mt5_gateway import terminal as mt5
+import numpy as np
+import pandas as pd
+
+from utils.bar_series import BarSeries
+from utils.indicator_graph import IndicatorEngine, normalize_requests
+from utils.indicators import Indicators
+from utils.resampler import TIMEFRAME_SECONDS
+
+
+class EwmState:
+    """
+    pandas ewm(...).mean() one value at a time, with the same arithmetic as pandas
+    (so the last value matches a full recompute).
+    """
+    __slots__ = ('adjust', 'factor', 'new_wt', 'weighted', 'old_wt')
+
+    def __init__(self, alpha, adjust):
+        self.adjust = adjust
+        self.factor = 1.0 - alpha
+        self.new_wt = 1.0 if adjust else alpha
+        self.weighted = math.nan
+        self.old_wt = 1.0
+
+    def update(self, x):
+        if self.weighted == self.weighted:
+            self.old_wt *= self.factor
+            if x == x:
+                if self.weighted != x:
+                    self.weighted = (self.old_wt * self.weighted + self.new_wt * x) / (self.old_wt + self.new_wt)
+                if self.adjust:
+                    self.old_wt += self.new_wt
+                else:
+                    self.old_wt = 1.0
+        elif x == x:
+            self.weighted = x
+        return self.weighted
+
+    def peek(self, x):
+        """Value after `x` without changing the state"""
+        saved = (self.weighted, self.old_wt)
+        value = self.update(x)
+        self.weighted, self.old_wt = saved
+        return value
+
+
+def _ema(span):
+    return EwmState(2.0 / (span + 1), adjust=False)
+
+
+# --- Last-value nodes: state is built from closed bars, value() only uses the forming bar ---
+
+class _EmaLast:
+    def __init__(self, p, closed):
+        self.ema = _ema(p['period'])
+        for x in closed['close']:
+            self.ema.update(x)
+
+    def value(self, o, h, l, c):
+        return {'ema_trend': self.ema.peek(c)}
+
+
+class _MacdLast:
+    def __init__(self, p, closed):
+        self.fast, self.slow, self.signal = _ema(p['fast']), _ema(p['slow']), _ema(p['signal'])
+        for x in closed['close']:
+            self.signal.update(self.fast.update(x) - self.slow.update(x))
+
+    def value(self, o, h, l, c):
+        line = self.fast.peek(c) - self.slow.peek(c)
+        return {'macd_line': line, 'macd_signal': self.signal.peek(line)}
+
+
+class _RsiLast:
+    def __init__(self, p, closed):
+        alpha = 1 / p['period']
+        self.gain, self.loss = EwmState(alpha, False), EwmState(alpha, False)
+        close = closed['close']
+        delta = np.diff(close, prepend=np.nan)
+        for d in delta:
+            self.gain.update(d if d > 0 else 0.0)
+            self.loss.update(-(d if d < 0 else 0.0))
+        self.prev_close = close[-1] if len(close) else math.nan
+
+    def value(self, o, h, l, c):
+        d = c - self.prev_close
+        gain = self.gain.peek(d if d > 0 else 0.0)
+        loss = self.loss.peek(-(d if d < 0 else 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = np.float64(gain) / np.float64(loss)
+            return {'rsi': 100 - (100 / (1 + rs))}
+
+
+class _BollingerLast:
+    def __init__(self, p, closed):
+        self.period, self.std = p['period'], p['std']
+        self.window = closed['close'][-(self.period - 1):].copy() if self.period > 1 else np.empty(0)
+
+    def value(self, o, h, l, c):
+        if len(self.window) < self.period - 1:
+            return {'bb_upper': math.nan, 'bb_middle': math.nan, 'bb_lower': math.nan}
+        values = np.append(self.window, c)
+        sma = values.mean()
+        std = values.std(ddof=1) if self.period > 1 else math.nan
+        return {'bb_upper': sma + std * self.std, 'bb_middle': sma, 'bb_lower': sma - std * self.std}
+
+
+def _true_range(h, l, prev_c):
+    return np.fmax(np.fmax(h - l, abs(h - prev_c)), abs(l - prev_c))
+
+
+class _TrueRangeLast:
+    def __init__(self, p, closed):
+        self.prev_close = closed['close'][-1] if len(closed) else math.nan
+
+    def value(self, o, h, l, c):
+        return {'true_range': _true_range(h, l, self.prev_close)}
+
+
+class _AtrLast:
+    def __init__(self, p, closed):
+        self.period = p['period']
+        high, low, close = closed['high'], closed['low'], closed['close']
+        tr = _true_range(high, low, np.concatenate(([np.nan], close[:-1])))
+        self.window = tr[-(self.period - 1):] if self.period > 1 else np.empty(0)
+        self.prev_close = close[-1] if len(close) else math.nan
+
+    def value(self, o, h, l, c):
+        if len(self.window) < self.period - 1 or np.isnan(self.window).any():
+            return {'atr': math.nan}
+        tr = _true_range(h, l, self.prev_close)
+        return {'atr': (self.window.sum() + tr) / self.period}
+
+
+class _AdxLast:
+    """Same steps as Indicators.calculate_adx, replayed bar by bar over the closed bars"""
+    def __init__(self, p, closed):
+        self.period = period = p['period']
+        alpha = 1 / period
+        self.plus, self.minus, self.adx = EwmState(alpha, True), EwmState(alpha, True), EwmState(alpha, True)
+        self.atr = _AtrLast(p, closed)
+
+        high, low, close = closed['high'], closed['low'], closed['close']
+        frame = pd.DataFrame({'high': high, 'low': low, 'close': close})
+        atr = IndicatorEngine().compute(frame, {'atr': {'period': period}})['atr'].to_numpy()
+
+        self.prev_high = self.prev_low = math.nan
+        self.prev_dx = math.nan
+        for i in range(len(close)):
+            self.prev_dx = self._step(high[i], low[i], atr[i], commit=True)
+
+    def _step(self, h, l, atr, commit):
+        plus_dm = h - self.prev_high
+        minus_dm = l - self.prev_low
+        if plus_dm < 0: plus_dm = 0.0
+        if minus_dm > 0: minus_dm = 0.0
+        update = (lambda s, x: s.update(x)) if commit else (lambda s, x: s.peek(x))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            plus_di = 100 * (np.float64(update(self.plus, plus_dm)) / atr)
+            minus_di = 100 * (np.float64(update(self.minus, abs(minus_dm))) / atr)
+            dx = (abs(plus_di - minus_di) / abs(plus_di + minus_di)) * 100
+        adx = ((self.prev_dx * (self.period - 1)) + dx) / self.period
+        smooth = update(self.adx, adx)
+        if commit:
+            self.prev_high, self.prev_low = h, l
+            return dx
+        return smooth
+
+    def value(self, o, h, l, c):
+        atr = self.atr.value(o, h, l, c)['atr']
+        return {'adx': self._step(h, l, atr, commit=False)}
+
+
+class _PatternLast:
+    def __init__(self, p, closed):
+        self.prev = (closed['open'][-1:], closed['high'][-1:], closed['low'][-1:], closed['close'][-1:])
+
+    def value(self, o, h, l, c):
+        bars = [np.append(prev, x) for prev, x in zip(self.prev, (o, h, l, c))]
+        return {'pattern': float(Indicators.pattern_codes(*bars)[-1])}
+
+
+class _SweepLast:
+    def __init__(self, p, closed):
+        self.lookback = p['lookback']
+        self.prev = tuple(closed[name][-self.lookback:] for name in ('high', 'low', 'close'))
+
+    def value(self, o, h, l, c):
+        bars = [np.append(prev, x) for prev, x in zip(self.prev, (h, l, c))]
+        return {'sweep': float(Indicators.sweep_codes(*bars, lookback=self.lookback)[-1])}
+
+
+class _DealingRangeLast:
+    def __init__(self, p, closed):
+        window = p['lookback'] - 1
+        self.high = closed['high'][-window:].max() if window > 0 and len(closed) else math.nan
+        self.low = closed['low'][-window:].min() if window > 0 and len(closed) else math.nan
+
+    def value(self, o, h, l, c):
+        high, low = np.fmax(self.high, h), np.fmin(self.low, l)
+        values = {name: float(v) for name, v in Indicators.range_levels(high, low).items()}
+        values.update({'range_high': float(high), 'range_low': float(low)})
+        return values
+
+
+LAST_VALUE_NODES = {
+    'ema_trend': _EmaLast,
+    'macd': _MacdLast,
+    'rsi': _RsiLast,
+    'bollinger': _BollingerLast,
+    'true_range': _TrueRangeLast,
+    'atr': _AtrLast,
+    'adx': _AdxLast,
+    'pattern': _PatternLast,
+    'sweep': _SweepLast,
+    'dealing_range': _DealingRangeLast,
+}
+
+
+class LiveCandle:
+    """
+    Forming candle built from ticks (copy_ticks_from) on top of frozen closed bars.
+    - reset(df): takes a full fetch (closed bars + forming bar, indicators computed)
+      and freezes each requested indicator's state at the last closed bar
+    - poll(): pulls only the ticks since the last one seen, updates the forming
+      bar's OHLC (bid, like MT5 candles) and recomputes the last indicator values.
+      Returns False when a tick belongs to the next candle -> caller does a full refresh.
+    """
+    def __init__(self, symbol, timeframe, requests, terminal=None):
+        self.symbol = symbol
+        self.tf_seconds = TIMEFRAME_SECONDS[timeframe]
+        self.requests = normalize_requests(requests)
+        self.terminal = terminal or mt5
+        self.bars = None
+        self.nodes = []
+        self.last_tick_msc = 0
+        self.bar_end = 0
+
+    def reset(self, df):
+        bars = BarSeries.wrap(df)
+        if len(bars) < 2:
+            return False
+        # Own copies: the forming row is rewritten in place on every poll
+        self.bars = BarSeries({name: values.copy() for name, values in bars.columns.items()}, time=bars.time.copy())
+        closed = self.bars.slice(None, -1)
+
+        _, _, column_keys = IndicatorEngine().plan(self.requests)
+        columns_of = {}
+        for col, key in column_keys.items():
+            columns_of.setdefault(key, []).append(col)
+        self.nodes = [(LAST_VALUE_NODES[key[0]](dict(key[1]), closed), cols) for key, cols in columns_of.items()]
+
+        tick = self.terminal.symbol_info_tick(self.symbol)
+        if tick is None:
+            return False
+        self.last_tick_msc = tick.time_msc
+        bar_time = int(self.bars.time[-1].astype('datetime64[s]').astype(np.int64))
+        self.bar_end = bar_time + self.tf_seconds
+        return True
+
+    def poll(self):
+        """True if the forming candle is up to date, False if a full refresh is needed"""
+        if self.bars is None:
+            return False
+        ticks = self.terminal.copy_ticks_from(self.symbol, self.last_tick_msc // 1000, 100000, self.terminal.COPY_TICKS_ALL)
+        if ticks is None:
+            return False
+        if len(ticks) == 0:
+            return True
+        ticks = ticks[(ticks['time_msc'] > self.last_tick_msc) & (ticks['bid'] > 0)]
+        if len(ticks) == 0:
+            return True
+        if ticks['time'][-1] >= self.bar_end:
+            return False  # New candle opened
+
+        bids = ticks['bid']
+        high, low, close = self.bars['high'], self.bars['low'], self.bars['close']
+        high[-1] = max(high[-1], bids.max())
+        low[-1] = min(low[-1], bids.min())
+        close[-1] = bids[-1]
+        self.last_tick_msc = int(ticks['time_msc'][-1])
+
+        o, h, l, c = self.bars['open'][-1], high[-1], low[-1], close[-1]
+        for node, cols in self.nodes:
+            values = node.value(o, h, l, c)
+            for col in cols:
+                self.bars[col][-1] = values[col]
+        return True
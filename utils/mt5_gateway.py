@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from config.settings import Config
+
+# Read-only calls: identical calls inside the coalesce window share one terminal round trip
+READ_FUNCTIONS = frozenset({
+    'terminal_info', 'account_info', 'version',
+    'symbols_total', 'symbols_get', 'symbol_info', 'symbol_info_tick',
+    'copy_rates_from', 'copy_rates_from_pos', 'copy_rates_range',
+    'copy_ticks_from', 'copy_ticks_range',
+    'orders_total', 'orders_get', 'positions_total', 'positions_get',
+    'history_orders_total', 'history_orders_get', 'history_deals_total', 'history_deals_get',
+    'order_calc_margin', 'order_calc_profit',
+})
+
+# Calls that don't change anything in the terminal (last_error must see the real previous call)
+PASSIVE_FUNCTIONS = frozenset({'last_error', 'order_check'})
+
+
+class _RateBudget:
+    """Token bucket: `rate` calls per second, bursts up to `rate`"""
+    __slots__ = ('rate', 'tokens', 'stamp', 'lock')
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.tokens = self.rate
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Takes one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+                delay = (1.0 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class TerminalGateway:
+    """
+    Single entry point to the MetaTrader5 module. Constants (mt5.ORDER_TYPE_BUY, ...)
+    pass through; every function call is:
+    - Serialised: one lock, so the signal loop, the position-protection thread and
+      any other worker never talk to the terminal at the same time
+    - Coalesced (reads only): an identical call (same function + arguments) within
+      `coalesce_ms` of the last one returns that result instead of a new round trip.
+      Any other call (order_send, symbol_select, initialize...) clears the cache.
+    - Rate limited: functions listed in `rate_limits` ({name: calls per second})
+      wait for their budget before reaching the terminal
+    - Measured: calls, coalesced hits, throttle wait and terminal latency per function
+
+    - Lazy: the MetaTrader5 package is imported on first use, so tools that only
+      import modules which reference the gateway start without the terminal
+
+    Usage: `from utils.mt5_gateway import terminal as mt5`
+    """
+    def __init__(self, module=None, coalesce_ms=None, rate_limits=None):
+        self._module = module  # None -> MetaTrader5, imported on first use
+        self._lock = threading.RLock()
+        self._wrapped = {}
+        self._cache = {}  # (name, args, kwargs) -> (monotonic time, result)
+        self.coalesce_seconds = (coalesce_ms if coalesce_ms is not None else Config.GATEWAY_COALESCE_MS) / 1000
+        limits = rate_limits if rate_limits is not None else Config.GATEWAY_RATE_LIMITS
+        self._budgets = {name: _RateBudget(rate) for name, rate in limits.items() if rate}
+        self.stats = {}
+
+    def _terminal(self):
+        if self._module is None:
+            import MetaTrader5
+            self._module = MetaTrader5
+        return self._module
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)  # copy / pickle probes must not import the terminal
+        attr = getattr(self._terminal(), name)
+        if not callable(attr):
+            return attr
+        fn = self._wrapped.get(name)
+        if fn is None:
+            fn = self._wrap(name, attr)
+            self._wrapped[name] = fn
+        return fn
+
+    def _wrap(self, name, attr):
+        lock = self._lock
+        budget = self._budgets.get(name)
+        is_read = name in READ_FUNCTIONS
+        is_passive = is_read or name in PASSIVE_FUNCTIONS
+        entry = self.stats.setdefault(name, {'calls': 0, 'coalesced': 0, 'throttled': 0, 'wait': 0.0, 'seconds': 0.0, 'max': 0.0})
+
+        def fn(*args, **kwargs):
+            key = None
+            if is_read and self.coalesce_seconds > 0:
+                key = (name, args, tuple(sorted(kwargs.items())))
+                try:
+                    hash(key)
+                except TypeError:
+                    key = None
+                hit = self._cached(key)
+                if hit is not None:
+                    entry['coalesced'] += 1
+                    return hit
+
+            if budget is not None:
+                waited = budget.acquire()
+                if waited:
+                    entry['throttled'] += 1
+                    entry['wait'] += waited
+
+            with lock:
+                # Another thread may have made the same call while we waited for the lock
+                hit = self._cached(key)
+                if hit is not None:
+                    entry['coalesced'] += 1
+                    return hit
+
+                start = time.perf_counter()
+                try:
+                    result = attr(*args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    entry['calls'] += 1
+                    entry['seconds'] += elapsed
+                    if elapsed > entry['max']:
+                        entry['max'] = elapsed
+
+                if not is_passive:
+                    self._cache.clear()
+                elif key is not None and result is not None:
+                    self._store(key, result)
+            return result
+        fn.__name__ = name
+        return fn
+
+    def _store(self, key, result):
+        now = time.monotonic()
+        if len(self._cache) >= 256:
+            # Varying arguments (history date ranges...) would otherwise pile up
+            self._cache = {k: v for k, v in self._cache.items() if now - v[0] <= self.coalesce_seconds}
+        # Arrays (rates / ticks) are mutable: keep our own copy, hand out copies
+        self._cache[key] = (now, result.copy() if isinstance(result, np.ndarray) else result)
+
+    def _cached(self, key):
+        if key is None:
+            return None
+        hit = self._cache.get(key)
+        if hit is None:
+            return None
+        stamp, result = hit
+        if time.monotonic() - stamp > self.coalesce_seconds:
+            return None
+        return result.copy() if isinstance(result, np.ndarray) else result
+
+    def invalidate(self):
+        """Drops every coalesced result (the next read goes to the terminal)"""
+        with self._lock:
+            self._cache.clear()
+
+    def report(self):
+        """One line per function: terminal calls, coalesced hits, throttling and latency"""
+        lines = []
+        for name, entry in sorted(self.stats.items(), key=lambda item: -item[1]['seconds']):
+            if not entry['calls'] and not entry['coalesced']:
+                continue
+            avg_ms = entry['seconds'] / entry['calls'] * 1000 if entry['calls'] else 0.0
+            line = f"{name}: {entry['calls']} calls | avg {avg_ms:.2f} ms | max {entry['max'] * 1000:.1f} ms"
+            if entry['coalesced']:
+                line += f" | coalesced {entry['coalesced']}"
+            if entry['throttled']:
+                line += f" | throttled {entry['throttled']} ({entry['wait']:.1f}s)"
+            lines.append(line)
+        return " | ".join(lines)
+
+    def log_report(self):
+        report = self.report()
+        if report:
+            logging.info(f"📞 MT5 Calls -> {report}")
+
+
+terminal = TerminalGateway()
@@ -34,9 +34,12 @@ class NewsManager:
         except Exception as e:
             logging.error(f"❌ Error fetching news: {e}")
 
-    def is_news_time(self, avoid_minutes=30):
-        """Checks if current time is within the 'avoid' window of any high-impact news."""
-        if not self.news_events:
+    def is_news_time(self, avoid_minutes=30, refresh=True):
+        """
+        Checks if current time is within the 'avoid' window of any high-impact news.
+        `refresh=False`: only the calendar already downloaded (fetch_news() runs elsewhere, e.g. a runtime task).
+        """
+        if refresh and not self.news_events:
             self.fetch_news()
             
         # Use UTC for all comparisons to prevent timezone issues
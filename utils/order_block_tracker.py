@@ -0,0 +1,145 @@
+import math
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from utils.bar_series import BarSeries
+
+
+class _BlockStack:
+    """
+    Live (unmitigated) order blocks of one side, oldest first.
+    Bullish: a live block's bottom (the low of a later bar) is >= the mid of every
+    older live block, so mids and bottoms are both non-decreasing:
+    - mitigation by a bar's low removes a suffix (pop from the end)
+    - "newest block with mid <= x and bottom < y" is a prefix -> two bisects
+    Bearish blocks are stored with negated prices so the same ordering holds.
+    """
+    __slots__ = ('sign', 'seqs', 'mids', 'bottoms', 'zones')
+
+    def __init__(self, sign):
+        self.sign = sign
+        self.seqs = []     # Bar number of the impulse candle
+        self.mids = []     # sign * (top + bottom) / 2
+        self.bottoms = []  # Bullish: bottom | Bearish: -top
+        self.zones = []    # (top, bottom) as calculate_order_blocks returns it
+
+    def mitigate(self, extreme):
+        """`extreme`: sign * the closed bar's low (bull) / high (bear)"""
+        mids = self.mids
+        while mids and mids[-1] > extreme:
+            mids.pop()
+            self.seqs.pop()
+            self.bottoms.pop()
+            self.zones.pop()
+
+    def push(self, seq, top, bottom):
+        self.seqs.append(seq)
+        self.mids.append(self.sign * ((top + bottom) / 2))
+        self.bottoms.append(bottom if self.sign > 0 else -top)
+        self.zones.append((top, bottom))
+
+    def expire(self, min_seq):
+        k = bisect_left(self.seqs, min_seq)
+        if k:
+            del self.seqs[:k], self.mids[:k], self.bottoms[:k], self.zones[:k]
+
+    def newest(self, extreme, close):
+        """Newest block not mitigated by `extreme` with close beyond its far edge (O(log n))"""
+        k = min(bisect_right(self.mids, extreme), bisect_left(self.bottoms, close))
+        return self.zones[k - 1] if k else None
+
+
+class OrderBlockTracker:
+    """
+    calculate_order_blocks() kept up to date bar by bar instead of rescanning
+    `lookback` bars on every tick.
+    - update(bars): folds in closed bars newer than the last call (the last row is
+      the forming bar, as returned by copy_rates_from_pos(..., 0, n)). Each closed
+      bar mitigates live blocks with its own low / high, then may add a new block
+      (impulse candle + opposite candle before it; too wide for `max_sl_points` -> never added)
+    - order_blocks(): (bull_ob, bear_ob) for the forming bar, same result as
+      Indicators.calculate_order_blocks(bars, lookback, max_sl_points)
+    - snapshot() / restore(): plain-dict state for warm restarts
+    """
+    def __init__(self, lookback=50, max_sl_points=500):
+        self.lookback = lookback
+        self.max_sl_points = max_sl_points
+        self.reset()
+
+    def reset(self):
+        self.bull = _BlockStack(1)
+        self.bear = _BlockStack(-1)
+        self.count = 0           # Closed bars folded in (= bar number of the forming bar)
+        self.last_time = None    # Time of the last closed bar folded in (epoch seconds)
+        self.prev = None         # (open, high, low, close) of that bar
+        self.forming = None      # (high, low, close) of the forming bar
+
+    def _close_bar(self, t, o, h, l, c, atr):
+        seq = self.count
+        self.bull.mitigate(l)
+        self.bear.mitigate(-h)
+        if self.prev is not None and seq >= 5 and not math.isnan(atr) and abs(c - o) > atr * 1.0:
+            p_open, p_high, p_low, p_close = self.prev
+            if not (p_high - p_low) > self.max_sl_points * 0.01:
+                if c > o and p_close < p_open:
+                    self.bull.push(seq, p_high, p_low)
+                elif c < o and p_close > p_open:
+                    self.bear.push(seq, p_high, p_low)
+        self.prev = (o, h, l, c)
+        self.last_time = t
+        self.count += 1
+
+    def update(self, data):
+        bars = BarSeries.wrap(data)
+        if bars is None or len(bars) == 0:
+            return
+        o, h, l, c, atr = bars['open'], bars['high'], bars['low'], bars['close'], bars['atr']
+        if self.last_time is not None and len(bars) > 1 and \
+                int(bars.time[-2:-1].astype('datetime64[s]').astype(np.int64)[0]) == self.last_time:
+            self.forming = (h[-1], l[-1], c[-1])  # Same forming bar as the last call: nothing to fold
+            return
+        times = bars.time.astype('datetime64[s]').astype(np.int64)
+
+        start = 0
+        if self.last_time is not None:
+            if times[0] > self.last_time:
+                self.reset()  # Bars between the last call and this window are missing: rebuild
+            else:
+                start = int(np.searchsorted(times, self.last_time, side='right'))
+        for i in range(start, len(times) - 1):
+            self._close_bar(int(times[i]), o[i], h[i], l[i], c[i], atr[i])
+        self.forming = (h[-1], l[-1], c[-1])
+
+    def order_blocks(self):
+        if self.forming is None:
+            return None, None
+        high, low, close = self.forming
+        # Impulse candles newer than `lookback - 2` bars before the forming one
+        min_seq = self.count - self.lookback + 2
+        self.bull.expire(min_seq)
+        self.bear.expire(min_seq)
+        return self.bull.newest(low, close), self.bear.newest(-high, -close)
+
+    def snapshot(self):
+        def side(stack):
+            return {'seqs': list(stack.seqs), 'zones': [list(z) for z in stack.zones]}
+        return {
+            'lookback': self.lookback, 'max_sl_points': self.max_sl_points,
+            'count': self.count, 'last_time': self.last_time,
+            'prev': list(self.prev) if self.prev is not None else None,
+            'bull': side(self.bull), 'bear': side(self.bear),
+        }
+
+    def restore(self, state):
+        """Loads a snapshot() taken with the same settings (returns False and keeps the state otherwise)"""
+        if (state.get('lookback'), state.get('max_sl_points')) != (self.lookback, self.max_sl_points):
+            return False
+        self.reset()
+        self.count = state['count']
+        self.last_time = state['last_time']
+        self.prev = tuple(state['prev']) if state['prev'] is not None else None
+        for stack, saved in ((self.bull, state['bull']), (self.bear, state['bear'])):
+            for seq, (top, bottom) in zip(saved['seqs'], saved['zones']):
+                stack.push(seq, top, bottom)
+        return True
@@ -0,0 +1,211 @@
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.mt5_gateway import terminal as mt5
+
+# Missing constants in some MT5 versions
+SYMBOL_FILLING_FOK = 1
+SYMBOL_FILLING_IOC = 2
+SYMBOL_FILLING_RETURN = 4
+
+# Market moved between the tick we priced at and the server: resend at a fresh price
+# (MT5 retcode values, so importing this module doesn't load the terminal package)
+REQUOTE_RETCODES = (
+    10004,  # TRADE_RETCODE_REQUOTE
+    10020,  # TRADE_RETCODE_PRICE_CHANGED
+    10021,  # TRADE_RETCODE_PRICE_OFF
+)
+
+
+def filling_type_for(symbol_info):
+    """Order filling type the symbol accepts (IOC > FOK > RETURN)"""
+    filling_mode = symbol_info.filling_mode
+    if filling_mode & SYMBOL_FILLING_IOC:
+        return mt5.ORDER_FILLING_IOC
+    elif filling_mode & SYMBOL_FILLING_FOK:
+        return mt5.ORDER_FILLING_FOK
+    return mt5.ORDER_FILLING_RETURN
+
+
+class OrderTemplate:
+    """
+    Everything about a market order that doesn't change between signals, built once
+    per (symbol, magic): the request skeleton (action, filling, deviation, magic,
+    time type) and the symbol facts used for sizing (point, tick value, lot limits),
+    named like symbol_info's so it can stand in for it.
+    """
+    __slots__ = ('symbol', 'magic', 'request', 'point', 'digits', 'trade_tick_value', 'trade_tick_size',
+                 'volume_min', 'volume_max', 'volume_step', 'built_at')
+
+    def __init__(self, symbol, magic, symbol_info, deviation, comment=""):
+        self.symbol = symbol
+        self.magic = magic
+        self.point = symbol_info.point
+        self.digits = symbol_info.digits
+        self.trade_tick_value = symbol_info.trade_tick_value
+        self.trade_tick_size = symbol_info.trade_tick_size
+        self.volume_min = symbol_info.volume_min
+        self.volume_max = symbol_info.volume_max
+        self.volume_step = symbol_info.volume_step
+        self.built_at = time.time()
+        self.request = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": symbol,
+            "deviation": deviation,
+            "magic": magic,
+            "comment": comment,
+            "type_time": mt5.ORDER_TIME_GTC,
+            "type_filling": filling_type_for(symbol_info),
+        }
+
+
+class OrderExecutor:
+    """
+    Market entries on the shortest path to the terminal (shared by both bots).
+    - Templates per (symbol, magic) are prepared ahead of time (prepare()) and
+      re-read every `template_ttl` seconds; at send time only the tick is read
+    - Requote / price changed / price off -> resend at a fresh tick, at most
+      `max_retries` times, `retry_delay` seconds apart
+    - Signal-to-fill latency (`signal_time` = time.perf_counter() when the signal
+      was produced) is logged and kept for report()
+    - Every fill (decision / request / fill price, spread, latency) goes to
+      `fill_log` (utils/fill_quality.FillLog) when given
+    """
+    def __init__(self, magic, deviation=20, comment="", max_retries=3, retry_delay=0.05,
+                 template_ttl=3600, history=500, strategy="", fill_log=None):
+        self.magic = magic
+        self.deviation = deviation
+        self.comment = comment
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.template_ttl = template_ttl
+        self.strategy = strategy
+        self.fill_log = fill_log
+        self.templates = {}
+        self.fills = deque(maxlen=history)  # Per-order latency records
+
+    def prepare(self, symbol, magic=None):
+        """Builds (or rebuilds) the template for `symbol`. Returns None if the symbol is unavailable."""
+        magic = self.magic if magic is None else magic
+        symbol_info = mt5.symbol_info(symbol)
+        if symbol_info is None:
+            logging.error(f"❌ Order Template: {symbol} not found")
+            return None
+        template = OrderTemplate(symbol, magic, symbol_info, self.deviation, self.comment)
+        self.templates[(symbol, magic)] = template
+        return template
+
+    def template(self, symbol, magic=None):
+        magic = self.magic if magic is None else magic
+        template = self.templates.get((symbol, magic))
+        if template is None or time.time() - template.built_at > self.template_ttl:
+            template = self.prepare(symbol, magic) or template
+        return template
+
+    @staticmethod
+    def market_price(tick, order_type):
+        return tick.ask if order_type == mt5.ORDER_TYPE_BUY else tick.bid
+
+    def send(self, symbol, order_type, volume, sl=0.0, tp=0.0, comment=None, magic=None, signal_time=None,
+             decision_price=None, spread_points=None):
+        """
+        Sends a market order priced at the latest tick. Returns the last order_send
+        result (check retcode) or None if nothing could be sent.
+        `decision_price` / `spread_points`: the tick the signal was priced from (fill quality).
+        """
+        template = self.template(symbol, magic)
+        if template is None:
+            return None
+
+        request = dict(template.request)
+        request["type"] = order_type
+        request["volume"] = float(volume)
+        request["sl"] = float(sl)
+        request["tp"] = float(tp)
+        if comment is not None:
+            request["comment"] = comment
+
+        sent_at = time.perf_counter()
+        result = None
+        attempts = 0
+        requested_price = None
+        tick = None
+        while attempts <= self.max_retries:
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None:
+                logging.error(f"❌ Order {symbol}: No tick ({mt5.last_error()})")
+                return result
+            request["price"] = requested_price = self.market_price(tick, order_type)
+            attempts += 1
+            result = mt5.order_send(request)
+            if result is None:
+                logging.error(f"❌ order_send() returned None ({mt5.last_error()})")
+                return None
+            if result.retcode not in REQUOTE_RETCODES:
+                break
+            logging.warning(f"⚠️ Requote/Price Off {symbol} (Attempt {attempts}/{self.max_retries + 1}): {result.comment}")
+            if attempts <= self.max_retries:
+                time.sleep(self.retry_delay)
+
+        if result.retcode == mt5.TRADE_RETCODE_DONE:
+            filled_at = time.perf_counter()
+            start = signal_time if signal_time is not None else sent_at
+            record = {
+                # Server time of the tick we sent at (same clock as rates / deals)
+                'time': datetime.fromtimestamp(tick.time_msc / 1000, timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+                'ticket': result.order,
+                'deal': result.deal,
+                'symbol': symbol,
+                'strategy': self.strategy,
+                'side': "BUY" if order_type == mt5.ORDER_TYPE_BUY else "SELL",
+                'volume': result.volume or request["volume"],
+                'decision_price': decision_price if decision_price is not None else requested_price,
+                'request_price': requested_price,
+                'fill_price': result.price or requested_price,
+                'spread_points': spread_points if spread_points is not None else round((tick.ask - tick.bid) / template.point),
+                'point': template.point,
+                'value_per_point': self.value_per_point(template),
+                'attempts': attempts,
+                'latency_ms': round((filled_at - start) * 1000, 1),
+                'send_ms': round((filled_at - sent_at) * 1000, 1),
+            }
+            self._record(record)
+        return result
+
+    @staticmethod
+    def value_per_point(template):
+        """Account-currency value of 1 point for 1 lot"""
+        tick_size = template.trade_tick_size or template.point
+        return template.point * (template.trade_tick_value / tick_size) if tick_size else 0.0
+
+    def _record(self, record):
+        self.fills.append(record)
+        if self.fill_log is not None:
+            self.fill_log.append(record)
+        slippage = (record['fill_price'] - record['decision_price']) / record['point']
+        if record['side'] == "SELL":
+            slippage = -slippage
+        logging.info(
+            f"⚡ Filled {record['symbol']} #{record['ticket']} in {record['latency_ms']:.0f} ms "
+            f"(signal->fill, send {record['send_ms']:.0f} ms, {record['attempts']} attempt{'s' if record['attempts'] > 1 else ''}) "
+            f"| Slippage {slippage:+.0f} pts"
+        )
+        return record
+
+    def report(self):
+        """Signal-to-fill latency over the recorded orders"""
+        if not self.fills:
+            return ""
+        latency = np.array([f['latency_ms'] for f in self.fills])
+        retried = sum(1 for f in self.fills if f['attempts'] > 1)
+        return (f"{len(latency)} orders | avg {latency.mean():.0f} ms | p95 {np.percentile(latency, 95):.0f} ms"
+                f" | max {latency.max():.0f} ms | requoted {retried}")
+
+    def log_report(self, prefix=""):
+        report = self.report()
+        if report:
+            logging.info(f"{prefix}⚡ Signal->Fill -> {report}")
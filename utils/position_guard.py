@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+
+from utils.mt5_gateway import terminal as mt5
+
+
+class PositionGuard:
+    """
+    Position protection on its own thread, at a sub-second cadence.
+    - Reads only symbol_info_tick; positions come from a cache refreshed every
+      `positions_refresh` seconds (or right after invalidate())
+    - Calls `handler(position, tick, symbol_info)` for each position with our magic
+      number. The handler returns True when it changed the position (SL moved,
+      partial close...) so the cache is reloaded before the next check.
+    - All terminal calls go through the serialised gateway (utils/mt5_gateway.py)
+    """
+    def __init__(self, symbol, magic, handler, interval=0.2, positions_refresh=2.0):
+        self.symbol = symbol
+        self.magic = magic
+        self.handler = handler
+        self.interval = interval
+        self.positions_refresh = positions_refresh
+
+        self.positions = []
+        self.positions_time = 0.0
+        self.symbol_info = None
+        self.last_tick_msc = None
+        self.checks = 0
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"PositionGuard-{self.symbol}", daemon=True)
+        self._thread.start()
+        logging.info(f"🛡️ Position Guard started ({self.symbol}, every {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def invalidate(self):
+        """Forces a positions reload on the next check (call after opening/closing trades)"""
+        self.positions_time = 0.0
+
+    def refresh_positions(self):
+        positions = mt5.positions_get(symbol=self.symbol)
+        self.positions = [p for p in positions if p.magic == self.magic] if positions else []
+        self.positions_time = time.time()
+        self.last_tick_msc = None  # New positions must be checked even without a new tick
+
+    def check_once(self):
+        if self.symbol_info is None:
+            self.symbol_info = mt5.symbol_info(self.symbol)
+            if self.symbol_info is None:
+                return
+        if time.time() - self.positions_time >= self.positions_refresh:
+            self.refresh_positions()
+        if not self.positions:
+            return
+
+        tick = mt5.symbol_info_tick(self.symbol)
+        if tick is None or tick.time_msc == self.last_tick_msc:
+            return
+        self.last_tick_msc = tick.time_msc
+
+        changed = False
+        for pos in self.positions:
+            if self.handler(pos, tick, self.symbol_info):
+                changed = True
+        self.checks += 1
+        if changed:
+            self.invalidate()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.check_once()
+            except Exception as e:
+                logging.error(f"Position Guard Error: {e}")
+            self._stop.wait(self.interval)
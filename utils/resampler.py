@@ -0,0 +1,167 @@
+from collections import deque
+
+from config import timeframes as tf
+import numpy as np
+import pandas as pd
+
+from utils.bar_series import BarSeries
+
+TIMEFRAME_SECONDS = {
+    tf.TIMEFRAME_M1: 60,
+    tf.TIMEFRAME_M5: 300,
+    tf.TIMEFRAME_M15: 900,
+    tf.TIMEFRAME_M30: 1800,
+    tf.TIMEFRAME_H1: 3600,
+    tf.TIMEFRAME_H4: 14400,
+    tf.TIMEFRAME_D1: 86400,
+}
+
+
+class BarResampler:
+    """
+    Builds higher-timeframe bars (H1/H4/D1) from base-timeframe bars, in process.
+    - Bar times from MT5 are broker server time, so buckets (t - t % tf) line up
+      with the broker's own H1/H4/D1 candles
+    - Each closed base bar is folded in O(1); a higher bar closes when the first
+      base bar of the next bucket arrives
+    - The forming base bar only feeds a preview of the forming higher bar, so the
+      state never has to be rolled back
+    - Optional EMA on the higher-timeframe closes, same recursion as pandas
+      ewm(span, adjust=False)
+    """
+    def __init__(self, base_timeframe, timeframe, ema_period=None, capacity=2048):
+        self.base_seconds = TIMEFRAME_SECONDS[base_timeframe]
+        self.tf_seconds = TIMEFRAME_SECONDS[timeframe]
+        self.ema_period = ema_period
+        self.alpha = 2.0 / (ema_period + 1) if ema_period else None
+
+        self.last_base_time = None  # Last closed base bar folded in (epoch seconds)
+        self.bucket = None          # Start of the higher bar being built
+        self.bar = None             # [open, high, low, close] of that bar
+
+        # Closed higher-timeframe bars
+        self.times = deque(maxlen=capacity)
+        self.opens = deque(maxlen=capacity)
+        self.highs = deque(maxlen=capacity)
+        self.lows = deque(maxlen=capacity)
+        self.closes = deque(maxlen=capacity)
+        self.closed_count = 0
+        self.ema = None
+
+        self.forming = None      # (time, open, high, low, close) preview incl. the forming base bar
+        self.forming_ema = None
+        self.forming_count = 0   # Higher bars available incl. the preview (like len(df) from MT5)
+
+    @staticmethod
+    def supports(base_timeframe, timeframe):
+        base = TIMEFRAME_SECONDS.get(base_timeframe)
+        target = TIMEFRAME_SECONDS.get(timeframe)
+        return bool(base and target and target > base and target % base == 0)
+
+    def seed_bars(self, htf_bars):
+        """Base bars needed to build `htf_bars` higher bars"""
+        return htf_bars * (self.tf_seconds // self.base_seconds)
+
+    def bucket_of(self, t):
+        return t - t % self.tf_seconds
+
+    def _ema_step(self, ema, close):
+        if ema is None:
+            return close
+        # pandas ewm(adjust=False): weights (1 - alpha, alpha), normalised
+        old_wt = 1.0 - self.alpha
+        return (old_wt * ema + self.alpha * close) / (old_wt + self.alpha)
+
+    def _close_bucket(self):
+        o, h, l, c = self.bar
+        self.times.append(self.bucket)
+        self.opens.append(o)
+        self.highs.append(h)
+        self.lows.append(l)
+        self.closes.append(c)
+        self.closed_count += 1
+        if self.alpha is not None:
+            self.ema = self._ema_step(self.ema, c)
+
+    def _fold(self, t, o, h, l, c):
+        bucket = self.bucket_of(t)
+        if self.bucket is None or bucket != self.bucket:
+            if self.bucket is not None:
+                self._close_bucket()
+            self.bucket = bucket
+            self.bar = [o, h, l, c]
+        else:
+            bar = self.bar
+            if h > bar[1]: bar[1] = h
+            if l < bar[2]: bar[2] = l
+            bar[3] = c
+        self.last_base_time = t
+
+    def update(self, data):
+        """
+        Folds in base bars newer than the last call. The last row is treated as the
+        forming base bar (as returned by copy_rates_from_pos(..., 0, n)).
+        """
+        bars = BarSeries.wrap(data)
+        if bars is None or len(bars) == 0:
+            return
+        times = bars.time.astype('datetime64[s]').astype(np.int64)
+        o, h, l, c = bars['open'], bars['high'], bars['low'], bars['close']
+
+        start = 0
+        if self.last_base_time is not None:
+            start = int(np.searchsorted(times, self.last_base_time, side='right'))
+        for i in range(start, len(times) - 1):
+            self._fold(int(times[i]), o[i], h[i], l[i], c[i])
+
+        # Preview of the forming higher bar
+        t = int(times[-1])
+        if self.last_base_time is not None and t <= self.last_base_time:
+            return
+        bucket = self.bucket_of(t)
+        ema = self.ema
+        count = self.closed_count
+        if self.bucket is not None and bucket == self.bucket:
+            bo, bh, bl, _ = self.bar
+            self.forming = (bucket, bo, max(bh, h[-1]), min(bl, l[-1]), c[-1])
+        else:
+            if self.bucket is not None:
+                # The bar being built is complete; count it without closing it yet
+                count += 1
+                if self.alpha is not None:
+                    ema = self._ema_step(ema, self.bar[3])
+            self.forming = (bucket, o[-1], h[-1], l[-1], c[-1])
+        self.forming_count = count + 1
+        self.forming_ema = self._ema_step(ema, self.forming[4]) if self.alpha is not None else None
+
+    def trend(self):
+        """'UP' / 'DOWN' / 'RANGE' for forming close vs EMA, or None until enough bars exist"""
+        if self.forming is None or self.alpha is None or self.forming_count < self.ema_period:
+            return None
+        price = self.forming[4]
+        if price > self.forming_ema:
+            return "UP"
+        elif price < self.forming_ema:
+            return "DOWN"
+        return "RANGE"
+
+    def to_frame(self, include_forming=True):
+        """Higher-timeframe bars as a DataFrame (time, open, high, low, close)"""
+        rows = {
+            'time': list(self.times),
+            'open': list(self.opens),
+            'high': list(self.highs),
+            'low': list(self.lows),
+            'close': list(self.closes),
+        }
+        pending = []
+        if include_forming and self.forming is not None:
+            if self.bucket is not None and self.forming[0] != self.bucket:
+                pending.append((self.bucket, *self.bar))
+            pending.append(self.forming)
+        for t, o, h, l, c in pending:
+            for key, value in zip(('time', 'open', 'high', 'low', 'close'), (t, o, h, l, c)):
+                rows[key].append(value)
+        df = pd.DataFrame(rows)
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        return df
@@ -0,0 +1,402 @@
+import numpy as np
+import pandas as pd
+import logging
+import json
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+from config.settings import Config
+from utils.mt5_gateway import terminal as mt5
+from utils.bar_series import BarSeries
+from utils.indicator_graph import IndicatorEngine, ALL_COLUMNS
+
+# --- Segment Layout ---
+# [0:64)      int64 header   (see HDR_*)
+# [64:80)     float64 tick   (bid, ask)
+# [80:1024)   JSON column names (utf-8, zero padded)
+# [1024:...)  float64 data[n_cols, 2 * capacity]
+#
+# Every bar is written twice (slot and slot + capacity), so the newest N bars are
+# always one contiguous slice and readers can take zero-copy views (SharedBars:
+# only the time column is converted; a publish while they are read -> read again).
+SEGMENT_MAGIC = 0x58415542  # "XAUB"
+SEGMENT_VERSION = 1
+HEADER_BYTES = 64
+TICK_OFFSET = 64
+NAMES_OFFSET = 80
+DATA_OFFSET = 1024
+
+HDR_MAGIC = 0
+HDR_VERSION = 1
+HDR_SEQ = 2        # Seqlock: odd while the publisher is writing
+HDR_CAPACITY = 3
+HDR_NCOLS = 4
+HDR_COUNT = 5      # Total bars ever written (global index of the next bar)
+HDR_UPDATED_NS = 6 # time.time_ns() of the last publish
+HDR_TICK_TIME = 7  # Last tick time (server, unix seconds)
+
+BAR_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'tick_volume', 'spread']
+INDICATOR_COLUMNS = ALL_COLUMNS
+DEFAULT_COLUMNS = BAR_COLUMNS + INDICATOR_COLUMNS
+
+
+def segment_name(symbol, timeframe):
+    return f"mdata_{symbol}_{timeframe}"
+
+
+def segment_size(capacity, n_cols):
+    return DATA_OFFSET + n_cols * 2 * capacity * 8
+
+
+def _bar_times(seconds):
+    """Segment time column (float64 unix seconds) -> datetime64[ns] for BarSeries.time"""
+    return seconds.astype(np.int64).astype('datetime64[s]').astype('datetime64[ns]')
+
+
+class SharedBars(BarSeries):
+    """
+    BarSeries whose columns are zero-copy views into a shared segment.
+    The views are live: the publisher may rewrite the forming bar while a strategy reads them.
+    - is_current(): no publish since the views were taken
+    - reread(copy=False): the same newest bars again (fresh views, or a private copy)
+    Use consistent() to run a decision on them.
+    """
+    __slots__ = ('buffer', 'count', 'seq')
+
+    def __init__(self, columns, time, buffer, count, seq):
+        super().__init__(columns, time=time)
+        self.buffer = buffer
+        self.count = count
+        self.seq = seq
+
+    def is_current(self):
+        return self.buffer.is_current(self.seq)
+
+    def reread(self, copy=False):
+        return self.buffer.bars(self.count, copy=copy)
+
+
+def consistent(bars, use, attempts=3):
+    """
+    use(bars) for bars that may be live shared views. If the publisher wrote while `use`
+    read them, it runs again on a fresh read (a private copy on the last attempt).
+    Returns (bars, result) with the bars the result was computed from; (None, None)
+    if the feed went away in between. Any other bars: use(bars) once.
+    """
+    for attempt in range(attempts):
+        result = use(bars)
+        if not isinstance(bars, SharedBars) or bars.is_current():
+            return bars, result
+        bars = bars.reread(copy=attempt >= attempts - 2)
+        if bars is None:
+            break
+    return None, None
+
+
+class SharedBarBuffer:
+    """A seqlock-protected ring buffer of float64 columns in one shared memory segment"""
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        buf = shm.buf
+        self.header = np.ndarray((8,), dtype=np.int64, buffer=buf, offset=0)
+        self.tick = np.ndarray((2,), dtype=np.float64, buffer=buf, offset=TICK_OFFSET)
+        self.capacity = int(self.header[HDR_CAPACITY])
+        self.n_cols = int(self.header[HDR_NCOLS])
+        raw_names = bytes(buf[NAMES_OFFSET:DATA_OFFSET]).rstrip(b'\x00')
+        self.columns = json.loads(raw_names.decode('utf-8'))
+        self.col_index = {name: i for i, name in enumerate(self.columns)}
+        self.data = np.ndarray(
+            (self.n_cols, 2 * self.capacity), dtype=np.float64, buffer=buf, offset=DATA_OFFSET
+        )
+
+    # --- Lifecycle ---
+    @classmethod
+    def create(cls, name, capacity, columns=DEFAULT_COLUMNS):
+        names = json.dumps(list(columns)).encode('utf-8')
+        if len(names) > DATA_OFFSET - NAMES_OFFSET:
+            raise ValueError("Too many column names for the segment header")
+        try:
+            # Replace a segment left behind by a crashed publisher
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=segment_size(capacity, len(columns)))
+        header = np.ndarray((8,), dtype=np.int64, buffer=shm.buf, offset=0)
+        header[:] = 0
+        header[HDR_MAGIC] = SEGMENT_MAGIC
+        header[HDR_VERSION] = SEGMENT_VERSION
+        header[HDR_CAPACITY] = capacity
+        header[HDR_NCOLS] = len(columns)
+        shm.buf[NAMES_OFFSET:NAMES_OFFSET + len(names)] = names
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attaches to an existing segment. Returns None if the publisher is not running."""
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            return None
+        # Python < 3.13 registers attached segments with the resource tracker, which would
+        # unlink the publisher's segment when this reader exits.
+        if os.name == 'posix' and sys.version_info < (3, 13):
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, 'shared_memory')
+            except Exception:
+                pass
+        header = np.ndarray((8,), dtype=np.int64, buffer=shm.buf, offset=0)
+        if header[HDR_MAGIC] != SEGMENT_MAGIC or header[HDR_VERSION] != SEGMENT_VERSION:
+            logging.warning(f"⚠️ Shared segment {name} has an unknown layout, ignoring")
+            shm.close()
+            return None
+        return cls(shm)
+
+    def close(self):
+        # Drop numpy views before closing the mapping
+        self.header = self.tick = self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    # --- Writer ---
+    @property
+    def count(self):
+        return int(self.header[HDR_COUNT])
+
+    def last_time(self):
+        count = self.count
+        if count == 0:
+            return None
+        return float(self.data[self.col_index['time'], (count - 1) % self.capacity])
+
+    def write(self, columns, tick=None):
+        """
+        Publishes bars (dict of equal-length arrays, must include 'time', ascending).
+        Bars with the same time as the newest published bar overwrite it (forming candle);
+        newer bars are appended. Older bars are ignored.
+        """
+        times = np.asarray(columns['time'], dtype=np.float64)
+        last = self.last_time()
+        start = 0 if last is None else int(np.searchsorted(times, last, side='left'))
+        times = times[start:]
+        n = len(times)
+
+        header = self.header
+        header[HDR_SEQ] += 1  # Odd: write in progress
+        try:
+            if n > 0:
+                first_global = self.count - 1 if (last is not None and times[0] == last) else self.count
+                slots = (np.arange(first_global, first_global + n) % self.capacity)
+                for name, i in self.col_index.items():
+                    values = columns.get(name)
+                    if values is None:
+                        values = np.full(n, np.nan)
+                    else:
+                        values = np.asarray(values, dtype=np.float64)[start:]
+                    self.data[i, slots] = values
+                    self.data[i, slots + self.capacity] = values
+                header[HDR_COUNT] = first_global + n
+            if tick is not None:
+                header[HDR_TICK_TIME] = int(tick[0])
+                self.tick[0] = tick[1]
+                self.tick[1] = tick[2]
+            header[HDR_UPDATED_NS] = time.time_ns()
+        finally:
+            header[HDR_SEQ] += 1  # Even: consistent
+
+    # --- Reader ---
+    def views(self, n):
+        """
+        Zero-copy views of the newest `n` bars: ({column: ndarray}, seq).
+        The views are live; call `is_current(seq)` after using them to know
+        whether the publisher wrote in the meantime.
+        """
+        for _ in range(100):
+            seq = int(self.header[HDR_SEQ])
+            if seq % 2:
+                time.sleep(0)
+                continue
+            count = self.count
+            n_bars = min(n, count, self.capacity)
+            start = (count - n_bars) % self.capacity
+            out = {name: self.data[i, start:start + n_bars] for name, i in self.col_index.items()}
+            if int(self.header[HDR_SEQ]) == seq:
+                return out, seq
+        return None, None
+
+    def is_current(self, seq):
+        return int(self.header[HDR_SEQ]) == seq
+
+    def read(self, n):
+        """Consistent copy of the newest `n` bars (retries while the publisher writes)"""
+        for _ in range(100):
+            views, seq = self.views(n)
+            if views is None:
+                break
+            out = {name: v.copy() for name, v in views.items()}
+            if self.is_current(seq):
+                return out
+        return None
+
+    def bars(self, n, copy=False):
+        """Newest `n` bars as SharedBars (zero-copy views) or, with copy=True, a private BarSeries"""
+        if copy:
+            columns = self.read(n)
+            if columns is None or len(columns['time']) == 0:
+                return None
+            return BarSeries(columns, time=_bar_times(columns.pop('time')))
+        views, seq = self.views(n)
+        if views is None or len(views['time']) == 0:
+            return None
+        return SharedBars(views, _bar_times(views.pop('time')), self, n, seq)
+
+    def age_seconds(self):
+        updated = int(self.header[HDR_UPDATED_NS])
+        if updated == 0:
+            return float('inf')
+        return (time.time_ns() - updated) / 1e9
+
+    def last_tick(self):
+        """(server_time, bid, ask) of the last published tick"""
+        return int(self.header[HDR_TICK_TIME]), float(self.tick[0]), float(self.tick[1])
+
+
+class SharedMarketFeed:
+    """Reader side used by the bots: attaches lazily per (symbol, timeframe)"""
+    def __init__(self, max_age_seconds=None):
+        self.max_age = max_age_seconds if max_age_seconds is not None else Config.SHARED_DATA_MAX_AGE
+        self.buffers = {}
+
+    def get_buffer(self, symbol, timeframe):
+        key = (symbol, timeframe)
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = SharedBarBuffer.attach(segment_name(symbol, timeframe))
+            if buffer is None:
+                return None
+            self.buffers[key] = buffer
+            logging.info(f"🔗 Attached to shared market data: {symbol} TF={timeframe}")
+        if buffer.age_seconds() > self.max_age:
+            return None
+        return buffer
+
+    def get_bars(self, symbol, timeframe, count):
+        """SharedBars (zero-copy) of the newest `count` bars with indicators, or None if the feed is unavailable/stale"""
+        buffer = self.get_buffer(symbol, timeframe)
+        if buffer is None:
+            return None
+        return buffer.bars(count)
+
+    def get_frame(self, symbol, timeframe, count):
+        """
+        DataFrame copy of the newest `count` bars with indicators, or None if the feed is unavailable/stale.
+        For callers that add or change columns (BOT-BTC); read-only callers use get_bars().
+        """
+        buffer = self.get_buffer(symbol, timeframe)
+        if buffer is None:
+            return None
+        columns = buffer.read(count)
+        if columns is None or len(columns['time']) == 0:
+            return None
+        df = pd.DataFrame(columns)
+        df['time'] = pd.to_datetime(df['time'].astype(np.int64), unit='s')
+        return df
+
+    def get_server_time(self, symbol, timeframe):
+        buffer = self.get_buffer(symbol, timeframe)
+        if buffer is None:
+            return None
+        tick_time = buffer.last_tick()[0]
+        return tick_time if tick_time > 0 else None
+
+    def close(self):
+        for buffer in self.buffers.values():
+            buffer.close()
+        self.buffers.clear()
+
+
+class MarketDataPublisher:
+    """
+    Owns the MT5 connection and publishes bars + indicators for every configured feed.
+    Each feed is fetched in full once, then only the last few bars are pulled per cycle.
+    """
+    def __init__(self, feeds=None, history=None, capacity=None, interval=None):
+        self.feeds = feeds or Config.SHARED_DATA_FEEDS
+        self.history = history or (Config.SMC_LOOKBACK + 500)
+        self.capacity = capacity or Config.SHARED_DATA_CAPACITY
+        self.interval = interval if interval is not None else Config.SHARED_DATA_INTERVAL
+        self.buffers = {}
+        self.frames = {}
+        self.indicator_engine = IndicatorEngine()
+
+    def connect(self):
+        if not mt5.initialize():
+            logging.error(f"Initialize failed, error code = {mt5.last_error()}")
+            return False
+        for symbol, _ in self.feeds:
+            mt5.symbol_select(symbol, True)
+        return True
+
+    def open_segments(self):
+        for symbol, timeframe in self.feeds:
+            name = segment_name(symbol, timeframe)
+            self.buffers[(symbol, timeframe)] = SharedBarBuffer.create(name, self.capacity)
+            logging.info(f"📡 Publishing {symbol} TF={timeframe} -> shared memory '{name}'")
+
+    def refresh_frame(self, symbol, timeframe):
+        """Keeps a rolling window of bars; after the first pull only the last 3 bars are fetched"""
+        df = self.frames.get((symbol, timeframe))
+        count = self.history if df is None else 3
+        rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
+        if rates is None or len(rates) == 0:
+            return None
+
+        fresh = pd.DataFrame(rates)[BAR_COLUMNS]
+        if df is None:
+            df = fresh
+        else:
+            df = pd.concat([df[df['time'] < fresh['time'].iloc[0]], fresh], ignore_index=True)
+            df = df.iloc[-self.history:].reset_index(drop=True)
+        self.frames[(symbol, timeframe)] = df
+        return df
+
+    def publish_once(self):
+        for (symbol, timeframe), buffer in self.buffers.items():
+            df = self.refresh_frame(symbol, timeframe)
+            if df is None:
+                logging.warning(f"❌ Failed to get data for {symbol} TF={timeframe}")
+                continue
+
+            calc = df.copy()
+            self.indicator_engine.compute(calc, INDICATOR_COLUMNS, owner=f"{symbol}/{timeframe}")
+            tick = mt5.symbol_info_tick(symbol)
+            tick_data = (tick.time, tick.bid, tick.ask) if tick else None
+
+            # Only the bars from the last published candle onwards are (re)written
+            buffer.write({name: calc[name].to_numpy() for name in calc.columns}, tick=tick_data)
+
+    def run(self):
+        if not self.connect():
+            return
+        self.open_segments()
+        logging.info(f"✅ Market Data Publisher started ({len(self.buffers)} feeds, every {self.interval}s)")
+        try:
+            while True:
+                try:
+                    self.publish_once()
+                except Exception as e:
+                    logging.error(f"Publish Error: {e}")
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("\n🛑 Publisher stopped by user")
+        finally:
+            for buffer in self.buffers.values():
+                buffer.close()
+            mt5.shutdown()
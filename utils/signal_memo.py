@@ -0,0 +1,115 @@
+import logging
+import operator
+
+from config.settings import Config
+
+# Bot calls a decision may depend on. Re-run on every memo hit and compared with the
+# values the cached decision saw (cheap: tick / resampler / positions reads)
+LIVE_GUARDS = ('get_server_time', 'get_mtf_trend', 'check_open_positions')
+
+
+def _guard_value(name, value):
+    # Inside trading hours strategies only read the server hour
+    if name == 'get_server_time':
+        return value.hour
+    return value
+
+
+def _trading_hour(hour):
+    return Config.TRADING_START_HOUR <= hour <= Config.TRADING_END_HOUR
+
+
+class _Recorder:
+    """Stands in for strategy.bot during a fresh analyze(): forwards every call and notes the live guards it read"""
+    def __init__(self, bot):
+        self._bot = bot
+        self.guards = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._bot, name)
+        if name not in LIVE_GUARDS:
+            return attr
+
+        def call():
+            value = attr()
+            self.guards.setdefault(name, _guard_value(name, value))
+            return value
+        return call
+
+
+class SignalMemo:
+    """
+    Closed-candle decisions kept for the life of the signal bar.
+    With USE_REALTIME_CANDLE = False analyze() reads bar [-2], which stays the same
+    for every loop until the next bar closes, so the full analysis only needs to run once per
+    (closed bar, settings, forming-bar inputs of strategy.live_inputs()).
+    - Settings: Config attributes (by identity) + the bot's strategy / symbol overrides
+    - Live guards (server hour, MTF trend, open positions): only the ones the
+      cached decision actually read are re-run on a hit; any change -> fresh analyze()
+    - Entries of older bars are dropped when a new bar closes
+    """
+    MAX_ENTRIES = 64  # Per closed bar (distinct forming-bar inputs)
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.bar_key = None
+        self.settings = None
+        self.entries = {}  # live inputs -> (guards, (signal, status_detail, extra_data))
+        self.hits = self.misses = 0
+
+    def _settings_changed(self, bot):
+        values = tuple(vars(Config).values())
+        saved = self.settings
+        if saved is not None and len(saved[0]) == len(values) and all(map(operator.is_, saved[0], values)) \
+                and saved[1] == bot.config_overrides and saved[2] == bot.symbol_overrides:
+            return False
+        self.settings = (values, dict(bot.config_overrides), dict(bot.symbol_overrides))
+        return True
+
+    def analyze(self, bars):
+        strategy = self.strategy
+        bot = strategy.bot
+        if Config.USE_REALTIME_CANDLE or len(bars) < 2:
+            return strategy.analyze(bars)
+
+        times = bars.time
+        bar_key = (len(bars), times[0], times[-2])
+        if self._settings_changed(bot) or bar_key != self.bar_key:
+            self.bar_key = bar_key
+            self.entries = {}
+
+        live = strategy.live_inputs(bars)
+        entry = self.entries.get(live)
+        if entry is not None:
+            guards, result = entry
+            if all(_guard_value(name, getattr(bot, name)()) == value for name, value in guards.items()):
+                self.hits += 1
+                signal, status_detail, extra_data = result
+                return signal, status_detail, dict(extra_data)
+
+        self.misses += 1
+        recorder = _Recorder(bot)
+        strategy.bot = recorder
+        try:
+            result = strategy.analyze(bars)
+        finally:
+            strategy.bot = bot
+        hour = recorder.guards.get('get_server_time')
+        if hour is not None and not _trading_hour(hour):
+            return result  # Sleep status shows the clock (HH:MM): not kept, and cheap anyway
+        if len(self.entries) >= self.MAX_ENTRIES:
+            self.entries.pop(next(iter(self.entries)))
+        signal, status_detail, extra_data = result
+        self.entries[live] = (recorder.guards, (signal, status_detail, dict(extra_data)))
+        return result
+
+    def report(self):
+        lookups = self.hits + self.misses
+        if not lookups:
+            return ""
+        return f"hits {self.hits}/{lookups} ({self.hits / lookups:.0%})"
+
+    def log_report(self, prefix=""):
+        report = self.report()
+        if report:
+            logging.info(f"{prefix}🧠 Signal Memo -> {report}")
@@ -0,0 +1,68 @@
+import ast
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ('main.py', 'dashboard.py', 'analyze_stats.py')
+
+# Runs the collected imports in a fresh interpreter and reports time + whether the terminal got loaded
+_PROBE = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{imports}
+print('IMPORT_MS', (time.perf_counter() - start) * 1000)
+print('TERMINAL', 'MetaTrader5' in sys.modules)
+"""
+
+
+def script_imports(path):
+    """Every import statement of a script, top level or inside functions / `if __name__` blocks"""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    lines = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)) and not (isinstance(node, ast.ImportFrom) and node.level):
+            lines.append(ast.unparse(node))
+    return list(dict.fromkeys(lines))
+
+
+def measure(script, runs=3):
+    """Best-of-`runs` cold import time (ms), terminal loaded?, slowest modules [(ms, name)]"""
+    code = _PROBE.format(root=ROOT, imports='\n'.join(script_imports(os.path.join(ROOT, script))))
+    best, terminal, slowest = None, None, []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, cwd=ROOT)
+        if proc.returncode != 0:
+            return None, None, proc.stderr.strip().splitlines()[-1:]
+        ms = float(re.search(r'IMPORT_MS (\S+)', proc.stdout).group(1))
+        if best is None or ms < best:
+            best = ms
+            terminal = 'TERMINAL True' in proc.stdout
+            # -X importtime: "import time: self [us] | cumulative | imported package"
+            top_level = []
+            for line in proc.stderr.splitlines():
+                parts = line.split('|')
+                if len(parts) == 3 and parts[1].strip().isdigit() and not parts[2].startswith('  '):
+                    top_level.append((int(parts[1]) / 1000, parts[2].strip()))
+            slowest = sorted(top_level, reverse=True)[:5]
+    return best, terminal, slowest
+
+
+if __name__ == "__main__":
+    # Set default encoding for stdout to handle emojis
+    if sys.stdout.encoding != 'utf-8':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    # Usage: python utils/startup_time.py [script.py ...]
+    for script in sys.argv[1:] or TARGETS:
+        ms, terminal, slowest = measure(script)
+        if ms is None:
+            print(f"❌ {script}: import failed -> {' '.join(slowest)}")
+            continue
+        print(f"⏱️ {script}: {ms:.0f} ms cold import | MetaTrader5 loaded: {'yes' if terminal else 'no'}")
+        for module_ms, name in slowest:
+            print(f"    {module_ms:8.1f} ms  {name}")
@@ -0,0 +1,147 @@
+import json
+import logging
+import os
+import pickle
+
+import pandas as pd
+
+STATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'state')
+
+
+def _encode(value):
+    if isinstance(value, pd.Timestamp):
+        return {'__ts__': value.isoformat()}
+    if isinstance(value, (set, frozenset)):
+        return {'__set__': sorted(value)}
+    raise TypeError(f"Not journalable: {type(value).__name__}")
+
+
+def _decode(obj):
+    if '__ts__' in obj:
+        return pd.Timestamp(obj['__ts__'])
+    if '__set__' in obj:
+        return set(obj['__set__'])
+    return obj
+
+
+def _write_atomic(path, data):
+    """tmp file + fsync + rename: the old file stays intact until the new one is complete"""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class StateJournal:
+    """
+    Small key/value state that survives crashes and reboots.
+    - set(key, value): one JSON line appended to `<name>.journal` and fsync'd
+      before returning (write-ahead: the change is on disk before we act on it)
+    - On open: `<name>.state` (last compaction) + journal lines replayed in order.
+      A torn last line from a crash mid-write is ignored.
+    - Every `compact_every` changes the state is rewritten atomically and the
+      journal truncated, so replay stays short
+    Values: JSON types, pd.Timestamp and sets.
+    """
+    def __init__(self, name, directory=STATE_DIR, compact_every=200):
+        os.makedirs(directory, exist_ok=True)
+        self.state_path = os.path.join(directory, name + '.state')
+        self.journal_path = os.path.join(directory, name + '.journal')
+        self.compact_every = compact_every
+        self.state = {}
+        self.pending_lines = 0
+        self._load()
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+
+    def _load(self):
+        if os.path.isfile(self.state_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    self.state = json.load(f, object_hook=_decode)
+            except Exception as e:
+                logging.error(f"State Load Error ({self.state_path}): {e}")
+        if os.path.isfile(self.journal_path):
+            good = 0
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        entry = json.loads(line.decode('utf-8'), object_hook=_decode)
+                    except ValueError:
+                        break  # Torn write: everything after it is incomplete
+                    self.state[entry['k']] = entry['v']
+                    self.pending_lines += 1
+                    good += len(line)
+            if good < os.path.getsize(self.journal_path):
+                # Cut the torn tail so new lines don't get appended onto it
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(good)
+                logging.warning(f"State Journal: dropped a torn write ({self.journal_path})")
+
+    def get(self, key, default=None):
+        return self.state.get(key, default)
+
+    def set(self, key, value):
+        if key in self.state and self.state[key] == value:
+            return
+        self.state[key] = value
+        try:
+            self._journal.write(json.dumps({'k': key, 'v': value}, default=_encode) + '\n')
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self.pending_lines += 1
+            if self.pending_lines >= self.compact_every:
+                self.compact()
+        except Exception as e:
+            logging.error(f"State Journal Error: {e}")
+
+    def compact(self):
+        _write_atomic(self.state_path, json.dumps(self.state, default=_encode).encode('utf-8'))
+        self._journal.close()
+        self._journal = open(self.journal_path, 'w', encoding='utf-8')
+        self.pending_lines = 0
+
+    def close(self):
+        self._journal.close()
+
+
+class Snapshot:
+    """
+    Pickled warm-start data (cached bars per timeframe, resampler state...).
+    Written atomically; a missing or unreadable snapshot just means a cold start.
+    """
+    def __init__(self, name, directory=STATE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, name + '.snapshot')
+
+    def save(self, data):
+        self.write(self.encode(data))
+
+    def encode(self, data):
+        """Pickled bytes (None if `data` can't be pickled). Split from write() so the disk part can run elsewhere."""
+        try:
+            return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logging.error(f"Snapshot Save Error: {e}")
+            return None
+
+    def write(self, blob):
+        if blob is None:
+            return
+        try:
+            _write_atomic(self.path, blob)
+        except Exception as e:
+            logging.error(f"Snapshot Save Error: {e}")
+
+    def load(self):
+        if not os.path.isfile(self.path):
+            return None
+        try:
+            with open(self.path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logging.warning(f"Snapshot unreadable, cold start ({self.path}): {e}")
+            return None